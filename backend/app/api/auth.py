@@ -1,11 +1,14 @@
 import json
 from datetime import datetime
 from ..core.database import get_database
-from ..core.security import security
+from ..core.security import PasswordHasherBusy, password_hasher, security
 from ..models.user import User
-from ..schemas.user import UserCreate, UserLogin, UserResponse, TokenResponse
-from .deps import HTTPException, parse_json_body, create_response, create_error_response
+from ..schemas.user import PasswordChange, UserCreate, UserLogin, UserResponse, TokenResponse
+from ..services.auth_service import auth_service
+from .deps import (HTTPException, RateLimitExceeded, check_rate_limit, client_ip, parse_json_body, rate_limit_response,
+                   rate_limited, reset_rate_limit, create_response, create_error_response)
 
+@rate_limited("register", client_ip)
 def register(request, response):
     """Register a new user"""
     try:
@@ -35,7 +38,7 @@ def register(request, response):
             return create_error_response("Email already registered", 400)
         
         # Hash password and create user
-        password_hash = security.hash_password(user_data.password)
+        password_hash = password_hasher.hash(user_data.password)
         
         user_id = db.execute_insert(
             """INSERT INTO users (email, password_hash, full_name, is_active, created_at, updated_at) 
@@ -69,12 +72,20 @@ def register(request, response):
     except HTTPException as e:
         response.status_code = e.status_code
         return create_error_response(e.detail, e.status_code)
+    except PasswordHasherBusy:
+        response.status_code = 503
+        return create_error_response("Authentication is busy, please retry shortly", 503)
     except Exception as e:
         response.status_code = 500
         return create_error_response("Internal server error", 500)
 
+@rate_limited("login_ip", client_ip)
 def login(request, response):
-    """Authenticate user and return token"""
+    """Authenticate user and return token.
+    
+    Attempts are limited per client address (decorator) and per email; both
+    checks run before the users lookup and bcrypt.
+    """
     try:
         body = parse_json_body(request)
         login_data = UserLogin(
@@ -88,6 +99,9 @@ def login(request, response):
             response.status_code = 400
             return create_error_response(error_msg, 400)
         
+        email_key = login_data.email.strip().lower()
+        check_rate_limit("login_email", email_key)
+        
         db = get_database()
         
         # Get user from database
@@ -107,16 +121,20 @@ def login(request, response):
             response.status_code = 401
             return create_error_response("Account is disabled", 401)
         
-        # Verify password
-        if not security.verify_password(login_data.password, user.password_hash):
+        # Verify password (upgrading the hash if BCRYPT_ROUNDS changed)
+        verified, new_hash = password_hasher.verify_and_update(login_data.password, user.password_hash)
+        if not verified:
             response.status_code = 401
             return create_error_response("Invalid email or password", 401)
         
         # Update last login
-        db.execute_query(
-            "UPDATE users SET last_login = %s WHERE id = %s",
-            (datetime.utcnow(), user.id)
-        )
+        with db.get_cursor() as cursor:
+            cursor.execute(
+                "UPDATE users SET last_login = %s, password_hash = COALESCE(%s, password_hash) WHERE id = %s",
+                (datetime.utcnow(), new_hash, user.id)
+            )
+        
+        reset_rate_limit("login_email", email_key)
         
         # Create token
         token = security.create_user_token(user.id, user.email)
@@ -137,9 +155,14 @@ def login(request, response):
         
         return create_response(token_response.__dict__, "Login successful")
         
+    except RateLimitExceeded as e:
+        return rate_limit_response(response, e)
     except HTTPException as e:
         response.status_code = e.status_code
         return create_error_response(e.detail, e.status_code)
+    except PasswordHasherBusy:
+        response.status_code = 503
+        return create_error_response("Authentication is busy, please retry shortly", 503)
     except Exception as e:
         response.status_code = 500
         return create_error_response("Internal server error", 500)
@@ -166,4 +189,45 @@ def get_current_user_info(request, response):
         return create_error_response(e.detail, e.status_code)
     except Exception as e:
         response.status_code = 500
-        return create_error_response("Internal server error", 500)
\ No newline at end of file
+        return create_error_response("Internal server error", 500)
+
+@rate_limited("change_password")
+def change_password(request, response):
+    """Change the current user's password.
+    
+    Cached sessions of the user are dropped, so the next request with any of
+    their tokens is checked against the database again.
+    """
+    try:
+        from .deps import require_auth
+        user = require_auth(request)
+        body = parse_json_body(request)
+        change = PasswordChange(
+            current_password=body.get('current_password', ''),
+            new_password=body.get('new_password', '')
+        )
+        
+        is_valid, error_msg = change.validate()
+        if not is_valid:
+            response.status_code = 400
+            return create_error_response(error_msg, 400)
+        
+        if not password_hasher.verify(change.current_password, user.password_hash):
+            response.status_code = 401
+            return create_error_response("Current password is incorrect", 401)
+        
+        if not auth_service.change_password(user.id, change.new_password):
+            response.status_code = 404
+            return create_error_response("User not found", 404)
+        
+        return create_response(None, "Password changed successfully")
+        
+    except HTTPException as e:
+        response.status_code = e.status_code
+        return create_error_response(e.detail, e.status_code)
+    except PasswordHasherBusy:
+        response.status_code = 503
+        return create_error_response("Authentication is busy, please retry shortly", 503)
+    except Exception as e:
+        response.status_code = 500
+        return create_error_response("Internal server error", 500)
@@ -2,36 +2,127 @@ import json
 from datetime import datetime, timedelta, date
 from typing import Dict, List, Any
 from ..core.database import get_database
+from ..core.query_batch import QueryBatch
+from ..core.cache import cached_response, response_cache
+from ..core.config import settings
+from ..services.prediction_history import DAILY_PREDICTION_ERRORS_SQL
 from .deps import create_response, create_error_response, require_auth
 
+# Response cache namespaces, one per endpoint
+STATS_CACHE = "dashboard_stats"
+PREDICTION_SUMMARY_CACHE = "prediction_summary"
+STO_PERFORMANCE_CACHE = "sto_performance"
+SUPPLY_ANALYTICS_CACHE = "supply_analytics"
+
+# Endpoints whose aggregations read each table family
+STO_DEPENDENT_CACHES = (STATS_CACHE, PREDICTION_SUMMARY_CACHE, STO_PERFORMANCE_CACHE)
+WAREHOUSE_DEPENDENT_CACHES = (STATS_CACHE, SUPPLY_ANALYTICS_CACHE)
+SUPPLY_DEPENDENT_CACHES = (STATS_CACHE, STO_PERFORMANCE_CACHE, SUPPLY_ANALYTICS_CACHE)
+SALES_DEPENDENT_CACHES = (STATS_CACHE, STO_PERFORMANCE_CACHE)
+PREDICTION_DEPENDENT_CACHES = (STATS_CACHE, PREDICTION_SUMMARY_CACHE, STO_PERFORMANCE_CACHE)
+# Deletes cascade into sales, predictions and supplies, so they touch everything
+ALL_DASHBOARD_CACHES = (STATS_CACHE, PREDICTION_SUMMARY_CACHE, STO_PERFORMANCE_CACHE, SUPPLY_ANALYTICS_CACHE)
+
+def invalidate_dashboard_cache(*namespaces: str):
+    """Drop cached dashboard responses after a write to the underlying tables"""
+    response_cache.invalidate(*namespaces)
+
+@cached_response(STATS_CACHE, settings.RESPONSE_CACHE_TTLS[STATS_CACHE])
 def get_dashboard_stats(request, response):
     """Get dashboard statistics and chart data"""
     try:
-        db = get_database()
+        # All dashboard queries are independent, so run them as one concurrent batch
+        batch = QueryBatch()
         
-        # Get basic counts
-        total_stos = db.execute_one("SELECT COUNT(*) FROM sto WHERE status = 'Active'")[0]
-        total_warehouses = db.execute_one("SELECT COUNT(*) FROM warehouse WHERE status = 'Active'")[0]
-        pending_supplies = db.execute_one("SELECT COUNT(*) FROM supply_warehouse WHERE status = 'Pending'")[0]
+        # Basic counts
+        batch.add("total_stos", "SELECT COUNT(*) FROM sto WHERE status = 'Active'", fetch="one")
+        batch.add("total_warehouses", "SELECT COUNT(*) FROM warehouse WHERE status = 'Active'", fetch="one")
+        batch.add("pending_supplies", "SELECT COUNT(*) FROM supply_warehouse WHERE status = 'Pending'", fetch="one")
         
-        # Get recent sales data for chart (last 30 days)
+        # Recent sales data for chart (last 30 days)
         end_date = date.today()
         start_date = end_date - timedelta(days=30)
         
-        sales_data = db.execute_query(
-            """SELECT s.tanggal as date, 
-                      AVG(s.total_barang_terjual) as actual,
-                      AVG(COALESCE(fp.final_prediction, s.total_barang_terjual * 0.95)) as predicted
-               FROM sales_harian s
-               LEFT JOIN final_pemodelan fp ON s.sto_id = fp.sto_id 
-                   AND fp.prediction_period = 'daily' 
-                   AND fp.last_updated >= %s
-               WHERE s.tanggal >= %s AND s.tanggal <= %s
-               GROUP BY s.tanggal
-               ORDER BY s.tanggal""",
+        batch.add(
+            "sales_data",
+            """WITH latest AS (
+                   SELECT AVG(final_prediction) as avg_prediction
+                   FROM final_pemodelan
+                   WHERE prediction_period = 'daily' AND last_updated >= %s
+               )
+               SELECT r.tanggal as date,
+                      r.total_sales::float / NULLIF(r.sto_count, 0) as actual,
+                      COALESCE(latest.avg_prediction, r.total_sales::float / NULLIF(r.sto_count, 0) * 0.95) as predicted
+               FROM sales_rollup_daily r
+               CROSS JOIN latest
+               WHERE r.tanggal >= %s AND r.tanggal <= %s
+               ORDER BY r.tanggal""",
             (start_date, start_date, end_date)
         )
         
+        # STO status distribution
+        batch.add(
+            "sto_status_data",
+            """SELECT 
+                CASE 
+                    WHEN avg_daily_sales < 2 THEN 'Low Demand'
+                    WHEN avg_daily_sales > 6 THEN 'High Demand' 
+                    ELSE 'Normal'
+                END as status,
+                COUNT(*) as count
+               FROM avg_sales a
+               JOIN sto s ON a.sto_id = s.sto_id
+               WHERE s.status = 'Active'
+               GROUP BY 
+                CASE 
+                    WHEN avg_daily_sales < 2 THEN 'Low Demand'
+                    WHEN avg_daily_sales > 6 THEN 'High Demand' 
+                    ELSE 'Normal'
+                END"""
+        )
+        
+        # Warehouse utilization
+        batch.add(
+            "warehouse_utilization",
+            """SELECT warehouse_id, name,
+                      CASE 
+                          WHEN capacity > 0 THEN ROUND((current_stock::float / capacity) * 100, 1)
+                          ELSE 0 
+                      END as utilization
+               FROM warehouse 
+               WHERE status = 'Active'
+               ORDER BY utilization DESC
+               LIMIT 10"""
+        )
+        
+        # Recent supply operations
+        batch.add(
+            "recent_supplies",
+            """SELECT sw.sto_id, sw.warehouse_id, sw.quantity_supplied, sw.status, sw.supply_date
+               FROM supply_warehouse sw
+               ORDER BY sw.created_at DESC
+               LIMIT 5"""
+        )
+        
+        # Prediction accuracy by STO: 100 - MAPE of its daily predictions over the last 30 days
+        batch.add(
+            "sto_accuracy",
+            f"""WITH errors AS ({DAILY_PREDICTION_ERRORS_SQL})
+                SELECT e.sto_id, GREATEST(0, 100 - AVG(e.abs_pct_error)) as accuracy, s.name
+                FROM errors e
+                JOIN sto s ON e.sto_id = s.sto_id
+                GROUP BY e.sto_id, s.name
+                ORDER BY accuracy DESC
+                LIMIT 10""",
+            {"since": date.today() - timedelta(days=30)}
+        )
+        
+        results = batch.run()
+        total_stos = results["total_stos"][0]
+        total_warehouses = results["total_warehouses"][0]
+        pending_supplies = results["pending_supplies"][0]
+        sales_data = results["sales_data"]
+        
         # Format chart data
         chart_data = []
         for row in sales_data:
@@ -66,25 +157,8 @@ def get_dashboard_stats(request, response):
             if count > 0:
                 accuracy = round(total_diff / count, 1)
         
-        # Get STO status distribution
-        sto_status_data = db.execute_query(
-            """SELECT 
-                CASE 
-                    WHEN avg_daily_sales < 2 THEN 'Low Demand'
-                    WHEN avg_daily_sales > 6 THEN 'High Demand' 
-                    ELSE 'Normal'
-                END as status,
-                COUNT(*) as count
-               FROM avg_sales a
-               JOIN sto s ON a.sto_id = s.sto_id
-               WHERE s.status = 'Active'
-               GROUP BY 
-                CASE 
-                    WHEN avg_daily_sales < 2 THEN 'Low Demand'
-                    WHEN avg_daily_sales > 6 THEN 'High Demand' 
-                    ELSE 'Normal'
-                END"""
-        )
+        # STO status distribution
+        sto_status_data = results["sto_status_data"]
         
         # If no data, provide default distribution
         if not sto_status_data:
@@ -96,37 +170,18 @@ def get_dashboard_stats(request, response):
         else:
             sto_status_distribution = {row[0]: row[1] for row in sto_status_data}
         
-        # Get warehouse utilization
-        warehouse_utilization = db.execute_query(
-            """SELECT warehouse_id, name,
-                      CASE 
-                          WHEN capacity > 0 THEN ROUND((current_stock::float / capacity) * 100, 1)
-                          ELSE 0 
-                      END as utilization
-               FROM warehouse 
-               WHERE status = 'Active'
-               ORDER BY utilization DESC
-               LIMIT 10"""
-        )
-        
+        # Warehouse utilization
         warehouse_stats = []
-        for row in warehouse_utilization:
+        for row in results["warehouse_utilization"]:
             warehouse_stats.append({
                 "warehouse_id": row[0],
                 "name": row[1],
                 "utilization": float(row[2]) if row[2] else 0
             })
         
-        # Get recent supply operations
-        recent_supplies = db.execute_query(
-            """SELECT sw.sto_id, sw.warehouse_id, sw.quantity_supplied, sw.status, sw.supply_date
-               FROM supply_warehouse sw
-               ORDER BY sw.created_at DESC
-               LIMIT 5"""
-        )
-        
+        # Recent supply operations
         supply_operations = []
-        for row in recent_supplies:
+        for row in results["recent_supplies"]:
             supply_operations.append({
                 "sto_id": row[0],
                 "warehouse_id": row[1], 
@@ -135,18 +190,9 @@ def get_dashboard_stats(request, response):
                 "date": row[4].isoformat() if row[4] else None
             })
         
-        # Get prediction accuracy by STO
-        sto_accuracy = db.execute_query(
-            """SELECT fp.sto_id, fp.model_accuracy, s.name
-               FROM final_pemodelan fp
-               JOIN sto s ON fp.sto_id = s.sto_id
-               WHERE fp.model_accuracy > 0
-               ORDER BY fp.model_accuracy DESC
-               LIMIT 10"""
-        )
-        
+        # Prediction accuracy by STO
         accuracy_by_sto = []
-        for row in sto_accuracy:
+        for row in results["sto_accuracy"]:
             accuracy_by_sto.append({
                 "sto_id": row[0],
                 "accuracy": float(row[1]) if row[1] else 0,
@@ -175,42 +221,38 @@ def get_dashboard_stats(request, response):
         response.status_code = 500
         return create_error_response("Internal server error", 500)
 
+@cached_response(PREDICTION_SUMMARY_CACHE, settings.RESPONSE_CACHE_TTLS[PREDICTION_SUMMARY_CACHE])
 def get_prediction_summary(request, response):
     """Get prediction summary data"""
     try:
-        db = get_database()
-        
-        # Get prediction accuracy trends
-        accuracy_trends = db.execute_query(
-            """SELECT DATE_TRUNC('week', last_updated) as week,
-                      AVG(model_accuracy) as avg_accuracy,
-                      COUNT(*) as prediction_count
-               FROM final_pemodelan 
-               WHERE last_updated >= NOW() - INTERVAL '8 weeks'
-               GROUP BY DATE_TRUNC('week', last_updated)
-               ORDER BY week"""
+        batch = QueryBatch()
+        
+        # Prediction accuracy trends: 100 - MAPE of the daily predictions against actual sales
+        batch.add(
+            "accuracy_trends",
+            # The date bound prunes prediction_history to the two or three monthly partitions it covers
+            f"""WITH errors AS ({DAILY_PREDICTION_ERRORS_SQL})
+                SELECT DATE_TRUNC('week', prediction_date) as week,
+                       GREATEST(0, 100 - AVG(abs_pct_error)) as avg_accuracy,
+                       COUNT(*) as prediction_count
+                FROM errors
+                GROUP BY DATE_TRUNC('week', prediction_date)
+                ORDER BY week""",
+            {"since": date.today() - timedelta(weeks=8)}
         )
         
-        trends = []
-        for row in accuracy_trends:
-            trends.append({
-                "week": row[0].isoformat(),
-                "accuracy": round(float(row[1]) if row[1] else 0, 2),
-                "count": row[2]
-            })
-        
-        # Get risk level distribution
-        risk_distribution = db.execute_query(
+        # Risk level distribution (rows written by prediction jobs have no assessed risk)
+        batch.add(
+            "risk_distribution",
             """SELECT risk_level, COUNT(*) as count
                FROM final_pemodelan
-               WHERE last_updated >= NOW() - INTERVAL '1 week'
+               WHERE last_updated >= NOW() - INTERVAL '1 week' AND risk_level IS NOT NULL
                GROUP BY risk_level"""
         )
         
-        risk_data = {row[0]: row[1] for row in risk_distribution}
-        
-        # Get predictions requiring action
-        actions_needed = db.execute_query(
+        # Predictions requiring action
+        batch.add(
+            "actions_needed",
             """SELECT fp.sto_id, fp.risk_level, fp.action_required, s.name
                FROM final_pemodelan fp
                JOIN sto s ON fp.sto_id = s.sto_id
@@ -227,8 +269,20 @@ def get_prediction_summary(request, response):
                LIMIT 10"""
         )
         
+        results = batch.run()
+        
+        trends = []
+        for row in results["accuracy_trends"]:
+            trends.append({
+                "week": row[0].isoformat(),
+                "accuracy": round(float(row[1]) if row[1] else 0, 2),
+                "count": row[2]
+            })
+        
+        risk_data = {row[0]: row[1] for row in results["risk_distribution"]}
+        
         actions = []
-        for row in actions_needed:
+        for row in results["actions_needed"]:
             actions.append({
                 "sto_id": row[0],
                 "sto_name": row[3],
@@ -249,26 +303,39 @@ def get_prediction_summary(request, response):
         response.status_code = 500
         return create_error_response("Internal server error", 500)
 
+@cached_response(STO_PERFORMANCE_CACHE, settings.RESPONSE_CACHE_TTLS[STO_PERFORMANCE_CACHE])
 def get_sto_performance(request, response):
     """Get STO performance metrics"""
     try:
         db = get_database()
         
-        # Get STO performance data
+        # Get STO performance data (accuracy is 100 - MAPE of the last 30 days of daily predictions)
         performance_data = db.execute_query(
-            """SELECT s.sto_id, s.name, s.region,
-                      AVG(avg.avg_daily_sales) as avg_sales,
+            f"""SELECT s.sto_id, s.name, s.region,
+                      COALESCE(MAX(rw.avg_daily_sales), AVG(avg.avg_daily_sales)) as avg_sales,
                       AVG(fp.final_prediction) as avg_prediction,
-                      AVG(fp.model_accuracy) as accuracy,
+                      MAX(acc.accuracy) as accuracy,
                       COUNT(DISTINCT sw.id) as supply_count
                FROM sto s
+               LEFT JOIN (
+                   SELECT sto_id, SUM(total_sales)::float / NULLIF(SUM(day_count), 0) as avg_daily_sales
+                   FROM sales_rollup_sto_weekly
+                   WHERE week_start >= DATE_TRUNC('week', NOW() - INTERVAL '4 weeks')
+                   GROUP BY sto_id
+               ) rw ON s.sto_id = rw.sto_id
+               LEFT JOIN (
+                   SELECT sto_id, GREATEST(0, 100 - AVG(abs_pct_error)) as accuracy
+                   FROM ({DAILY_PREDICTION_ERRORS_SQL}) errors
+                   GROUP BY sto_id
+               ) acc ON s.sto_id = acc.sto_id
                LEFT JOIN avg_sales avg ON s.sto_id = avg.sto_id
                LEFT JOIN final_pemodelan fp ON s.sto_id = fp.sto_id
                LEFT JOIN supply_warehouse sw ON s.sto_id = sw.sto_id 
                    AND sw.created_at >= NOW() - INTERVAL '30 days'
                WHERE s.status = 'Active'
                GROUP BY s.sto_id, s.name, s.region
-               ORDER BY avg_sales DESC NULLS LAST"""
+               ORDER BY avg_sales DESC NULLS LAST""",
+            {"since": date.today() - timedelta(days=30)}
         )
         
         performance = []
@@ -289,13 +356,15 @@ def get_sto_performance(request, response):
         response.status_code = 500
         return create_error_response("Internal server error", 500)
 
+@cached_response(SUPPLY_ANALYTICS_CACHE, settings.RESPONSE_CACHE_TTLS[SUPPLY_ANALYTICS_CACHE])
 def get_supply_analytics(request, response):
     """Get supply chain analytics"""
     try:
-        db = get_database()
+        batch = QueryBatch()
         
-        # Get supply efficiency metrics
-        supply_metrics = db.execute_query(
+        # Supply efficiency metrics
+        batch.add(
+            "supply_metrics",
             """SELECT 
                 DATE_TRUNC('week', supply_date) as week,
                 COUNT(*) as total_supplies,
@@ -308,19 +377,9 @@ def get_supply_analytics(request, response):
                ORDER BY week"""
         )
         
-        supply_trends = []
-        for row in supply_metrics:
-            delivery_rate = (row[4] / row[1] * 100) if row[1] > 0 else 0
-            supply_trends.append({
-                "week": row[0].isoformat(),
-                "total_supplies": row[1],
-                "total_quantity": row[2] or 0,
-                "avg_delay_hours": round(float(row[3]) if row[3] else 0, 1),
-                "delivery_rate": round(delivery_rate, 1)
-            })
-        
-        # Get warehouse performance
-        warehouse_performance = db.execute_query(
+        # Warehouse performance
+        batch.add(
+            "warehouse_performance",
             """SELECT w.warehouse_id, w.name,
                       COUNT(sw.id) as total_supplies,
                       SUM(sw.quantity_supplied) as total_quantity,
@@ -335,8 +394,21 @@ def get_supply_analytics(request, response):
                ORDER BY total_quantity DESC NULLS LAST"""
         )
         
+        results = batch.run()
+        
+        supply_trends = []
+        for row in results["supply_metrics"]:
+            delivery_rate = (row[4] / row[1] * 100) if row[1] > 0 else 0
+            supply_trends.append({
+                "week": row[0].isoformat(),
+                "total_supplies": row[1],
+                "total_quantity": row[2] or 0,
+                "avg_delay_hours": round(float(row[3]) if row[3] else 0, 1),
+                "delivery_rate": round(delivery_rate, 1)
+            })
+        
         warehouse_stats = []
-        for row in warehouse_performance:
+        for row in results["warehouse_performance"]:
             warehouse_stats.append({
                 "warehouse_id": row[0],
                 "name": row[1],
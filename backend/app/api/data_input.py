@@ -1,38 +1,241 @@
-# Placeholder for data input API
-# This will handle CSV/Excel file uploads and validation
+# Data input API
+# Handles CSV/Excel file uploads and validation
 
-from .deps import create_response, create_error_response, require_auth
+from ..core.config import settings
+from ..core.security import Security
+from ..services.excel_ingest import excel_ingestor
+from ..services.ingest_service import IngestError, IngestReport, file_extension, sales_ingestor, spool_upload
+from ..services.upload_registry import UploadOffsetError, upload_registry
+from .dashboard import invalidate_dashboard_cache, SALES_DEPENDENT_CACHES
+from .deps import HTTPException, create_response, create_error_response, rate_limited, require_auth
 
+SALES_UPLOAD = "sales"
+
+def get_header(request, name: str):
+    headers = getattr(request, 'headers', {}) or {}
+    return headers.get(name) or headers.get(name.lower())
+
+def get_upload_filename(request) -> str:
+    """Original file name, sent as the X-File-Name header or ?filename= query parameter"""
+    query_params = getattr(request, 'query_params', {})
+    filename = get_header(request, 'X-File-Name') or query_params.get('filename', '')
+    if not filename:
+        raise HTTPException(status_code=400, detail="File name is required (X-File-Name header)")
+    if file_extension(filename) not in settings.ALLOWED_EXTENSIONS:
+        raise HTTPException(status_code=400, detail=f"File type must be one of: {', '.join(sorted(settings.ALLOWED_EXTENSIONS))}")
+    
+    max_bytes = settings.MAX_FILE_SIZE_MB * 1024 * 1024
+    if int(request.headers.get('content-length', 0) or 0) > max_bytes:
+        raise HTTPException(status_code=413, detail=f"File exceeds maximum size of {settings.MAX_FILE_SIZE_MB} MB")
+    return filename
+
+def duplicate_upload_response(record):
+    """Short-circuit for content that was already loaded: return the earlier report"""
+    data = dict(record.report or {})
+    data.update({"upload_id": record.upload_id, "file_hash": record.file_hash, "duplicate": True})
+    return create_response(data, "File was already uploaded; nothing to process")
+
+def claim_upload(record):
+    """Take over an unfinished ingest, or 409 while another request is processing it"""
+    claimed = upload_registry.claim(record.upload_id)
+    if not claimed:
+        raise HTTPException(status_code=409, detail="This file is already being processed")
+    return claimed
+
+def run_sales_ingest(record, stream, resume_report=None, superseded=None):
+    """Ingest a received sales file, checkpointing the report after every committed chunk.
+    
+    ``superseded`` is a claimed earlier upload of the same content whose
+    checkpoint this ingest continues; it ends with the same status as ``record``.
+    """
+    resume_from = IngestReport.from_dict(resume_report) if resume_report else None
+    try:
+        report = sales_ingestor.ingest(
+            stream, record.filename,
+            resume_from=resume_from,
+            on_chunk_committed=lambda r: upload_registry.save_progress(record.upload_id, r.to_dict())
+        )
+    except Exception as e:
+        upload_registry.fail(record.upload_id, str(e))
+        if superseded:
+            upload_registry.fail(superseded.upload_id, f"Continued by upload {record.upload_id}: {e}")
+        raise
+    upload_registry.complete(record.upload_id, report.to_dict())
+    if superseded:
+        upload_registry.complete(superseded.upload_id, report.to_dict())
+    
+    if report.rows_merged:
+        invalidate_dashboard_cache(*SALES_DEPENDENT_CACHES)
+    
+    data = report.to_dict()
+    data.update({"upload_id": record.upload_id, "file_hash": record.file_hash, "duplicate": False})
+    message = "Sales data uploaded successfully"
+    if report.rows_rejected:
+        message = f"Sales data uploaded with {report.rows_rejected} rejected row(s)"
+    return create_response(data, message)
+
+def receive_sales_part(request, response, max_bytes: int):
+    """Resumable transfer: append one part, and ingest once the final part arrives"""
+    upload_id = get_header(request, 'X-Upload-Id')
+    offset = int(get_header(request, 'X-Upload-Offset') or 0)
+    final = str(get_header(request, 'X-Upload-Final') or '').lower() in ('1', 'true', 'yes')
+    
+    if upload_id:
+        record = upload_registry.get(upload_id)
+        if not record or record.upload_type != SALES_UPLOAD:
+            raise HTTPException(status_code=404, detail="Upload not found")
+    else:
+        record = upload_registry.create(SALES_UPLOAD, get_upload_filename(request))
+    
+    if record.status == "completed":
+        return duplicate_upload_response(record)
+    if record.status == "receiving":
+        upload_registry.append(record, offset, request.body, max_bytes)
+        if not final:
+            return create_response(record.to_dict(), "Upload part received")
+        upload_registry.finish_receiving(record)
+        
+        previous = upload_registry.find_by_hash(SALES_UPLOAD, record.file_hash, exclude_upload_id=record.upload_id)
+        if previous and previous.status == "completed":
+            upload_registry.complete(record.upload_id, previous.report or {})
+            return duplicate_upload_response(previous)
+        if previous:
+            # Same content as an unfinished ingest: take it over (409 while another request
+            # is running it) and continue from its checkpoint
+            try:
+                previous = claim_upload(previous)
+            except HTTPException:
+                upload_registry.fail(record.upload_id, "The same file is already being processed")
+                raise
+        resume_report = previous.report if previous else None
+    elif not final:
+        raise HTTPException(status_code=409, detail=f"Upload is already {record.status}")
+    else:
+        # Retry of an interrupted or failed ingest: continue after the last committed chunk
+        record = claim_upload(record)
+        resume_report, previous = record.report, None
+    
+    with open(upload_registry.part_path(record.upload_id), "rb") as part:
+        return run_sales_ingest(record, part, resume_report, superseded=previous)
+
+@rate_limited("upload")
 def upload_sales_data(request, response):
-    """Upload and process sales data file"""
+    """Upload and process sales data file (raw file bytes as the request body).
+    
+    Files whose content (MD5) was already loaded are not processed again. Large
+    files can be sent in parts: each part carries X-Upload-Offset (bytes already
+    sent; the first part also X-File-Name, later ones the returned X-Upload-Id)
+    and the last one X-Upload-Final: true. get_upload_status reports the offset
+    to resume from after an interruption.
+    """
     try:
         require_auth(request)
-        # TODO: Implement file upload and processing
-        return create_response(None, "File upload feature coming soon")
+        max_bytes = settings.MAX_FILE_SIZE_MB * 1024 * 1024
+        
+        if get_header(request, 'X-Upload-Id') or get_header(request, 'X-Upload-Offset') is not None:
+            return receive_sales_part(request, response, max_bytes)
+        
+        filename = get_upload_filename(request)
+        upload = spool_upload(request.body, max_bytes)
+        try:
+            file_hash = Security.hash_file_stream(upload)
+            upload.seek(0)
+            previous = upload_registry.find_by_hash(SALES_UPLOAD, file_hash)
+            if previous and previous.status == "completed":
+                return duplicate_upload_response(previous)
+            if previous:
+                # Same content as an upload whose ingest did not finish: resume it
+                previous = claim_upload(previous)
+                return run_sales_ingest(previous, upload, previous.report)
+            
+            record = upload_registry.create(SALES_UPLOAD, filename, status="processing",
+                                            file_hash=file_hash, total_bytes=upload.seek(0, 2))
+            upload.seek(0)
+            return run_sales_ingest(record, upload)
+        finally:
+            upload.close()
+        
+    except HTTPException as e:
+        response.status_code = e.status_code
+        return create_error_response(e.detail, e.status_code)
+    except UploadOffsetError as e:
+        response.status_code = 409
+        return create_error_response(str(e), 409, {"expected_offset": e.expected})
+    except IngestError as e:
+        response.status_code = 400
+        return create_error_response(str(e), 400)
     except Exception as e:
         response.status_code = 500
         return create_error_response("Internal server error", 500)
 
-def upload_architecture_data(request, response):
-    """Upload and process architecture data file"""
+def get_upload_status(request, response):
+    """Status of an upload: bytes received (the offset to resume from) and ingest progress"""
     try:
         require_auth(request)
-        # TODO: Implement file upload and processing
-        return create_response(None, "File upload feature coming soon")
+        upload_id = request.path_params.get('id')
+        record = upload_registry.get(upload_id)
+        if not record:
+            raise HTTPException(status_code=404, detail="Upload not found")
+        return create_response(record.to_dict(), "Upload status retrieved successfully")
+    except HTTPException as e:
+        response.status_code = e.status_code
+        return create_error_response(e.detail, e.status_code)
     except Exception as e:
         response.status_code = 500
         return create_error_response("Internal server error", 500)
 
-def upload_metadata(request, response):
-    """Upload and process metadata file"""
+def upload_workbook(request, response, kind: str, label: str):
+    """Shared handler for architecture/metadata uploads (raw file bytes as the request body)"""
     try:
         require_auth(request)
-        # TODO: Implement file upload and processing
-        return create_response(None, "File upload feature coming soon")
+        filename = get_upload_filename(request)
+        upload = spool_upload(request.body, settings.MAX_FILE_SIZE_MB * 1024 * 1024)
+        try:
+            file_hash = Security.hash_file_stream(upload)
+            upload.seek(0)
+            previous = upload_registry.find_by_hash(kind, file_hash)
+            if previous and previous.status == "completed":
+                return duplicate_upload_response(previous)
+            
+            record = claim_upload(previous) if previous else upload_registry.create(kind, filename, status="processing",
+                                                        file_hash=file_hash, total_bytes=upload.seek(0, 2))
+            upload.seek(0)
+            try:
+                report = excel_ingestor.ingest(upload, filename, kind)
+            except Exception as e:
+                upload_registry.fail(record.upload_id, str(e))
+                raise
+            upload_registry.complete(record.upload_id, report.to_dict())
+        finally:
+            upload.close()
+        
+        data = report.to_dict()
+        data.update({"upload_id": record.upload_id, "file_hash": file_hash, "duplicate": False})
+        message = f"{label} uploaded successfully"
+        if report.rows_rejected:
+            message = f"{label} uploaded with {report.rows_rejected} rejected row(s)"
+        return create_response(data, message)
+        
+    except HTTPException as e:
+        response.status_code = e.status_code
+        return create_error_response(e.detail, e.status_code)
+    except IngestError as e:
+        response.status_code = 400
+        return create_error_response(str(e), 400)
     except Exception as e:
         response.status_code = 500
         return create_error_response("Internal server error", 500)
 
+@rate_limited("upload")
+def upload_architecture_data(request, response):
+    """Upload and process architecture data file (every sheet is loaded into arsitektur_jaringan)"""
+    return upload_workbook(request, response, "architecture", "Architecture data")
+
+@rate_limited("upload")
+def upload_metadata(request, response):
+    """Upload and process metadata file (every sheet is loaded into metadata_sto)"""
+    return upload_workbook(request, response, "metadata", "Metadata")
+
 def validate_data(request, response):
     """Validate uploaded data"""
     try:
@@ -1,6 +1,13 @@
-from typing import Optional
+from functools import wraps
+from datetime import datetime
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Sequence
+import base64
+import itertools
 import json
+from ..core.cache import MISSING, principal_cache
+from ..core.config import settings
 from ..core.database import get_database
+from ..core.rate_limit import rate_limiter
 from ..core.security import security
 from ..models.user import User
 
@@ -9,8 +16,52 @@ class HTTPException(Exception):
         self.status_code = status_code
         self.detail = detail
 
+class RateLimitExceeded(HTTPException):
+    def __init__(self, retry_after: int):
+        super().__init__(429, "Too many requests")
+        self.retry_after = retry_after
+
+class StreamingResponse:
+    """Handler result whose body is written chunk by chunk instead of serialized as JSON"""
+    def __init__(self, chunks: Iterable[bytes], media_type: str, filename: Optional[str] = None):
+        self.chunks = chunks
+        self.media_type = media_type
+        self.filename = filename
+        self._head: List[bytes] = []
+    
+    def headers(self) -> dict:
+        headers = {"Content-Type": self.media_type}
+        if self.filename:
+            headers["Content-Disposition"] = f'attachment; filename="{self.filename}"'
+        return headers
+    
+    def prefetch(self) -> 'StreamingResponse':
+        """Produce the first chunk now, so errors before any output (a failing query) raise in the handler"""
+        self.chunks = iter(self.chunks)
+        try:
+            self._head = [next(self.chunks)]
+        except StopIteration:
+            pass
+        except Exception:
+            self.close()
+            raise
+        return self
+    
+    def __iter__(self) -> Iterator[bytes]:
+        return itertools.chain(self._head, self.chunks)
+    
+    def close(self):
+        close = getattr(self.chunks, "close", None)
+        if close:
+            close()
+
 def get_current_user(request) -> Optional[User]:
-    """Extract and validate user from JWT token"""
+    """Extract and validate user from JWT token.
+    
+    Verified tokens are cached with their user (see ``PrincipalCache``), so a
+    repeat request with the same token neither re-verifies the signature nor
+    queries the users table.
+    """
     auth_header = request.headers.get('Authorization')
     if not auth_header:
         return None
@@ -22,6 +73,11 @@ def get_current_user(request) -> Optional[User]:
     except ValueError:
         return None
     
+    if settings.AUTH_CACHE_ENABLED:
+        cached = principal_cache.get(token)
+        if cached is not MISSING:
+            return cached
+    
     payload = security.decode_access_token(token)
     if not payload:
         return None
@@ -30,6 +86,10 @@ def get_current_user(request) -> Optional[User]:
     if not user_id:
         return None
     
+    # Snapshot the user's cache generation before reading the row, so an
+    # invalidation that lands during the lookup keeps this result out of the cache
+    generation = principal_cache.generation(int(user_id))
+    
     # Get user from database
     db = get_database()
     user_data = db.execute_one(
@@ -40,7 +100,10 @@ def get_current_user(request) -> Optional[User]:
     if not user_data:
         return None
     
-    return User.from_db_row(user_data)
+    user = User.from_db_row(user_data)
+    if settings.AUTH_CACHE_ENABLED:
+        principal_cache.set(token, user.id, user, generation, payload.get('exp'))
+    return user
 
 def require_auth(request) -> User:
     """Require authentication and return current user"""
@@ -49,6 +112,66 @@ def require_auth(request) -> User:
         raise HTTPException(status_code=401, detail="Authentication required")
     return user
 
+def client_ip(request) -> str:
+    """Client address for per-IP limits.
+    
+    The socket peer address, or with ``TRUSTED_PROXY_COUNT`` proxies in front
+    the ``X-Forwarded-For`` hop the outermost trusted proxy appended; entries
+    left of that one are client-supplied and ignored.
+    """
+    remote_addr = getattr(request, 'remote_addr', None)
+    hops = settings.TRUSTED_PROXY_COUNT
+    if hops > 0:
+        forwarded = request.headers.get('X-Forwarded-For') or request.headers.get('x-forwarded-for') or ''
+        addresses = [address.strip() for address in forwarded.split(',') if address.strip()]
+        if len(addresses) >= hops:
+            return addresses[-hops]
+    if not remote_addr:
+        raise HTTPException(status_code=400, detail="Client address unavailable")
+    return remote_addr
+
+def user_or_ip(request) -> str:
+    """Rate limit key: the authenticated user when there is one, else the client address"""
+    user = get_current_user(request)
+    return f"user:{user.id}" if user else f"ip:{client_ip(request)}"
+
+def check_rate_limit(scope: str, key: str):
+    """Count an attempt against ``RATE_LIMITS[scope]``; raises RateLimitExceeded when over"""
+    if not settings.RATE_LIMIT_ENABLED:
+        return
+    limit, window = settings.RATE_LIMITS[scope]
+    allowed, retry_after = rate_limiter.hit(f"{scope}:{key}", limit, window)
+    if not allowed:
+        raise RateLimitExceeded(retry_after)
+
+def reset_rate_limit(scope: str, key: str):
+    rate_limiter.reset(f"{scope}:{key}", settings.RATE_LIMITS[scope][1])
+
+def rate_limited(scope: str, key: Callable[[Any], str] = user_or_ip):
+    """Reject a ``handler(request, response)`` with 429 once ``key(request)`` exceeds ``RATE_LIMITS[scope]``.
+    
+    The check runs before the handler, so rejected requests do no database,
+    hashing or parsing work.
+    """
+    def decorator(handler):
+        @wraps(handler)
+        def wrapper(request, response):
+            try:
+                check_rate_limit(scope, key(request))
+            except RateLimitExceeded as e:
+                return rate_limit_response(response, e)
+            except HTTPException as e:
+                response.status_code = e.status_code
+                return create_error_response(e.detail, e.status_code)
+            return handler(request, response)
+        return wrapper
+    return decorator
+
+def rate_limit_response(response, error: 'RateLimitExceeded') -> dict:
+    response.status_code = 429
+    response.headers['Retry-After'] = str(error.retry_after)
+    return create_error_response(f"Too many requests, retry in {error.retry_after} seconds", 429)
+
 def parse_json_body(request) -> dict:
     """Parse JSON body from request"""
     try:
@@ -78,9 +201,11 @@ def create_error_response(message="Error", status_code=400, details=None):
     }
     return response
 
-def create_paginated_response(data, page, limit, total, message="Success"):
-    """Create paginated response"""
-    total_pages = (total + limit - 1) // limit
+def create_paginated_response(data, page, limit, total, message="Success", has_next=None):
+    """Create paginated response (``total`` may be None when counting was skipped)"""
+    total_pages = (total + limit - 1) // limit if total is not None else None
+    if has_next is None:
+        has_next = page < total_pages if total_pages is not None else False
     return {
         "success": True,
         "message": message,
@@ -90,7 +215,72 @@ def create_paginated_response(data, page, limit, total, message="Success"):
             "limit": limit,
             "total": total,
             "total_pages": total_pages,
-            "has_next": page < total_pages,
+            "has_next": has_next,
             "has_prev": page > 1
         }
-    }
\ No newline at end of file
+    }
+
+def create_cursor_response(data, limit, next_cursor, total=None, total_mode="none", message="Success"):
+    """Create keyset-paginated response"""
+    return {
+        "success": True,
+        "message": message,
+        "data": data,
+        "pagination": {
+            "limit": limit,
+            "next_cursor": next_cursor,
+            "has_next": next_cursor is not None,
+            "total": total,
+            "total_mode": total_mode
+        }
+    }
+
+def encode_cursor(values: List[Any]) -> str:
+    """Encode the sort key of the last row into an opaque cursor token"""
+    raw = json.dumps(values, default=str, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(token: str, types: Sequence[type]) -> List[Any]:
+    """Decode a cursor token produced by ``encode_cursor``.
+
+    ``types`` gives the expected type of each sort-key value; a token of a
+    different length or with a value of another type is rejected with 400.
+    ``datetime`` entries are ISO strings and are returned parsed.
+    """
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        if not isinstance(values, list) or len(values) != len(types):
+            raise ValueError("cursor has the wrong number of values")
+        decoded = []
+        for value, expected in zip(values, types):
+            if expected is datetime:
+                if not isinstance(value, str):
+                    raise ValueError("cursor timestamp must be a string")
+                value = datetime.fromisoformat(value)
+            elif isinstance(value, bool) or not isinstance(value, expected):
+                raise ValueError("cursor value has the wrong type")
+            decoded.append(value)
+        return decoded
+    except (ValueError, TypeError, UnicodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def count_rows(db, table: str, where_clause: str, params: tuple, mode: str = "exact") -> Optional[int]:
+    """Count rows matching a filter: 'exact', 'estimate' (planner statistics) or 'none'"""
+    if mode == "none":
+        return None
+    if mode == "estimate":
+        if where_clause == "1=1":
+            row = db.execute_one(
+                "SELECT GREATEST(reltuples, 0)::bigint FROM pg_class WHERE oid = %s::regclass",
+                (table,)
+            )
+        else:
+            row = db.execute_one(f"EXPLAIN (FORMAT JSON) SELECT 1 FROM {table} WHERE {where_clause}", params)
+            plan = row[0] if row else None
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            return int(plan[0]["Plan"]["Plan Rows"]) if plan else None
+        return int(row[0]) if row else None
+    row = db.execute_one(f"SELECT COUNT(*) FROM {table} WHERE {where_clause}", params)
+    return row[0] if row else 0
\ No newline at end of file
@@ -1,7 +1,12 @@
-# Placeholder for predictions API
-# This will handle ML prediction engine integration
+# Predictions API
+# Prediction lookups and batch prediction generation jobs
 
-from .deps import create_response, create_error_response, require_auth
+from datetime import date, timedelta
+from ..core.database import get_database
+from ..schemas.prediction import PREDICTION_PERIODS, PredictionJobCreate
+from ..services.prediction_history import prediction_history
+from ..services.prediction_jobs import prediction_job_manager
+from .deps import HTTPException, parse_json_body, create_response, create_error_response, require_auth
 
 def get_predictions(request, response):
     """Get predictions for STOs"""
@@ -29,20 +34,118 @@ def get_predictions(request, response):
         return create_error_response("Internal server error", 500)
 
 def generate_prediction(request, response):
-    """Generate new prediction for specific STO"""
+    """Start a batch prediction job for a set of STOs (or "all") and a period.
+    
+    Returns 202 with the job at once; inference and the final_pemodelan upserts
+    run in the background worker pool. Poll get_prediction_job for progress.
+    """
+    try:
+        user = require_auth(request)
+        body = parse_json_body(request)
+        sto_ids = body.get('sto_ids', 'all')
+        job_data = PredictionJobCreate(
+            sto_ids=None if sto_ids == 'all' else sto_ids,
+            period=body.get('period', 'daily')
+        )
+        
+        is_valid, error_msg = job_data.validate()
+        if not is_valid:
+            response.status_code = 400
+            return create_error_response(error_msg, 400)
+        
+        if job_data.sto_ids is not None:
+            requested = sorted({s.strip() for s in job_data.sto_ids})
+            rows = get_database().execute_query("SELECT sto_id FROM sto WHERE sto_id = ANY(%s)", (requested,))
+            unknown = sorted(set(requested) - {row[0] for row in rows})
+            if unknown:
+                response.status_code = 400
+                return create_error_response(f"Unknown STO ID(s): {', '.join(unknown[:20])}", 400)
+            job_data.sto_ids = requested
+        
+        job = prediction_job_manager.submit(job_data.sto_ids, job_data.period, created_by=user.id)
+        response.status_code = 202
+        return create_response(job.to_dict(), "Prediction job queued", 202)
+        
+    except HTTPException as e:
+        response.status_code = e.status_code
+        return create_error_response(e.detail, e.status_code)
+    except Exception as e:
+        response.status_code = 500
+        return create_error_response("Internal server error", 500)
+
+def get_prediction_job(request, response):
+    """Get status and progress of a batch prediction job"""
+    try:
+        require_auth(request)
+        job_id = request.path_params.get('id')
+        job = prediction_job_manager.get(job_id)
+        if not job:
+            response.status_code = 404
+            return create_error_response("Prediction job not found", 404)
+        return create_response(job.to_dict(), "Prediction job retrieved successfully")
+    except HTTPException as e:
+        response.status_code = e.status_code
+        return create_error_response(e.detail, e.status_code)
+    except Exception as e:
+        response.status_code = 500
+        return create_error_response("Internal server error", 500)
+
+def list_prediction_jobs(request, response):
+    """List the most recent batch prediction jobs"""
     try:
         require_auth(request)
-        # TODO: Implement ML prediction generation
-        return create_response(None, "Prediction generation feature coming soon")
+        query_params = getattr(request, 'query_params', {})
+        try:
+            limit = min(max(int(query_params.get('limit', 20)), 1), 100)
+        except ValueError:
+            limit = 20
+        jobs = prediction_job_manager.list_recent(limit)
+        return create_response([job.to_dict() for job in jobs], "Prediction jobs retrieved successfully")
+    except HTTPException as e:
+        response.status_code = e.status_code
+        return create_error_response(e.detail, e.status_code)
     except Exception as e:
         response.status_code = 500
         return create_error_response("Internal server error", 500)
 
 def get_prediction_history(request, response):
-    """Get prediction history for analysis"""
+    """Predicted vs actual series for a window (one STO with ?sto_id=, else fleet totals).
+    
+    Query parameters: sto_id, period (daily/weekly/monthly), start_date and
+    end_date (YYYY-MM-DD, default the last 30 days).
+    """
     try:
-        # TODO: Implement prediction history
-        return create_response([], "Prediction history feature coming soon")
+        query_params = getattr(request, 'query_params', {})
+        period = query_params.get('period', 'daily')
+        if period not in PREDICTION_PERIODS:
+            response.status_code = 400
+            return create_error_response(f"Period must be one of: {', '.join(PREDICTION_PERIODS)}", 400)
+        try:
+            end_date = date.fromisoformat(query_params['end_date']) if query_params.get('end_date') else date.today()
+            start_date = date.fromisoformat(query_params['start_date']) if query_params.get('start_date') \
+                else end_date - timedelta(days=30)
+        except ValueError:
+            response.status_code = 400
+            return create_error_response("Dates must be in YYYY-MM-DD format", 400)
+        if start_date > end_date:
+            response.status_code = 400
+            return create_error_response("start_date must not be after end_date", 400)
+        
+        sto_id = query_params.get('sto_id') or None
+        series = prediction_history.series(start_date, end_date, period, sto_id)
+        scored = [point["abs_pct_error"] for point in series if point["abs_pct_error"] is not None]
+        return create_response({
+            "sto_id": sto_id,
+            "period": period,
+            "start_date": start_date.isoformat(),
+            "end_date": end_date.isoformat(),
+            "series": series,
+            "mape": round(sum(scored) / len(scored), 2) if scored else None
+        }, "Prediction history retrieved successfully")
+        
+    except HTTPException as e:
+        response.status_code = e.status_code
+        return create_error_response(e.detail, e.status_code)
     except Exception as e:
         response.status_code = 500
-        return create_error_response("Internal server error", 500)
\ No newline at end of file
+        return create_error_response("Internal server error", 500)
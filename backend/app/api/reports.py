@@ -1,24 +1,100 @@
-# Placeholder for reports API
-# This will handle report generation and export
+# Reports API
+# Handles background report generation and streamed data export
 
-from .deps import create_response, create_error_response, require_auth
+from datetime import date
+from ..services.export_service import EXPORT_FORMATS, ExportError, export_service
+from ..services.report_service import ReportError, report_service
+from .deps import (HTTPException, StreamingResponse, parse_json_body, create_response, create_error_response, rate_limited,
+                   require_auth)
 
+@rate_limited("report")
 def generate_report(request, response):
-    """Generate report based on parameters"""
+    """Generate a report from a template.
+    
+    Body: {"template": <template id>, "params": {"start_date", "end_date", "region"}}.
+    If an artifact for the same template, parameters and unchanged source data
+    already exists it is returned (200 with content once rendered); otherwise
+    rendering is queued and 202 is returned with the report_id to poll.
+    """
+    try:
+        user = require_auth(request)
+        body = parse_json_body(request)
+        template = body.get('template')
+        if not template:
+            response.status_code = 400
+            return create_error_response("template is required", 400)
+        
+        artifact, reused = report_service.request(template, body.get('params'), created_by=user.id)
+        if artifact.status == 'completed':
+            return create_response(artifact.to_dict(), "Report retrieved from cache")
+        response.status_code = 202
+        message = "Report is already being generated" if reused else "Report generation queued"
+        return create_response(artifact.to_dict(include_content=False), message, 202)
+        
+    except HTTPException as e:
+        response.status_code = e.status_code
+        return create_error_response(e.detail, e.status_code)
+    except ReportError as e:
+        response.status_code = 400
+        return create_error_response(str(e), 400)
+    except Exception as e:
+        response.status_code = 500
+        return create_error_response("Internal server error", 500)
+
+def get_report(request, response):
+    """Get the status of a report and, once completed, its content"""
     try:
         require_auth(request)
-        # TODO: Implement report generation
-        return create_response(None, "Report generation feature coming soon")
+        report_id = request.path_params.get('id')
+        artifact = report_service.get(report_id)
+        if not artifact:
+            response.status_code = 404
+            return create_error_response("Report not found", 404)
+        return create_response(artifact.to_dict(include_content=artifact.status == 'completed'),
+                               "Report retrieved successfully")
+    except HTTPException as e:
+        response.status_code = e.status_code
+        return create_error_response(e.detail, e.status_code)
     except Exception as e:
         response.status_code = 500
         return create_error_response("Internal server error", 500)
 
+@rate_limited("export")
 def export_data(request, response):
-    """Export data in various formats"""
+    """Export a dataset as a streamed CSV, XLSX or Parquet file.
+    
+    Query parameters: dataset (sales, predictions, sales_vs_predictions),
+    format (csv, xlsx, parquet), columns (comma-separated subset), and the
+    filters sto_id (comma-separated), region, start_date, end_date.
+    """
     try:
         require_auth(request)
-        # TODO: Implement data export
-        return create_response(None, "Data export feature coming soon")
+        query_params = getattr(request, 'query_params', {})
+        dataset = query_params.get('dataset', 'sales')
+        fmt = query_params.get('format', 'csv').lower()
+        columns = [c.strip() for c in query_params.get('columns', '').split(',') if c.strip()] or None
+        
+        filters = {
+            "sto_ids": [s.strip() for s in query_params.get('sto_id', '').split(',') if s.strip()],
+            "region": query_params.get('region') or None
+        }
+        try:
+            for key in ("start_date", "end_date"):
+                filters[key] = date.fromisoformat(query_params[key]) if query_params.get(key) else None
+        except ValueError:
+            response.status_code = 400
+            return create_error_response("Dates must be in YYYY-MM-DD format", 400)
+        
+        chunks = export_service.export(dataset, fmt, columns, filters)
+        # Run the query before the response starts, so its errors still get a JSON error response
+        return StreamingResponse(chunks, EXPORT_FORMATS[fmt][0], export_service.filename(dataset, fmt)).prefetch()
+        
+    except HTTPException as e:
+        response.status_code = e.status_code
+        return create_error_response(e.detail, e.status_code)
+    except ExportError as e:
+        response.status_code = 400
+        return create_error_response(str(e), 400)
     except Exception as e:
         response.status_code = 500
         return create_error_response("Internal server error", 500)
@@ -26,12 +102,7 @@ def export_data(request, response):
 def get_report_templates(request, response):
     """Get available report templates"""
     try:
-        templates = [
-            {"id": "sales_summary", "name": "Sales Summary Report"},
-            {"id": "prediction_accuracy", "name": "Prediction Accuracy Report"},
-            {"id": "supply_efficiency", "name": "Supply Chain Efficiency Report"},
-            {"id": "sto_performance", "name": "STO Performance Report"}
-        ]
+        templates = report_service.templates()
         return create_response(templates, "Report templates retrieved successfully")
     except Exception as e:
         response.status_code = 500
@@ -7,7 +7,13 @@ from ..schemas.sto import (
     STOCreate, STOUpdate, STOResponse, STOListQuery,
     SalesHarianCreate, ArsitekturJaringanCreate, MetadataSTOCreate
 )
-from .deps import HTTPException, parse_json_body, create_response, create_error_response, create_paginated_response, require_auth
+from ..services.search_service import search_service
+from ..services.spatial_index import spatial_index
+from .dashboard import invalidate_dashboard_cache, STO_DEPENDENT_CACHES, ALL_DASHBOARD_CACHES
+from .deps import (
+    HTTPException, parse_json_body, create_response, create_error_response, create_paginated_response,
+    create_cursor_response, decode_cursor, encode_cursor, count_rows, require_auth
+)
 
 def get_stos(request, response):
     """Get list of STOs with pagination and filtering"""
@@ -19,9 +25,13 @@ def get_stos(request, response):
         search = query_params.get('search', '').strip()
         region = query_params.get('region', '').strip()
         status = query_params.get('status', '').strip()
+        # Presence of 'cursor' (even empty, for the first page) selects keyset pagination
+        cursor = query_params.get('cursor') if 'cursor' in query_params else None
+        total_mode = query_params.get('total', 'exact' if cursor is None else 'none').strip()
         
         # Validate query parameters
-        query = STOListQuery(page=page, limit=limit, search=search, region=region, status=status)
+        query = STOListQuery(page=page, limit=limit, search=search, region=region, status=status,
+                             cursor=cursor, total=total_mode)
         is_valid, error_msg = query.validate()
         if not is_valid:
             response.status_code = 400
@@ -34,9 +44,10 @@ def get_stos(request, response):
         params = []
         
         if search:
-            where_conditions.append("(sto_id ILIKE %s OR name ILIKE %s OR location ILIKE %s)")
-            search_pattern = f"%{search}%"
-            params.extend([search_pattern, search_pattern, search_pattern])
+            # Indexed substring match over id, name and location
+            search_condition, search_params = search_service.filter_clause(search)
+            where_conditions.append(search_condition)
+            params.extend(search_params)
         
         if region:
             where_conditions.append("region = %s")
@@ -48,13 +59,20 @@ def get_stos(request, response):
         
         where_clause = " AND ".join(where_conditions) if where_conditions else "1=1"
         
-        # Get total count
-        count_query = f"SELECT COUNT(*) FROM sto WHERE {where_clause}"
-        total_result = db.execute_one(count_query, tuple(params))
-        total = total_result[0] if total_result else 0
+        # Get total count (exact, estimated from planner statistics, or skipped)
+        total = count_rows(db, "sto", where_clause, tuple(params), total_mode)
+        
+        if cursor is not None:
+            # Keyset pagination: seek past the last sto_id of the previous page
+            if cursor:
+                last_key = decode_cursor(cursor, (str,))[0]
+                where_clause = f"{where_clause} AND sto_id > %s"
+                params.append(last_key)
+            offset = 0
+        else:
+            offset = (page - 1) * limit
         
-        # Get paginated results
-        offset = (page - 1) * limit
+        # Get paginated results (one extra row tells us whether another page exists)
         data_query = f"""
             SELECT id, sto_id, name, location, region, province, latitude, longitude, status, created_at, updated_at
             FROM sto 
@@ -62,12 +80,48 @@ def get_stos(request, response):
             ORDER BY sto_id
             LIMIT %s OFFSET %s
         """
-        params.extend([limit, offset])
+        params.extend([limit + 1, offset])
         
         rows = db.execute_query(data_query, tuple(params))
+        has_next = len(rows) > limit
+        rows = rows[:limit]
         stos = [STO.from_db_row(row).to_dict() for row in rows]
         
-        return create_paginated_response(stos, page, limit, total, "STOs retrieved successfully")
+        if cursor is not None:
+            next_cursor = encode_cursor([rows[-1][1]]) if has_next and rows else None
+            return create_cursor_response(stos, limit, next_cursor, total, total_mode, "STOs retrieved successfully")
+        
+        return create_paginated_response(stos, page, limit, total, "STOs retrieved successfully", has_next=has_next)
+        
+    except HTTPException as e:
+        response.status_code = e.status_code
+        return create_error_response(e.detail, e.status_code)
+    except Exception as e:
+        response.status_code = 500
+        return create_error_response("Internal server error", 500)
+
+def search_stos(request, response):
+    """Ranked STO search; mode=prefix serves typeahead lookups"""
+    try:
+        query_params = getattr(request, 'query_params', {})
+        term = query_params.get('q', '').strip()
+        mode = query_params.get('mode', 'contains').strip()
+        limit = int(query_params.get('limit', 10))
+        
+        if not term:
+            response.status_code = 400
+            return create_error_response("Search term is required", 400)
+        
+        if mode not in ["contains", "prefix"]:
+            response.status_code = 400
+            return create_error_response("Mode must be 'contains' or 'prefix'", 400)
+        
+        if limit < 1 or limit > 50:
+            response.status_code = 400
+            return create_error_response("Limit must be between 1 and 50", 400)
+        
+        results = search_service.search("sto", term, mode, limit)
+        return create_response(results, "STOs search completed successfully")
         
     except Exception as e:
         response.status_code = 500
@@ -156,6 +210,9 @@ def create_sto(request, response):
             updated_at=now
         )
         
+        invalidate_dashboard_cache(*STO_DEPENDENT_CACHES)
+        spatial_index.invalidate("sto")
+        
         response.status_code = 201
         return create_response(sto.to_dict(), "STO created successfully", 201)
         
@@ -243,6 +300,8 @@ def update_sto(request, response):
         
         update_query = f"UPDATE sto SET {', '.join(update_fields)} WHERE sto_id = %s"
         db.execute_query(update_query, tuple(params))
+        invalidate_dashboard_cache(*STO_DEPENDENT_CACHES)
+        spatial_index.invalidate("sto")
         
         # Return updated STO
         row = db.execute_one(
@@ -280,6 +339,8 @@ def delete_sto(request, response):
         
         # Delete STO (cascade will handle related data)
         db.execute_query("DELETE FROM sto WHERE sto_id = %s", (sto_id,))
+        invalidate_dashboard_cache(*ALL_DASHBOARD_CACHES)
+        spatial_index.invalidate("sto")
         
         return create_response(None, "STO deleted successfully")
         
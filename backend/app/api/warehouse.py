@@ -7,7 +7,18 @@ from ..schemas.warehouse import (
     WarehouseCreate, WarehouseUpdate, WarehouseResponse, WarehouseListQuery,
     SupplyWarehouseCreate
 )
-from .deps import HTTPException, parse_json_body, create_response, create_error_response, create_paginated_response, require_auth
+from ..schemas.prediction import PREDICTION_PERIODS
+from ..services.allocation_service import allocation_service
+from ..services.reservation_service import REJECT_REASONS, ReservationRequest, reservation_engine
+from ..services.search_service import search_service
+from ..services.spatial_index import spatial_index
+from .dashboard import invalidate_dashboard_cache, WAREHOUSE_DEPENDENT_CACHES, ALL_DASHBOARD_CACHES, SUPPLY_DEPENDENT_CACHES
+from .deps import (
+    HTTPException, parse_json_body, create_response, create_error_response, create_paginated_response,
+    create_cursor_response, decode_cursor, encode_cursor, count_rows, require_auth
+)
+
+MAX_BULK_SUPPLY_OPERATIONS = 1000
 
 def get_warehouses(request, response):
     """Get list of warehouses with pagination and filtering"""
@@ -19,9 +30,13 @@ def get_warehouses(request, response):
         search = query_params.get('search', '').strip()
         region = query_params.get('region', '').strip()
         status = query_params.get('status', '').strip()
+        # Presence of 'cursor' (even empty, for the first page) selects keyset pagination
+        cursor = query_params.get('cursor') if 'cursor' in query_params else None
+        total_mode = query_params.get('total', 'exact' if cursor is None else 'none').strip()
         
         # Validate query parameters
-        query = WarehouseListQuery(page=page, limit=limit, search=search, region=region, status=status)
+        query = WarehouseListQuery(page=page, limit=limit, search=search, region=region, status=status,
+                             cursor=cursor, total=total_mode)
         is_valid, error_msg = query.validate()
         if not is_valid:
             response.status_code = 400
@@ -34,9 +49,10 @@ def get_warehouses(request, response):
         params = []
         
         if search:
-            where_conditions.append("(warehouse_id ILIKE %s OR name ILIKE %s OR location ILIKE %s)")
-            search_pattern = f"%{search}%"
-            params.extend([search_pattern, search_pattern, search_pattern])
+            # Indexed substring match over id, name and location
+            search_condition, search_params = search_service.filter_clause(search)
+            where_conditions.append(search_condition)
+            params.extend(search_params)
         
         if region:
             where_conditions.append("region = %s")
@@ -48,25 +64,34 @@ def get_warehouses(request, response):
         
         where_clause = " AND ".join(where_conditions) if where_conditions else "1=1"
         
-        # Get total count
-        count_query = f"SELECT COUNT(*) FROM warehouse WHERE {where_clause}"
-        total_result = db.execute_one(count_query, tuple(params))
-        total = total_result[0] if total_result else 0
+        # Get total count (exact, estimated from planner statistics, or skipped)
+        total = count_rows(db, "warehouse", where_clause, tuple(params), total_mode)
+        
+        if cursor is not None:
+            # Keyset pagination: seek past the last warehouse_id of the previous page
+            if cursor:
+                last_key = decode_cursor(cursor, (str,))[0]
+                where_clause = f"{where_clause} AND warehouse_id > %s"
+                params.append(last_key)
+            offset = 0
+        else:
+            offset = (page - 1) * limit
         
-        # Get paginated results
-        offset = (page - 1) * limit
+        # Get paginated results (one extra row tells us whether another page exists)
         data_query = f"""
             SELECT id, warehouse_id, name, location, region, capacity, current_stock, 
                    reserved_stock, available_stock, manager_name, contact_phone, status,
-                   created_at, updated_at
+                   created_at, updated_at, latitude, longitude
             FROM warehouse 
             WHERE {where_clause}
             ORDER BY warehouse_id
             LIMIT %s OFFSET %s
         """
-        params.extend([limit, offset])
+        params.extend([limit + 1, offset])
         
         rows = db.execute_query(data_query, tuple(params))
+        has_next = len(rows) > limit
+        rows = rows[:limit]
         warehouses = []
         
         for row in rows:
@@ -75,7 +100,41 @@ def get_warehouses(request, response):
             warehouse_dict['utilization_percentage'] = warehouse.utilization_percentage
             warehouses.append(warehouse_dict)
         
-        return create_paginated_response(warehouses, page, limit, total, "Warehouses retrieved successfully")
+        if cursor is not None:
+            next_cursor = encode_cursor([rows[-1][1]]) if has_next and rows else None
+            return create_cursor_response(warehouses, limit, next_cursor, total, total_mode, "Warehouses retrieved successfully")
+        
+        return create_paginated_response(warehouses, page, limit, total, "Warehouses retrieved successfully", has_next=has_next)
+        
+    except HTTPException as e:
+        response.status_code = e.status_code
+        return create_error_response(e.detail, e.status_code)
+    except Exception as e:
+        response.status_code = 500
+        return create_error_response("Internal server error", 500)
+
+def search_warehouses(request, response):
+    """Ranked warehouse search; mode=prefix serves typeahead lookups"""
+    try:
+        query_params = getattr(request, 'query_params', {})
+        term = query_params.get('q', '').strip()
+        mode = query_params.get('mode', 'contains').strip()
+        limit = int(query_params.get('limit', 10))
+        
+        if not term:
+            response.status_code = 400
+            return create_error_response("Search term is required", 400)
+        
+        if mode not in ["contains", "prefix"]:
+            response.status_code = 400
+            return create_error_response("Mode must be 'contains' or 'prefix'", 400)
+        
+        if limit < 1 or limit > 50:
+            response.status_code = 400
+            return create_error_response("Limit must be between 1 and 50", 400)
+        
+        results = search_service.search("warehouse", term, mode, limit)
+        return create_response(results, "Warehouses search completed successfully")
         
     except Exception as e:
         response.status_code = 500
@@ -93,7 +152,7 @@ def get_warehouse(request, response):
         row = db.execute_one(
             """SELECT id, warehouse_id, name, location, region, capacity, current_stock, 
                       reserved_stock, available_stock, manager_name, contact_phone, status,
-                      created_at, updated_at 
+                      created_at, updated_at, latitude, longitude 
                FROM warehouse WHERE warehouse_id = %s""",
             (warehouse_id,)
         )
@@ -125,7 +184,9 @@ def create_warehouse(request, response):
             region=body.get('region', ''),
             capacity=body.get('capacity', 0),
             manager_name=body.get('manager_name'),
-            contact_phone=body.get('contact_phone')
+            contact_phone=body.get('contact_phone'),
+            latitude=body.get('latitude'),
+            longitude=body.get('longitude')
         )
         
         # Validate input
@@ -147,11 +208,13 @@ def create_warehouse(request, response):
         warehouse_id = db.execute_insert(
             """INSERT INTO warehouse (warehouse_id, name, location, region, capacity, 
                                     current_stock, reserved_stock, available_stock,
-                                    manager_name, contact_phone, status, created_at, updated_at)
-               VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s) RETURNING id""",
+                                    manager_name, contact_phone, status, created_at, updated_at,
+                                    latitude, longitude)
+               VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s) RETURNING id""",
             (warehouse_data.warehouse_id, warehouse_data.name, warehouse_data.location, 
              warehouse_data.region, warehouse_data.capacity, 0, 0, 0,
-             warehouse_data.manager_name, warehouse_data.contact_phone, 'Active', now, now)
+             warehouse_data.manager_name, warehouse_data.contact_phone, 'Active', now, now,
+             warehouse_data.latitude, warehouse_data.longitude)
         )
         
         if not warehouse_id:
@@ -173,12 +236,17 @@ def create_warehouse(request, response):
             contact_phone=warehouse_data.contact_phone,
             status='Active',
             created_at=now,
-            updated_at=now
+            updated_at=now,
+            latitude=warehouse_data.latitude,
+            longitude=warehouse_data.longitude
         )
         
         warehouse_dict = warehouse.to_dict()
         warehouse_dict['utilization_percentage'] = warehouse.utilization_percentage
         
+        invalidate_dashboard_cache(*WAREHOUSE_DEPENDENT_CACHES)
+        spatial_index.invalidate("warehouse")
+        
         response.status_code = 201
         return create_response(warehouse_dict, "Warehouse created successfully", 201)
         
@@ -209,7 +277,9 @@ def update_warehouse(request, response):
             reserved_stock=body.get('reserved_stock'),
             manager_name=body.get('manager_name'),
             contact_phone=body.get('contact_phone'),
-            status=body.get('status')
+            status=body.get('status'),
+            latitude=body.get('latitude'),
+            longitude=body.get('longitude')
         )
         
         # Validate input
@@ -266,6 +336,14 @@ def update_warehouse(request, response):
             update_fields.append("status = %s")
             params.append(update_data.status)
         
+        if update_data.latitude is not None:
+            update_fields.append("latitude = %s")
+            params.append(update_data.latitude)
+        
+        if update_data.longitude is not None:
+            update_fields.append("longitude = %s")
+            params.append(update_data.longitude)
+        
         if not update_fields:
             response.status_code = 400
             return create_error_response("No fields to update", 400)
@@ -280,12 +358,14 @@ def update_warehouse(request, response):
         
         update_query = f"UPDATE warehouse SET {', '.join(update_fields)} WHERE warehouse_id = %s"
         db.execute_query(update_query, tuple(params))
+        invalidate_dashboard_cache(*WAREHOUSE_DEPENDENT_CACHES)
+        spatial_index.invalidate("warehouse")
         
         # Return updated warehouse
         row = db.execute_one(
             """SELECT id, warehouse_id, name, location, region, capacity, current_stock, 
                       reserved_stock, available_stock, manager_name, contact_phone, status,
-                      created_at, updated_at 
+                      created_at, updated_at, latitude, longitude 
                FROM warehouse WHERE warehouse_id = %s""",
             (warehouse_id,)
         )
@@ -323,6 +403,8 @@ def delete_warehouse(request, response):
         
         # Delete warehouse (cascade will handle related data)
         db.execute_query("DELETE FROM warehouse WHERE warehouse_id = %s", (warehouse_id,))
+        invalidate_dashboard_cache(*ALL_DASHBOARD_CACHES)
+        spatial_index.invalidate("warehouse")
         
         return create_response(None, "Warehouse deleted successfully")
         
@@ -343,6 +425,7 @@ def get_warehouse_supplies(request, response):
         
         query_params = getattr(request, 'query_params', {})
         limit = int(query_params.get('limit', 100))
+        cursor = query_params.get('cursor') if 'cursor' in query_params else None
         
         db = get_database()
         
@@ -352,109 +435,266 @@ def get_warehouse_supplies(request, response):
             response.status_code = 404
             return create_error_response("Warehouse not found", 404)
         
+        # Keyset pagination on (supply_date, id), newest first
+        seek_clause = ""
+        params = [warehouse_id]
+        if cursor:
+            last_supply_date, last_id = decode_cursor(cursor, (datetime, int))
+            seek_clause = "AND (supply_date, id) < (%s, %s)"
+            params.extend([last_supply_date, last_id])
+        params.append(limit + 1)
+        
         # Get supply operations
         rows = db.execute_query(
-            """SELECT id, warehouse_id, sto_id, supply_date, quantity_supplied, supply_type,
+            f"""SELECT id, warehouse_id, sto_id, supply_date, quantity_supplied, supply_type,
                       status, estimated_delivery, actual_delivery, notes, created_at, updated_at
                FROM supply_warehouse 
-               WHERE warehouse_id = %s 
-               ORDER BY supply_date DESC 
+               WHERE warehouse_id = %s {seek_clause}
+               ORDER BY supply_date DESC, id DESC 
                LIMIT %s""",
-            (warehouse_id, limit)
+            tuple(params)
         )
+        has_next = len(rows) > limit
+        rows = rows[:limit]
         
         supplies = [SupplyWarehouse.from_db_row(row).to_dict() for row in rows]
         
+        if cursor is not None:
+            next_cursor = encode_cursor([rows[-1][3].isoformat(), rows[-1][0]]) if has_next and rows else None
+            return create_cursor_response(supplies, limit, next_cursor, message="Supply operations retrieved successfully")
+        
         return create_response(supplies, "Supply operations retrieved successfully")
         
+    except HTTPException as e:
+        response.status_code = e.status_code
+        return create_error_response(e.detail, e.status_code)
     except Exception as e:
         response.status_code = 500
         return create_error_response("Internal server error", 500)
 
+def parse_supply_request(body: dict) -> ReservationRequest:
+    """Validate one supply operation body; raises HTTPException(400) when invalid"""
+    if not isinstance(body, dict):
+        raise HTTPException(400, "Each supply operation must be an object")
+    supply_data = SupplyWarehouseCreate(
+        warehouse_id=body.get('warehouse_id', ''),
+        sto_id=body.get('sto_id', ''),
+        quantity_supplied=body.get('quantity_supplied', 0),
+        supply_type=body.get('supply_type', 'Regular'),
+        estimated_delivery=body.get('estimated_delivery'),
+        notes=body.get('notes', '')
+    )
+    
+    # Validate input
+    is_valid, error_msg = supply_data.validate()
+    if not is_valid:
+        raise HTTPException(400, error_msg)
+    
+    # Parse estimated delivery if provided
+    estimated_delivery = None
+    if supply_data.estimated_delivery:
+        try:
+            estimated_delivery = datetime.fromisoformat(supply_data.estimated_delivery.replace('Z', '+00:00'))
+        except ValueError:
+            raise HTTPException(400, "Invalid estimated delivery date format")
+    
+    return ReservationRequest(
+        warehouse_id=supply_data.warehouse_id,
+        sto_id=supply_data.sto_id,
+        quantity=supply_data.quantity_supplied,
+        supply_type=supply_data.supply_type,
+        estimated_delivery=estimated_delivery,
+        notes=supply_data.notes
+    )
+
 def create_supply_operation(request, response):
-    """Create a new supply operation"""
+    """Create a new supply operation and reserve its quantity.
+    
+    Validation, the stock check, the reservation and the insert are one
+    statement (see StockReservationEngine), so concurrent dispatches to the
+    same warehouse cannot oversell it. Returns 409 when stock is insufficient.
+    """
     try:
         require_auth(request)
         
         body = parse_json_body(request)
-        supply_data = SupplyWarehouseCreate(
-            warehouse_id=body.get('warehouse_id', ''),
-            sto_id=body.get('sto_id', ''),
-            quantity_supplied=body.get('quantity_supplied', 0),
-            supply_type=body.get('supply_type', 'Regular'),
-            estimated_delivery=body.get('estimated_delivery'),
-            notes=body.get('notes', '')
-        )
+        result = reservation_engine.reserve_one(parse_supply_request(body))
         
-        # Validate input
-        is_valid, error_msg = supply_data.validate()
-        if not is_valid:
+        if not result.reserved:
+            status = 409 if result.reason == 'insufficient_stock' else 400
+            response.status_code = status
+            return create_error_response(REJECT_REASONS[result.reason], status)
+        
+        invalidate_dashboard_cache(*SUPPLY_DEPENDENT_CACHES)
+        response.status_code = 201
+        return create_response(result.supply.to_dict(), "Supply operation created successfully", 201)
+        
+    except HTTPException as e:
+        response.status_code = e.status_code
+        return create_error_response(e.detail, e.status_code)
+    except Exception as e:
+        response.status_code = 500
+        return create_error_response("Internal server error", 500)
+
+def create_supply_operations_bulk(request, response):
+    """Create and reserve many supply operations in one statement.
+    
+    Body: {"operations": [<supply operation>, ...]}. Operations for the same
+    warehouse are reserved together or not at all; the response lists the
+    outcome of each operation in request order.
+    """
+    try:
+        require_auth(request)
+        
+        body = parse_json_body(request)
+        operations = body.get('operations')
+        if not isinstance(operations, list) or not operations:
             response.status_code = 400
-            return create_error_response(error_msg, 400)
+            return create_error_response("operations must be a non-empty list", 400)
+        if len(operations) > MAX_BULK_SUPPLY_OPERATIONS:
+            response.status_code = 400
+            return create_error_response(f"At most {MAX_BULK_SUPPLY_OPERATIONS} operations per request", 400)
         
-        db = get_database()
+        batch = reservation_engine.reserve([parse_supply_request(op) for op in operations])
+        if batch.reserved:
+            invalidate_dashboard_cache(*SUPPLY_DEPENDENT_CACHES)
         
-        # Check if warehouse and STO exist
-        warehouse_exists = db.execute_one("SELECT id FROM warehouse WHERE warehouse_id = %s", (supply_data.warehouse_id,))
-        if not warehouse_exists:
+        response.status_code = 201 if batch.reserved else 409
+        return create_response(batch.to_dict(), f"Reserved {len(batch.reserved)} of {len(batch.results)} supply operations",
+                               response.status_code)
+        
+    except HTTPException as e:
+        response.status_code = e.status_code
+        return create_error_response(e.detail, e.status_code)
+    except Exception as e:
+        response.status_code = 500
+        return create_error_response("Internal server error", 500)
+
+def propose_supply_allocation(request, response):
+    """Compute a fleet-wide supply allocation from predictions and warehouse stock.
+    
+    Body: {"period": "daily", "region": optional, "max_distance_km": optional,
+    "max_candidates": optional, "commit": false}. Returns the proposed
+    supply_warehouse rows and a summary; with "commit": true the rows are
+    reserved and created in one statement.
+    """
+    try:
+        require_auth(request)
+        body = parse_json_body(request)
+        period = body.get('period', 'daily')
+        if period not in PREDICTION_PERIODS:
             response.status_code = 400
-            return create_error_response("Warehouse not found", 400)
+            return create_error_response(f"Period must be one of: {', '.join(PREDICTION_PERIODS)}", 400)
         
-        sto_exists = db.execute_one("SELECT id FROM sto WHERE sto_id = %s", (supply_data.sto_id,))
-        if not sto_exists:
+        try:
+            max_distance_km = float(body['max_distance_km']) if body.get('max_distance_km') is not None else None
+            max_candidates = int(body['max_candidates']) if body.get('max_candidates') is not None else None
+        except (TypeError, ValueError):
             response.status_code = 400
-            return create_error_response("STO not found", 400)
-        
-        # Parse estimated delivery if provided
-        estimated_delivery = None
-        if supply_data.estimated_delivery:
-            try:
-                estimated_delivery = datetime.fromisoformat(supply_data.estimated_delivery.replace('Z', '+00:00'))
-            except ValueError:
-                response.status_code = 400
-                return create_error_response("Invalid estimated delivery date format", 400)
-        
-        # Create supply operation
-        now = datetime.utcnow()
-        supply_id = db.execute_insert(
-            """INSERT INTO supply_warehouse (warehouse_id, sto_id, supply_date, quantity_supplied,
-                                           supply_type, status, estimated_delivery, notes, created_at, updated_at)
-               VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s) RETURNING id""",
-            (supply_data.warehouse_id, supply_data.sto_id, now, supply_data.quantity_supplied,
-             supply_data.supply_type, 'Pending', estimated_delivery, supply_data.notes, now, now)
-        )
+            return create_error_response("max_distance_km and max_candidates must be numbers", 400)
+        if max_candidates is not None and max_candidates < 1:
+            response.status_code = 400
+            return create_error_response("max_candidates must be at least 1", 400)
         
-        if not supply_id:
-            response.status_code = 500
-            return create_error_response("Failed to create supply operation", 500)
+        result = allocation_service.propose(period, body.get('region') or None, max_distance_km, max_candidates)
+        rows = allocation_service.supply_rows(result)
+        data = {"summary": result.summary(), "supplies": rows}
         
-        # Update warehouse stock (reserve the quantity)
-        db.execute_query(
-            "UPDATE warehouse SET reserved_stock = reserved_stock + %s, available_stock = current_stock - reserved_stock WHERE warehouse_id = %s",
-            (supply_data.quantity_supplied, supply_data.warehouse_id)
-        )
+        if body.get('commit') and rows:
+            batch = allocation_service.commit(rows)
+            if batch.reserved:
+                invalidate_dashboard_cache(*SUPPLY_DEPENDENT_CACHES)
+            data["committed"] = batch.to_dict()
+            response.status_code = 201
+            return create_response(data, f"Created {len(batch.reserved)} of {len(rows)} proposed supply operations", 201)
         
-        # Return created supply operation
-        supply = SupplyWarehouse(
-            id=supply_id,
-            warehouse_id=supply_data.warehouse_id,
-            sto_id=supply_data.sto_id,
-            supply_date=now,
-            quantity_supplied=supply_data.quantity_supplied,
-            supply_type=supply_data.supply_type,
-            status='Pending',
-            estimated_delivery=estimated_delivery,
-            notes=supply_data.notes,
-            created_at=now,
-            updated_at=now
-        )
+        return create_response(data, "Supply allocation proposed successfully")
         
-        response.status_code = 201
-        return create_response(supply.to_dict(), "Supply operation created successfully", 201)
+    except HTTPException as e:
+        response.status_code = e.status_code
+        return create_error_response(e.detail, e.status_code)
+    except Exception as e:
+        response.status_code = 500
+        return create_error_response("Internal server error", 500)
+
+def get_nearest_warehouses(request, response):
+    """Nearest active warehouses to an STO or a coordinate, for supply dispatch.
+    
+    Query parameters: sto_id, or lat and lon; k (default 5, max 50);
+    radius_km (optional bound; with no k every warehouse in the radius is
+    returned); min_stock (only warehouses with at least this much
+    available stock). Distances are great-circle km from the spatial index;
+    stock is read fresh for the returned warehouses.
+    """
+    try:
+        require_auth(request)
+        query_params = getattr(request, 'query_params', {})
+        try:
+            radius_km = float(query_params['radius_km']) if query_params.get('radius_km') else None
+            k = int(query_params['k']) if query_params.get('k') else (None if radius_km else 5)
+            min_stock = int(query_params.get('min_stock', 0))
+            lat = float(query_params['lat']) if query_params.get('lat') else None
+            lon = float(query_params['lon']) if query_params.get('lon') else None
+        except ValueError:
+            response.status_code = 400
+            return create_error_response("lat, lon, radius_km, k and min_stock must be numbers", 400)
+        if k is not None and not 1 <= k <= 50:
+            response.status_code = 400
+            return create_error_response("k must be between 1 and 50", 400)
+        if radius_km is not None and radius_km <= 0:
+            response.status_code = 400
+            return create_error_response("radius_km must be positive", 400)
+        
+        sto_id = query_params.get('sto_id')
+        if sto_id:
+            location = spatial_index.location("sto", sto_id)
+            if location is None:
+                response.status_code = 404
+                return create_error_response("STO not found or has no coordinates", 404)
+            lat, lon = location
+        elif lat is None or lon is None:
+            response.status_code = 400
+            return create_error_response("Provide sto_id, or lat and lon", 400)
+        
+        index = spatial_index.index("warehouse")
+        if k is None:
+            candidates = index.within(lat, lon, radius_km)
+        elif min_stock > 0:
+            # Stock filtering happens after the lookup, so rank every warehouse in range
+            candidates = index.nearest(lat, lon, len(index), radius_km)
+        else:
+            candidates = index.nearest(lat, lon, k, radius_km)
+        
+        stock = {}
+        if candidates:
+            rows = get_database().execute_query(
+                """SELECT warehouse_id, name, region, current_stock - reserved_stock
+                   FROM warehouse WHERE warehouse_id = ANY(%s)""",
+                ([warehouse_id for warehouse_id, _ in candidates],)
+            )
+            stock = {row[0]: row[1:] for row in rows}
+        
+        results = []
+        for warehouse_id, distance_km in candidates:
+            if warehouse_id not in stock or stock[warehouse_id][2] < min_stock:
+                continue
+            name, region, available = stock[warehouse_id]
+            results.append({
+                "warehouse_id": warehouse_id,
+                "name": name,
+                "region": region,
+                "distance_km": distance_km,
+                "available_stock": available
+            })
+            if k is not None and len(results) >= k:
+                break
+        
+        return create_response({"origin": {"lat": lat, "lon": lon, "sto_id": sto_id}, "warehouses": results},
+                               "Nearest warehouses retrieved successfully")
         
     except HTTPException as e:
         response.status_code = e.status_code
         return create_error_response(e.detail, e.status_code)
     except Exception as e:
         response.status_code = 500
-        return create_error_response("Internal server error", 500)
\ No newline at end of file
+        return create_error_response("Internal server error", 500)
@@ -0,0 +1,137 @@
+import asyncio
+import logging
+import threading
+from contextlib import asynccontextmanager
+from typing import Any, AsyncGenerator, Dict, Optional
+from .config import settings
+
+try:
+    import psycopg
+    from psycopg_pool import AsyncConnectionPool, PoolTimeout
+except ImportError:  # pragma: no cover - optional dependency
+    psycopg = None
+    AsyncConnectionPool = None
+    PoolTimeout = None
+
+logger = logging.getLogger(__name__)
+
+class AsyncDatabase:
+    """Asyncio counterpart of ``Database``.
+
+    Exposes the same ``execute_query``/``execute_one``/``execute_insert`` API as
+    coroutines, backed by its own async connection pool. Queries keep the
+    ``%s`` placeholder style used by the sync layer, so SQL can be shared
+    between sync and async handlers while endpoints migrate one at a time.
+    """
+
+    def __init__(self):
+        self.pool = None
+        self._lock: Optional[asyncio.Lock] = None
+
+    async def connect(self):
+        """Initialize the async connection pool (idempotent)"""
+        if self.pool is not None:
+            return
+        if AsyncConnectionPool is None:
+            raise RuntimeError("Async database layer requires 'psycopg[binary]' and 'psycopg-pool'")
+
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if self.pool is not None:
+                return
+            try:
+                pool = AsyncConnectionPool(
+                    conninfo=settings.database_url,
+                    min_size=settings.DB_POOL_MIN_SIZE,
+                    max_size=settings.DB_POOL_MAX_SIZE,
+                    timeout=settings.DB_POOL_TIMEOUT,
+                    max_lifetime=settings.DB_POOL_MAX_AGE,
+                    max_idle=settings.DB_POOL_MAX_IDLE,
+                    check=AsyncConnectionPool.check_connection,
+                    open=False
+                )
+                await pool.open(wait=True)
+                self.pool = pool
+                logger.info("Async database connection pool initialized successfully")
+            except Exception as e:
+                logger.error(f"Failed to initialize async database connection pool: {e}")
+                raise
+
+    @asynccontextmanager
+    async def get_connection(self, timeout: Optional[float] = None) -> AsyncGenerator["psycopg.AsyncConnection", None]:
+        """Get a connection from the async pool"""
+        await self.connect()
+        try:
+            async with self.pool.connection(timeout=timeout) as connection:
+                yield connection
+        except PoolTimeout as e:
+            logger.error(f"Async database connection checkout timed out: {e}")
+            raise
+        except Exception as e:
+            logger.error(f"Async database operation failed: {e}")
+            raise
+
+    @asynccontextmanager
+    async def get_cursor(self) -> AsyncGenerator["psycopg.AsyncCursor", None]:
+        """Get a cursor with automatic transaction management"""
+        async with self.get_connection() as conn:
+            # The pool's connection() context commits on success and rolls back on error
+            async with conn.cursor() as cursor:
+                yield cursor
+
+    async def execute_query(self, query: str, params: tuple = None):
+        """Execute a query and return results"""
+        async with self.get_cursor() as cursor:
+            await cursor.execute(query, params)
+            return await cursor.fetchall() if cursor.description else []
+
+    async def execute_one(self, query: str, params: tuple = None):
+        """Execute a query and return one result"""
+        async with self.get_cursor() as cursor:
+            await cursor.execute(query, params)
+            return await cursor.fetchone() if cursor.description else None
+
+    async def execute_insert(self, query: str, params: tuple = None):
+        """Execute an insert query and return the inserted ID"""
+        async with self.get_cursor() as cursor:
+            await cursor.execute(query, params)
+            if cursor.rowcount > 0 and cursor.description:
+                row = await cursor.fetchone()
+                return row[0] if row else None
+            return None
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """Live async pool statistics"""
+        return self.pool.get_stats() if self.pool else {}
+
+    async def close(self):
+        """Close all connections in the async pool"""
+        if self.pool:
+            await self.pool.close()
+            self.pool = None
+            logger.info("Async database connection pool closed")
+
+# Global async database instance (pool is opened lazily inside the running event loop)
+async_db = AsyncDatabase()
+
+async def get_async_database() -> AsyncDatabase:
+    """Dependency to get the async database instance"""
+    await async_db.connect()
+    return async_db
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """Shared event loop, running in a daemon thread, that owns the async pool"""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="async-db-loop", daemon=True).start()
+        return _loop
+
+def run_async(coro, timeout: Optional[float] = None):
+    """Run a coroutine on the shared loop from synchronous code and wait for its result"""
+    return asyncio.run_coroutine_threadsafe(coro, get_event_loop()).result(timeout)
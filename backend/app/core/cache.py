@@ -0,0 +1,314 @@
+import hashlib
+import json
+import time
+import logging
+import threading
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Callable, Dict, Optional, Tuple
+from .config import settings
+
+try:
+    import redis
+except ImportError:  # pragma: no cover - optional dependency
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+MISSING = object()  # sentinel for cache misses (None is a valid cached value)
+
+class LRUCache:
+    """Thread-safe in-process LRU with per-entry expiry"""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return MISSING
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return MISSING
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: float):
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete_prefix(self, prefix: str) -> int:
+        with self._lock:
+            keys = [k for k in self._data if k.startswith(prefix)]
+            for k in keys:
+                del self._data[k]
+            return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+class ResponseCache:
+    """Two-tier response cache (in-process LRU + optional Redis).
+
+    Entries are grouped by namespace (one per endpoint). Invalidating a
+    namespace bumps its generation number, which is part of every key, so all
+    variants of that endpoint are dropped at once on every process sharing the
+    Redis tier. Concurrent misses for the same key are collapsed into a single
+    recomputation (single-flight).
+    """
+
+    GENERATION_PREFIX = "respcache:gen:"
+    KEY_PREFIX = "respcache:"
+
+    def __init__(self, max_entries: int = 1024, use_redis: bool = False):
+        self.local = LRUCache(max_entries)
+        self.redis = self._connect_redis() if use_redis else None
+        self._generations: Dict[str, int] = {}
+        self._inflight: Dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _connect_redis():
+        if redis is None:
+            logger.warning("Redis tier requested but the 'redis' package is not installed")
+            return None
+        try:
+            client = redis.Redis(
+                host=settings.REDIS_HOST,
+                port=settings.REDIS_PORT,
+                password=settings.REDIS_PASSWORD,
+                socket_timeout=0.5,
+                socket_connect_timeout=0.5
+            )
+            client.ping()
+            logger.info("Response cache Redis tier connected")
+            return client
+        except Exception as e:
+            logger.warning(f"Response cache Redis tier unavailable, using in-process cache only: {e}")
+            return None
+
+    def _generation(self, namespace: str) -> int:
+        if self.redis is not None:
+            try:
+                value = self.redis.get(self.GENERATION_PREFIX + namespace)
+                return int(value) if value else 0
+            except Exception as e:
+                logger.warning(f"Redis generation lookup failed: {e}")
+        return self._generations.get(namespace, 0)
+
+    def _full_key(self, namespace: str, key: str) -> str:
+        return f"{self.KEY_PREFIX}{namespace}:{self._generation(namespace)}:{key}"
+
+    def get(self, namespace: str, key: str) -> Any:
+        full_key = self._full_key(namespace, key)
+        value = self.local.get(full_key)
+        if value is not MISSING:
+            return value
+        if self.redis is not None:
+            try:
+                raw = self.redis.get(full_key)
+                if raw is not None:
+                    value = json.loads(raw)
+                    ttl = self.redis.ttl(full_key)
+                    if ttl and ttl > 0:
+                        self.local.set(full_key, value, ttl)
+                    return value
+            except Exception as e:
+                logger.warning(f"Redis cache read failed: {e}")
+        return MISSING
+
+    def set(self, namespace: str, key: str, value: Any, ttl: float):
+        self._store(self._full_key(namespace, key), value, ttl)
+
+    def _store(self, full_key: str, value: Any, ttl: float):
+        self.local.set(full_key, value, ttl)
+        if self.redis is not None:
+            try:
+                self.redis.set(full_key, json.dumps(value, default=str), ex=max(1, int(ttl)))
+            except Exception as e:
+                logger.warning(f"Redis cache write failed: {e}")
+
+    def get_or_compute(self, namespace: str, key: str, ttl: float,
+                       compute: Callable[[], Tuple[Any, bool]]) -> Any:
+        """Return the cached value or compute it once for all concurrent callers.
+
+        ``compute`` returns ``(value, cacheable)``; uncacheable results (errors)
+        are returned to the caller but never stored.
+        """
+        flight_key = f"{namespace}:{key}"
+        while True:
+            value = self.get(namespace, key)
+            if value is not MISSING:
+                self.hits += 1
+                return value
+
+            with self._lock:
+                event = self._inflight.get(flight_key)
+                leader = event is None
+                if leader:
+                    event = threading.Event()
+                    self._inflight[flight_key] = event
+
+            if not leader:
+                # Another thread is already recomputing this key; wait and re-check
+                event.wait(timeout=settings.RESPONSE_CACHE_WAIT_TIMEOUT)
+                value = self.get(namespace, key)
+                if value is not MISSING:
+                    self.hits += 1
+                    return value
+                # Leader failed or produced an uncacheable result: compute ourselves
+                self.misses += 1
+                return compute()[0]
+
+            try:
+                self.misses += 1
+                # Store under the generation the computation started in: if a write
+                # invalidates the namespace meanwhile, the result lands on a dead key
+                full_key = self._full_key(namespace, key)
+                value, cacheable = compute()
+                if cacheable:
+                    self._store(full_key, value, ttl)
+                return value
+            finally:
+                with self._lock:
+                    self._inflight.pop(flight_key, None)
+                event.set()
+
+    def invalidate(self, *namespaces: str):
+        """Drop every cached entry in the given namespaces"""
+        for namespace in namespaces:
+            with self._lock:
+                self._generations[namespace] = self._generations.get(namespace, 0) + 1
+            self.local.delete_prefix(f"{self.KEY_PREFIX}{namespace}:")
+            if self.redis is not None:
+                try:
+                    self.redis.incr(self.GENERATION_PREFIX + namespace)
+                except Exception as e:
+                    logger.warning(f"Redis cache invalidation failed for '{namespace}': {e}")
+        logger.debug(f"Invalidated response cache namespaces: {', '.join(namespaces)}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "local_entries": len(self.local),
+            "redis": self.redis is not None
+        }
+
+class PrincipalCache:
+    """In-process cache of authenticated users keyed by access token.
+
+    An entry lives for ``ttl`` seconds but never past the token's own ``exp``,
+    so a cached principal cannot outlive its token. ``invalidate_user`` bumps
+    the user's generation, which drops every cached token of that user at
+    once; entries are stored with the generation they were created under and
+    are ignored when it no longer matches. Invalidation is per process: other
+    workers stop serving the old principal when their entry's TTL runs out.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl: float = 60):
+        self.local = LRUCache(max_entries)
+        self.ttl = ttl
+        self._generations: Dict[Any, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    def get(self, token: str) -> Any:
+        entry = self.local.get(self._key(token))
+        if entry is not MISSING:
+            user_id, generation, principal = entry
+            if self._generations.get(user_id, 0) == generation:
+                self.hits += 1
+                return principal
+        self.misses += 1
+        return MISSING
+
+    def generation(self, user_id: Any) -> int:
+        """Current generation of a user; read it before loading the principal and pass it to ``set``"""
+        with self._lock:
+            return self._generations.get(user_id, 0)
+
+    def set(self, token: str, user_id: Any, principal: Any, generation: int,
+            expires_at: Optional[float] = None):
+        """Cache ``principal`` for ``token``; ``expires_at`` is the token's exp (epoch seconds).
+
+        ``generation`` is the user's generation from before the principal was
+        loaded; if the user was invalidated since, the principal may predate
+        that change and is not stored.
+        """
+        ttl = self.ttl
+        if expires_at is not None:
+            ttl = min(ttl, float(expires_at) - time.time())
+        if ttl <= 0:
+            return
+        with self._lock:
+            if self._generations.get(user_id, 0) != generation:
+                return
+            self.local.set(self._key(token), (user_id, generation, principal), ttl)
+
+    def invalidate_user(self, user_id: Any):
+        """Forget every cached token of a user (deactivation, password change)"""
+        with self._lock:
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+        logger.debug(f"Invalidated cached principals for user {user_id}")
+
+    def clear(self):
+        self.local.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self.local)}
+
+def _request_cache_key(request) -> str:
+    query_params = getattr(request, 'query_params', {}) or {}
+    return json.dumps(sorted(query_params.items()), default=str)
+
+def cached_response(namespace: str, ttl: float):
+    """Cache a ``handler(request, response)`` result per query string.
+
+    Only successful responses are cached; the namespace is what write paths
+    pass to ``response_cache.invalidate``.
+    """
+    def decorator(handler):
+        @wraps(handler)
+        def wrapper(request, response):
+            if not settings.RESPONSE_CACHE_ENABLED:
+                return handler(request, response)
+
+            def compute():
+                result = handler(request, response)
+                ok = response.status_code < 400 and isinstance(result, dict) and result.get("success")
+                return result, bool(ok)
+
+            return response_cache.get_or_compute(namespace, _request_cache_key(request), ttl, compute)
+        return wrapper
+    return decorator
+
+# Global response cache instance
+response_cache = ResponseCache(
+    max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+    use_redis=settings.RESPONSE_CACHE_USE_REDIS
+)
+
+# Global authenticated-principal cache instance
+principal_cache = PrincipalCache(
+    max_entries=settings.AUTH_CACHE_MAX_ENTRIES,
+    ttl=settings.AUTH_CACHE_TTL
+)
@@ -11,24 +11,89 @@ class Settings:
     DATABASE_USER = os.getenv("DATABASE_USER", "postgres")
     DATABASE_PASSWORD = os.getenv("DATABASE_PASSWORD", "MFakhriAKM1")
     
+    # Connection Pool Configuration
+    DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "1"))
+    DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "20"))
+    DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))  # seconds to wait for a free connection
+    DB_POOL_MAX_AGE = float(os.getenv("DB_POOL_MAX_AGE", "1800"))  # recycle connections older than this
+    DB_POOL_MAX_IDLE = float(os.getenv("DB_POOL_MAX_IDLE", "300"))  # recycle connections idle longer than this
+    DB_BATCH_MAX_WORKERS = int(os.getenv("DB_BATCH_MAX_WORKERS", "8"))  # threads used to fan out query batches
+    
     # JWT Configuration
     SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-here-please-change-in-production")
     JWT_ALGORITHM = "HS256"
     JWT_EXPIRATION_MINUTES = 30
+    AUTH_CACHE_ENABLED = os.getenv("AUTH_CACHE_ENABLED", "true").lower() == "true"
+    AUTH_CACHE_TTL = int(os.getenv("AUTH_CACHE_TTL", "60"))  # seconds a verified token's user is reused
+    AUTH_CACHE_MAX_ENTRIES = int(os.getenv("AUTH_CACHE_MAX_ENTRIES", "10000"))
+    BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))  # existing hashes are upgraded on login when changed
+    PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))  # cores bcrypt may occupy at once
+    PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "32"))  # waiting hashes before 503
+    PASSWORD_HASH_TIMEOUT = float(os.getenv("PASSWORD_HASH_TIMEOUT", "10"))  # seconds a request waits for bcrypt
     
     # Redis Configuration (for caching)
     REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
     REDIS_PORT = int(os.getenv("REDIS_PORT", "6379"))
     REDIS_PASSWORD = os.getenv("REDIS_PASSWORD", None)
     
+    # Response Cache Configuration
+    RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+    RESPONSE_CACHE_USE_REDIS = os.getenv("RESPONSE_CACHE_USE_REDIS", "false").lower() == "true"
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1024"))
+    RESPONSE_CACHE_WAIT_TIMEOUT = 30  # seconds a request waits on another request's recomputation
+    RESPONSE_CACHE_TTLS = {
+        "dashboard_stats": 30,
+        "prediction_summary": 300,
+        "sto_performance": 120,
+        "supply_analytics": 120
+    }
+    
+    # Rate Limiting: scope -> (attempts, window seconds), sliding window per client
+    RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+    RATE_LIMIT_USE_REDIS = os.getenv("RATE_LIMIT_USE_REDIS", "false").lower() == "true"
+    TRUSTED_PROXY_COUNT = int(os.getenv("TRUSTED_PROXY_COUNT", "0"))  # reverse proxies appending to X-Forwarded-For
+    RATE_LIMITS = {
+        "login_ip": (20, 60),
+        "login_email": (5, 300),
+        "register": (10, 3600),
+        "change_password": (5, 300),
+        "upload": (30, 60),
+        "report": (20, 60),
+        "export": (10, 60)
+    }
+    
     # File Upload Configuration
     MAX_FILE_SIZE_MB = 50
     ALLOWED_EXTENSIONS = {".csv", ".xlsx", ".xls"}
     UPLOAD_FOLDER = "uploads"
+    INGEST_CHUNK_ROWS = int(os.getenv("INGEST_CHUNK_ROWS", "50000"))  # rows parsed/validated/copied per chunk
+    INGEST_MAX_REPORTED_REJECTS = 1000  # row-level reject details returned per upload
+    UPLOAD_PROCESSING_TIMEOUT = int(os.getenv("UPLOAD_PROCESSING_TIMEOUT", "900"))  # seconds without progress before an ingest counts as abandoned
+    EXCEL_PARSE_WORKERS = int(os.getenv("EXCEL_PARSE_WORKERS", str(min(4, os.cpu_count() or 1))))  # processes parsing workbook sheets
     
     # ML Model Configuration
     MODEL_PATH = "ml/models"
     PREDICTION_CACHE_TTL = 3600  # 1 hour in seconds
+    PREDICTION_CACHE_MAX_ENTRIES = 10000  # in-process tier in front of predictions_cache
+    PREDICTION_CACHE_SWEEP_INTERVAL = 300  # seconds between expired-row sweeps
+    PREDICTION_JOB_WORKERS = int(os.getenv("PREDICTION_JOB_WORKERS", "2"))  # concurrent batch prediction jobs
+    PREDICTION_JOB_BATCH_SIZE = int(os.getenv("PREDICTION_JOB_BATCH_SIZE", "500"))  # STOs predicted and upserted per step
+    PREDICTION_JOB_HEARTBEAT_INTERVAL = int(os.getenv("PREDICTION_JOB_HEARTBEAT_INTERVAL", "30"))  # seconds between heartbeats of a process's unfinished jobs
+    PREDICTION_JOB_STALE_AFTER = int(os.getenv("PREDICTION_JOB_STALE_AFTER", "300"))  # seconds without a heartbeat before a job's owner counts as gone
+    PREDICTION_HISTORY_DAYS = int(os.getenv("PREDICTION_HISTORY_DAYS", "365"))  # sales history fed to the model
+    PREDICTION_USE_FEATURE_STORE = os.getenv("PREDICTION_USE_FEATURE_STORE", "false").lower() == "true"  # batch jobs read sto_feature_stats instead of sales history
+    DATA_LOADER_FETCH_SIZE = 10000  # rows per round-trip when streaming sales history
+    SEASONALITY_MIN_WEEKLY_STRENGTH = 3.0  # FFT weekly power over background power before a weekly pattern is used
+    SEASONALITY_MAX_AGE_DAYS = int(os.getenv("SEASONALITY_MAX_AGE_DAYS", "7"))  # days a cached STO is reused before changed sales trigger a recompute
+    SEASONALITY_REFRESH_BATCH_SIZE = int(os.getenv("SEASONALITY_REFRESH_BATCH_SIZE", "2000"))  # STOs decomposed per vectorized pass
+    EXPORT_FETCH_SIZE = int(os.getenv("EXPORT_FETCH_SIZE", "5000"))  # rows fetched and encoded per export batch
+    SPATIAL_INDEX_TTL = int(os.getenv("SPATIAL_INDEX_TTL", "300"))  # seconds before coordinates are reloaded
+    ALLOCATION_SHORTFALL_PENALTY_KM = 100000  # cost per unmet unit; above any real distance so stock always ships
+    ALLOCATION_UNKNOWN_DISTANCE_KM = 1000  # distance assumed when an STO or warehouse has no coordinates
+    ALLOCATION_MAX_CANDIDATES = int(os.getenv("ALLOCATION_MAX_CANDIDATES", "20"))  # nearest warehouses per STO
+    REPORT_JOB_WORKERS = int(os.getenv("REPORT_JOB_WORKERS", "2"))  # concurrent report renders
+    REPORT_ARTIFACT_TTL = int(os.getenv("REPORT_ARTIFACT_TTL", "86400"))  # seconds a rendered report is reused
+    REPORT_ARTIFACT_SWEEP_INTERVAL = 600  # seconds between expired-artifact sweeps
     
     # API Configuration
     API_V1_PREFIX = "/api"
@@ -1,9 +1,9 @@
 import psycopg2
-from psycopg2.pool import SimpleConnectionPool
 from contextlib import contextmanager
 import logging
-from typing import Generator
+from typing import Any, Dict, Generator, Optional
 from .config import settings
+from .pool import ConnectionPool, PoolTimeoutError
 
 logger = logging.getLogger(__name__)
 
@@ -15,29 +15,42 @@ class Database:
     def connect(self):
         """Initialize database connection pool"""
         try:
-            self.pool = SimpleConnectionPool(
-                minconn=1,
-                maxconn=20,
-                host=settings.DATABASE_HOST,
-                port=settings.DATABASE_PORT,
-                database=settings.DATABASE_NAME,
-                user=settings.DATABASE_USER,
-                password=settings.DATABASE_PASSWORD
+            self.pool = ConnectionPool(
+                connect=self._open_connection,
+                minconn=settings.DB_POOL_MIN_SIZE,
+                maxconn=settings.DB_POOL_MAX_SIZE,
+                timeout=settings.DB_POOL_TIMEOUT,
+                max_age=settings.DB_POOL_MAX_AGE,
+                max_idle=settings.DB_POOL_MAX_IDLE
             )
             logger.info("Database connection pool initialized successfully")
         except Exception as e:
             logger.error(f"Failed to initialize database connection pool: {e}")
             raise
     
+    @staticmethod
+    def _open_connection() -> psycopg2.extensions.connection:
+        """Open a new raw connection for the pool"""
+        return psycopg2.connect(
+            host=settings.DATABASE_HOST,
+            port=settings.DATABASE_PORT,
+            database=settings.DATABASE_NAME,
+            user=settings.DATABASE_USER,
+            password=settings.DATABASE_PASSWORD
+        )
+    
     @contextmanager
-    def get_connection(self) -> Generator[psycopg2.extensions.connection, None, None]:
-        """Get a connection from the pool"""
+    def get_connection(self, timeout: Optional[float] = None) -> Generator[psycopg2.extensions.connection, None, None]:
+        """Get a connection from the pool, waiting up to ``timeout`` seconds for a free one"""
         connection = None
         try:
-            connection = self.pool.getconn()
+            connection = self.pool.getconn(timeout)
             yield connection
+        except PoolTimeoutError as e:
+            logger.error(f"Database connection checkout timed out: {e}")
+            raise
         except Exception as e:
-            if connection:
+            if connection and not connection.closed:
                 connection.rollback()
             logger.error(f"Database operation failed: {e}")
             raise
@@ -78,6 +91,10 @@ class Database:
             cursor.execute(query, params)
             return cursor.fetchone()[0] if cursor.rowcount > 0 else None
     
+    def pool_stats(self) -> Dict[str, Any]:
+        """Live connection pool statistics (in-use, idle, waiters, wait times)"""
+        return self.pool.stats() if self.pool else {}
+    
     def close(self):
         """Close all connections in the pool"""
         if self.pool:
@@ -0,0 +1,264 @@
+import threading
+import time
+import logging
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Generator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class PoolError(Exception):
+    """Base error raised by the connection pool"""
+    pass
+
+class PoolTimeoutError(PoolError):
+    """Raised when no connection became available within the checkout timeout"""
+    pass
+
+class PoolClosedError(PoolError):
+    """Raised when a connection is requested from a closed pool"""
+    pass
+
+class _PooledConnection:
+    """Bookkeeping wrapper around a raw DB-API connection"""
+
+    __slots__ = ("connection", "created_at", "last_used")
+
+    def __init__(self, connection):
+        now = time.monotonic()
+        self.connection = connection
+        self.created_at = now
+        self.last_used = now
+
+class WaitHistogram:
+    """Fixed-bucket histogram of checkout wait times in milliseconds"""
+
+    BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BUCKETS_MS) + 1)
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.samples = 0
+
+    def observe(self, wait_ms: float):
+        self.counts[bisect_left(self.BUCKETS_MS, wait_ms)] += 1
+        self.total_ms += wait_ms
+        self.max_ms = max(self.max_ms, wait_ms)
+        self.samples += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        labels = [f"le_{b}ms" for b in self.BUCKETS_MS] + ["gt_{}ms".format(self.BUCKETS_MS[-1])]
+        return {
+            "buckets": dict(zip(labels, self.counts)),
+            "samples": self.samples,
+            "avg_ms": round(self.total_ms / self.samples, 3) if self.samples else 0.0,
+            "max_ms": round(self.max_ms, 3)
+        }
+
+class ConnectionPool:
+    """Thread-safe, bounded connection pool.
+
+    Callers block on checkout until a connection is free or ``timeout`` expires.
+    Connections are validated on checkout and recycled once they exceed
+    ``max_age`` seconds of lifetime or ``max_idle`` seconds without use.
+    """
+
+    def __init__(self, connect: Callable[[], Any], minconn: int = 1, maxconn: int = 20,
+                 timeout: float = 30.0, max_age: Optional[float] = 1800.0,
+                 max_idle: Optional[float] = 300.0, validate: bool = True):
+        if minconn < 0 or maxconn < 1 or minconn > maxconn:
+            raise ValueError("Invalid pool size: require 0 <= minconn <= maxconn and maxconn >= 1")
+
+        self._connect = connect
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.max_age = max_age
+        self.max_idle = max_idle
+        self.validate = validate
+
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self._idle: deque = deque()
+        self._in_use: Dict[int, _PooledConnection] = {}
+        self._opening = 0
+        self._validating = 0
+        self._waiters = 0
+        self._closed = False
+
+        self._histogram = WaitHistogram()
+        self._checkouts = 0
+        self._timeouts = 0
+        self._recycled = 0
+        self._discarded = 0
+
+        for _ in range(minconn):
+            self._idle.append(_PooledConnection(self._connect()))
+
+    @property
+    def size(self) -> int:
+        """Total connections currently owned by the pool (idle + in use + opening + being validated)"""
+        return len(self._idle) + len(self._in_use) + self._opening + self._validating
+
+    def getconn(self, timeout: Optional[float] = None):
+        """Check out a connection, waiting up to ``timeout`` seconds"""
+        timeout = self.timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+
+        while True:
+            pooled = None
+            open_new = False
+
+            with self._available:
+                while True:
+                    if self._closed:
+                        raise PoolClosedError("Connection pool is closed")
+                    if self._idle:
+                        # LIFO keeps the hottest connections in use and lets the rest go idle
+                        pooled = self._idle.pop()
+                        # Still counted towards size while it is validated outside the lock
+                        self._validating += 1
+                        break
+                    if self.size < self.maxconn:
+                        self._opening += 1
+                        open_new = True
+                        break
+
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        raise PoolTimeoutError(
+                            f"Timed out after {timeout:.1f}s waiting for a database connection "
+                            f"({len(self._in_use)}/{self.maxconn} in use)"
+                        )
+                    self._waiters += 1
+                    try:
+                        self._available.wait(remaining)
+                    finally:
+                        self._waiters -= 1
+
+            if open_new:
+                try:
+                    pooled = _PooledConnection(self._connect())
+                except Exception:
+                    with self._available:
+                        self._opening -= 1
+                        self._available.notify()
+                    raise
+            elif not self._is_usable(pooled):
+                self._discard(pooled)
+                continue
+
+            with self._available:
+                # Move from opening/validating to in use in one step so size never dips
+                if open_new:
+                    self._opening -= 1
+                else:
+                    self._validating -= 1
+                self._in_use[id(pooled.connection)] = pooled
+                self._checkouts += 1
+                self._histogram.observe((time.monotonic() - started) * 1000)
+            return pooled.connection
+
+    def putconn(self, connection, close: bool = False):
+        """Return a connection to the pool"""
+        with self._available:
+            pooled = self._in_use.pop(id(connection), None)
+            if pooled is None:
+                raise PoolError("Connection does not belong to this pool")
+
+            pooled.last_used = time.monotonic()
+            broken = getattr(connection, "closed", 0) != 0
+            if close or broken or self._closed or self._expired(pooled):
+                discard = True
+            else:
+                self._idle.append(pooled)
+                discard = False
+            self._available.notify()
+
+        if discard:
+            self._close_quietly(pooled)
+            with self._lock:
+                self._recycled += 1
+
+    @contextmanager
+    def connection(self, timeout: Optional[float] = None) -> Generator[Any, None, None]:
+        """Context manager that checks out and always returns a connection"""
+        conn = self.getconn(timeout)
+        try:
+            yield conn
+        finally:
+            self.putconn(conn)
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of live pool statistics"""
+        with self._lock:
+            return {
+                "minconn": self.minconn,
+                "maxconn": self.maxconn,
+                "size": self.size,
+                "in_use": len(self._in_use),
+                "idle": len(self._idle),
+                "waiters": self._waiters,
+                "checkouts": self._checkouts,
+                "timeouts": self._timeouts,
+                "recycled": self._recycled,
+                "discarded": self._discarded,
+                "wait_time": self._histogram.to_dict()
+            }
+
+    def closeall(self):
+        """Close idle connections and refuse further checkouts"""
+        with self._available:
+            self._closed = True
+            idle: List[_PooledConnection] = list(self._idle)
+            self._idle.clear()
+            self._available.notify_all()
+        for pooled in idle:
+            self._close_quietly(pooled)
+
+    def _expired(self, pooled: _PooledConnection) -> bool:
+        now = time.monotonic()
+        if self.max_age is not None and now - pooled.created_at > self.max_age:
+            return True
+        if self.max_idle is not None and now - pooled.last_used > self.max_idle:
+            return True
+        return False
+
+    def _is_usable(self, pooled: _PooledConnection) -> bool:
+        """Validate an idle connection before handing it out"""
+        conn = pooled.connection
+        if getattr(conn, "closed", 0) != 0 or self._expired(pooled):
+            return False
+        if not self.validate:
+            return True
+        try:
+            cursor = conn.cursor()
+            try:
+                cursor.execute("SELECT 1")
+                cursor.fetchone()
+            finally:
+                cursor.close()
+            conn.rollback()
+            return True
+        except Exception as e:
+            logger.warning(f"Discarding broken pooled connection: {e}")
+            return False
+
+    def _discard(self, pooled: _PooledConnection):
+        """Close a connection that failed validation; it no longer counts towards size"""
+        self._close_quietly(pooled)
+        with self._available:
+            self._validating -= 1
+            self._discarded += 1
+            self._available.notify()
+
+    @staticmethod
+    def _close_quietly(pooled: _PooledConnection):
+        try:
+            pooled.connection.close()
+        except Exception:
+            pass
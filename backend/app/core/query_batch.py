@@ -0,0 +1,93 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+from .config import settings
+from .database import Database, get_database
+
+logger = logging.getLogger(__name__)
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Shared worker pool used to fan out batched read queries"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.DB_BATCH_MAX_WORKERS,
+                thread_name_prefix="query-batch"
+            )
+        return _executor
+
+class QueryBatch:
+    """A set of independent read queries executed together.
+
+    Each query runs on its own pooled connection in a shared worker pool, so
+    the batch takes roughly as long as its slowest query instead of the sum of
+    all of them. Results are returned as a dict keyed by query name.
+
+        batch = QueryBatch()
+        batch.add("total_stos", "SELECT COUNT(*) FROM sto", fetch="one")
+        batch.add("warehouses", "SELECT warehouse_id FROM warehouse")
+        results = batch.run()
+    """
+
+    def __init__(self, db: Optional[Database] = None):
+        self.db = db or get_database()
+        self._queries: List[Tuple[str, str, Optional[tuple], str]] = []
+
+    def add(self, name: str, query: str, params: tuple = None, fetch: str = "all") -> 'QueryBatch':
+        """Register a query; ``fetch`` is 'all' (rows) or 'one' (single row)"""
+        if fetch not in ("all", "one"):
+            raise ValueError("fetch must be 'all' or 'one'")
+        if any(existing[0] == name for existing in self._queries):
+            raise ValueError(f"Duplicate query name in batch: {name}")
+        self._queries.append((name, query, params, fetch))
+        return self
+
+    def __len__(self) -> int:
+        return len(self._queries)
+
+    def run(self, concurrent: bool = True) -> Dict[str, Any]:
+        """Execute all queries and return their results keyed by name.
+
+        With ``concurrent=False`` the queries are sent back to back on a single
+        connection inside one transaction, which saves pool checkouts when the
+        pool is under pressure.
+        """
+        if not self._queries:
+            return {}
+        if not concurrent or len(self._queries) == 1:
+            return self._run_on_one_connection()
+
+        executor = _get_executor()
+        futures = {
+            name: executor.submit(self._execute, query, params, fetch)
+            for name, query, params, fetch in self._queries
+        }
+        # Wait for every query before raising so no connection is left mid-flight
+        results, first_error = {}, None
+        for name, future in futures.items():
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                logger.error(f"Batched query '{name}' failed: {e}")
+                first_error = first_error or e
+        if first_error:
+            raise first_error
+        return results
+
+    def _execute(self, query: str, params: Optional[tuple], fetch: str):
+        if fetch == "one":
+            return self.db.execute_one(query, params)
+        return self.db.execute_query(query, params)
+
+    def _run_on_one_connection(self) -> Dict[str, Any]:
+        results = {}
+        with self.db.get_cursor() as cursor:
+            for name, query, params, fetch in self._queries:
+                cursor.execute(query, params)
+                results[name] = cursor.fetchone() if fetch == "one" else cursor.fetchall()
+        return results
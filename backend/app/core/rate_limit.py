@@ -0,0 +1,156 @@
+import math
+import time
+import logging
+import threading
+from typing import Any, Dict, List, Tuple
+from .config import settings
+
+try:
+    import redis
+except ImportError:  # pragma: no cover - optional dependency
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+class SlidingWindowLimiter:
+    """Sliding-window rate limiter (in-process, or shared through Redis).
+
+    Each key keeps a counter for the current fixed window and the previous
+    one; the rate over the last ``window`` seconds is estimated as the
+    current count plus the previous count weighted by how much of the
+    previous window still overlaps. That is two integers per key instead of
+    a timestamp per request, and unlike plain fixed windows it does not let
+    twice the limit through around a window boundary.
+
+    With Redis the counters are shared by every worker process. A Redis
+    error falls back to the in-process counters rather than rejecting or
+    letting everything through.
+    """
+
+    KEY_PREFIX = "ratelimit:"
+
+    def __init__(self, use_redis: bool = False, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self.redis = self._connect_redis() if use_redis else None
+        # key -> [window index, count in that window, count in the window before]
+        self._windows: Dict[str, List[int]] = {}
+        self._lock = threading.Lock()
+        self.allowed = 0
+        self.rejected = 0
+
+    @staticmethod
+    def _connect_redis():
+        if redis is None:
+            logger.warning("Redis rate limit store requested but the 'redis' package is not installed")
+            return None
+        try:
+            client = redis.Redis(
+                host=settings.REDIS_HOST,
+                port=settings.REDIS_PORT,
+                password=settings.REDIS_PASSWORD,
+                socket_timeout=0.5,
+                socket_connect_timeout=0.5
+            )
+            client.ping()
+            logger.info("Rate limiter Redis store connected")
+            return client
+        except Exception as e:
+            logger.warning(f"Rate limiter Redis store unavailable, limiting per process: {e}")
+            return None
+
+    @staticmethod
+    def _decide(limit: int, window: float, elapsed: float, current: int, previous: int) -> Tuple[bool, int]:
+        """(allowed, retry_after seconds) for one more hit given the window counters"""
+        weight = 1 - elapsed / window
+        if previous * weight + current + 1 <= limit:
+            return True, 0
+        if current + 1 > limit:
+            # Blocked by this window alone: wait for it to roll over
+            return False, max(1, math.ceil(window - elapsed))
+        # Wait until enough of the previous window has slid out
+        needed = window * (1 - (limit - current - 1) / previous) - elapsed
+        return False, max(1, math.ceil(needed))
+
+    def hit(self, key: str, limit: int, window: float) -> Tuple[bool, int]:
+        """Record an attempt for ``key``; returns (allowed, retry_after seconds).
+
+        Rejected attempts are not counted, so a client that backs off for
+        ``retry_after`` gets through.
+        """
+        now = time.time()
+        index = int(now // window)
+        elapsed = now - index * window
+        if self.redis is not None:
+            try:
+                allowed, retry_after = self._hit_redis(key, limit, window, index, elapsed)
+                self._count(allowed)
+                return allowed, retry_after
+            except Exception as e:
+                logger.warning(f"Redis rate limit check failed, using in-process counters: {e}")
+
+        with self._lock:
+            state = self._windows.get(key)
+            if state is None or state[0] < index - 1:
+                state = [index, 0, 0]
+            elif state[0] == index - 1:
+                state = [index, 0, state[1]]
+            allowed, retry_after = self._decide(limit, window, elapsed, state[1], state[2])
+            if allowed:
+                state[1] += 1
+            self._windows[key] = state
+            if len(self._windows) > self.max_keys:
+                self._prune(index)
+        self._count(allowed)
+        return allowed, retry_after
+
+    def _hit_redis(self, key: str, limit: int, window: float, index: int, elapsed: float) -> Tuple[bool, int]:
+        current_key = f"{self.KEY_PREFIX}{key}:{index}"
+        pipe = self.redis.pipeline()
+        pipe.incr(current_key)
+        pipe.expire(current_key, int(math.ceil(window * 2)))
+        pipe.get(f"{self.KEY_PREFIX}{key}:{index - 1}")
+        current, _, previous = pipe.execute()
+        # INCR already counted this attempt; decide on the counts before it
+        allowed, retry_after = self._decide(limit, window, elapsed, int(current) - 1, int(previous or 0))
+        if not allowed:
+            self.redis.decr(current_key)
+        return allowed, retry_after
+
+    def _prune(self, index: int):
+        """Drop keys idle for more than a full window, then the oldest if still over (caller holds the lock)"""
+        stale = [key for key, state in self._windows.items() if state[0] < index - 1]
+        for key in stale:
+            del self._windows[key]
+        overflow = len(self._windows) - self.max_keys
+        if overflow > 0:
+            for key in list(self._windows)[:overflow]:
+                del self._windows[key]
+
+    def _count(self, allowed: bool):
+        with self._lock:
+            if allowed:
+                self.allowed += 1
+            else:
+                self.rejected += 1
+
+    def reset(self, key: str, window: float):
+        """Forget the attempts recorded for ``key`` (e.g. after a successful login)"""
+        with self._lock:
+            self._windows.pop(key, None)
+        if self.redis is not None:
+            index = int(time.time() // window)
+            try:
+                self.redis.delete(f"{self.KEY_PREFIX}{key}:{index}", f"{self.KEY_PREFIX}{key}:{index - 1}")
+            except Exception as e:
+                logger.warning(f"Redis rate limit reset failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "allowed": self.allowed,
+            "rejected": self.rejected,
+            "tracked_keys": len(self._windows),
+            "redis": self.redis is not None
+        }
+
+# Global rate limiter instance
+rate_limiter = SlidingWindowLimiter(use_redis=settings.RATE_LIMIT_USE_REDIS)
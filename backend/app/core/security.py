@@ -1,15 +1,21 @@
 import jwt
 import hashlib
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
 from .config import settings
 import bcrypt
 
+logger = logging.getLogger(__name__)
+
 class Security:
     @staticmethod
     def hash_password(password: str) -> str:
-        """Hash a password using bcrypt"""
-        salt = bcrypt.gensalt()
+        """Hash a password using bcrypt (cost ``BCRYPT_ROUNDS``)"""
+        salt = bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS)
         hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
         return hashed.decode('utf-8')
     
@@ -18,6 +24,14 @@ class Security:
         """Verify a password against its hash"""
         return bcrypt.checkpw(password.encode('utf-8'), hashed_password.encode('utf-8'))
     
+    @staticmethod
+    def password_needs_rehash(hashed_password: str) -> bool:
+        """True when a bcrypt hash was made with a cost other than ``BCRYPT_ROUNDS``"""
+        try:
+            return int(hashed_password.split('$')[2]) != settings.BCRYPT_ROUNDS
+        except (IndexError, ValueError):
+            return True
+    
     @staticmethod
     def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
         """Create a JWT access token"""
@@ -51,5 +65,126 @@ class Security:
     def hash_file_content(content: bytes) -> str:
         """Create a hash of file content for duplicate detection"""
         return hashlib.md5(content).hexdigest()
+    
+    @staticmethod
+    def hash_file_stream(stream, chunk_size: int = 1024 * 1024) -> str:
+        """Same digest as hash_file_content, computed over a stream without loading it whole"""
+        digest = hashlib.md5()
+        for block in iter(lambda: stream.read(chunk_size), b''):
+            digest.update(block)
+        return digest.hexdigest()
+
+security = Security()
+
+class PasswordHasherBusy(Exception):
+    """Raised when the password hashing queue is full or a request waited too long"""
+    pass
+
+class PasswordHasher:
+    """Runs bcrypt in a small dedicated thread pool.
+
+    bcrypt releases the GIL, so at most ``max_workers`` cores are spent on
+    password hashing however many logins arrive at once; request threads wait
+    on the pool instead of competing for CPU with unrelated requests. At most
+    ``max_queue`` operations may be waiting beyond the running ones, and a
+    caller waits at most ``timeout`` seconds; either limit raises
+    ``PasswordHasherBusy`` so the handler can answer 503 instead of piling up.
+    """
+
+    def __init__(self, max_workers: int = 2, max_queue: int = 32, timeout: float = 10):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="password-hash")
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.metrics = {
+            "hash_count": 0, "hash_seconds": 0.0, "hash_max_seconds": 0.0,
+            "verify_count": 0, "verify_seconds": 0.0, "verify_max_seconds": 0.0,
+            "wait_seconds": 0.0, "rehashed": 0, "rejected": 0, "timeouts": 0
+        }
+
+    def _record(self, operation: str, seconds: float, waited: float):
+        with self._lock:
+            self.metrics[f"{operation}_count"] += 1
+            self.metrics[f"{operation}_seconds"] += seconds
+            self.metrics[f"{operation}_max_seconds"] = max(self.metrics[f"{operation}_max_seconds"], seconds)
+            self.metrics["wait_seconds"] += waited
+
+    def _run(self, operation: str, func, *args):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.metrics["rejected"] += 1
+            raise PasswordHasherBusy("Password hashing queue is full")
+        submitted = time.perf_counter()
+
+        def task():
+            started = time.perf_counter()
+            try:
+                return func(*args)
+            finally:
+                finished = time.perf_counter()
+                self._record(operation, finished - started, started - submitted)
+
+        with self._lock:
+            self._pending += 1
+        try:
+            future = self.executor.submit(task)
+        except Exception:
+            self._release()
+            raise
+        future.add_done_callback(lambda _: self._release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            with self._lock:
+                self.metrics["timeouts"] += 1
+            raise PasswordHasherBusy("Password hashing timed out")
+
+    def _release(self):
+        with self._lock:
+            self._pending -= 1
+        self._slots.release()
+
+    def hash(self, password: str) -> str:
+        return self._run("hash", Security.hash_password, password)
+
+    def verify(self, password: str, hashed_password: str) -> bool:
+        return self._run("verify", Security.verify_password, password, hashed_password)
+
+    def verify_and_update(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """Verify a password; on success also return a new hash when the stored one uses an outdated cost"""
+        if not self.verify(password, hashed_password):
+            return False, None
+        if not Security.password_needs_rehash(hashed_password):
+            return True, None
+        try:
+            new_hash = self.hash(password)
+        except PasswordHasherBusy:
+            # The login itself succeeded; upgrade the hash on a later login
+            return True, None
+        with self._lock:
+            self.metrics["rehashed"] += 1
+        return True, new_hash
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            metrics = dict(self.metrics)
+            pending = self._pending
+        for operation in ("hash", "verify"):
+            count = metrics[f"{operation}_count"]
+            metrics[f"{operation}_avg_ms"] = round(metrics[f"{operation}_seconds"] / count * 1000, 2) if count else 0.0
+        operations = metrics["hash_count"] + metrics["verify_count"]
+        metrics["avg_wait_ms"] = round(metrics["wait_seconds"] / operations * 1000, 2) if operations else 0.0
+        metrics["in_flight"] = pending
+        metrics["queued"] = max(pending - self.max_workers, 0)
+        metrics["workers"] = self.max_workers
+        metrics["rounds"] = settings.BCRYPT_ROUNDS
+        return metrics
 
-security = Security()
\ No newline at end of file
+password_hasher = PasswordHasher(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE,
+    timeout=settings.PASSWORD_HASH_TIMEOUT
+)
\ No newline at end of file
@@ -1,6 +1,8 @@
+import io
 import sys
 import os
 import json
+import inspect
 import logging
 from datetime import datetime
 
@@ -9,7 +11,11 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
 
 from app.core.config import settings
 from app.core.database import get_database
+from app.core.security import password_hasher
+from app.core.async_database import run_async
 from app.api import auth, dashboard, sto, warehouse, data_input, predictions, reports
+from app.api.deps import StreamingResponse
+from app.services.prediction_jobs import prediction_job_manager
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -25,19 +31,19 @@ def handle_json_response(data, status_code=200):
 
 class MockRequest:
     """Mock request object for our API handlers"""
-    def __init__(self, method, headers, body, query_params, path_params):
+    def __init__(self, method, headers, body, query_params, path_params, remote_addr=None):
         self.method = method
         self.headers = headers
         self.body = MockBody(body)
         self.query_params = query_params
         self.path_params = path_params
+        self.remote_addr = remote_addr
 
-class MockBody:
+class MockBody(io.BytesIO):
+    """Request body as a readable stream (uploads are consumed in chunks)"""
     def __init__(self, content):
-        self.content = content.encode() if isinstance(content, str) else content
-    
-    def read(self, length):
-        return self.content[:length]
+        self.content = content.encode() if isinstance(content, str) else (content or b'')
+        super().__init__(self.content)
 
 class MockResponse:
     def __init__(self):
@@ -58,19 +64,41 @@ def create_api_handler(handler_func):
                 headers=dict(req.headers) if hasattr(req, 'headers') else {},
                 body=body,
                 query_params=dict(req.query) if hasattr(req, 'query') else {},
-                path_params=dict(req.params) if hasattr(req, 'params') else {}
+                path_params=dict(req.params) if hasattr(req, 'params') else {},
+                remote_addr=getattr(getattr(req, 'socket', None), 'remoteAddress', None)
             )
             
             mock_res = MockResponse()
             
-            # Call our handler
-            result = handler_func(mock_req, mock_res)
+            # Call our handler (async handlers run on the shared event loop)
+            if inspect.iscoroutinefunction(handler_func):
+                result = run_async(handler_func(mock_req, mock_res))
+            else:
+                result = handler_func(mock_req, mock_res)
             
             # Set response
             res.status(mock_res.status_code)
             for key, value in mock_res.headers.items():
                 res.set(key, value)
             
+            if isinstance(result, StreamingResponse):
+                # Exports: write the body as it is produced instead of building it in memory
+                for key, value in result.headers().items():
+                    res.set(key, value)
+                try:
+                    for chunk in result:
+                        res.write(chunk)
+                except Exception as e:
+                    # Headers and part of the body are already sent; abort the connection so the
+                    # client sees a failed download rather than a truncated file or an appended JSON error
+                    logger.error(f"Streaming response failed: {e}")
+                    res.destroy()
+                    return
+                finally:
+                    result.close()
+                res.end()
+                return
+            
             res.json(result)
             
         except Exception as e:
@@ -87,6 +115,7 @@ def create_api_handler(handler_func):
 register_handler = create_api_handler(auth.register)
 login_handler = create_api_handler(auth.login)
 current_user_handler = create_api_handler(auth.get_current_user_info)
+change_password_handler = create_api_handler(auth.change_password)
 
 # STO endpoints will be created similarly
 # Dashboard endpoints will be created similarly  
@@ -99,12 +128,14 @@ def setup_backend_routes(app):
     app.post("/api/auth/register", register_handler)
     app.post("/api/auth/login", login_handler)
     app.get("/api/auth/me", current_user_handler)
+    app.post("/api/auth/change-password", change_password_handler)
     
     # Health check
     app.get("/api/health", lambda req, res: res.json({
         "status": "healthy",
         "timestamp": datetime.utcnow().isoformat(),
-        "version": "1.0.0"
+        "version": "1.0.0",
+        "password_hashing": password_hasher.stats()
     }))
     
     # Database status
@@ -114,6 +145,7 @@ def setup_backend_routes(app):
             result = db.execute_one("SELECT 1 as status")
             res.json({
                 "database": "connected" if result else "error",
+                "pool": db.pool_stats(),
                 "timestamp": datetime.utcnow().isoformat()
             })
         except Exception as e:
@@ -146,6 +178,8 @@ def initialize_database():
             logger.info("Run: psql -h localhost -U postgres -d postgres -f backend/init.sql")
         else:
             logger.info("Database tables verified successfully")
+            # Fails jobs whose process stopped sending heartbeats (e.g. died before a restart)
+            prediction_job_manager.start_heartbeat()
             
     except Exception as e:
         logger.error(f"Database initialization check failed: {e}")
@@ -0,0 +1,176 @@
+# Data access for the prediction engine - loads model inputs with set-based queries
+import logging
+import uuid
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+import numpy as np
+from ..core.config import settings
+from ..core.database import Database, get_database
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class PredictionInputs:
+    """Model inputs for a set of STOs in array form.
+
+    Row ``i`` of ``sales_matrix`` and of every ``static_features`` array belongs
+    to ``sto_ids[i]``; column ``j`` of ``sales_matrix`` is ``dates[j]``. Days
+    without a ``sales_harian`` row are NaN.
+    """
+    sto_ids: List[str]
+    dates: np.ndarray
+    sales_matrix: np.ndarray
+    static_features: Dict[str, np.ndarray] = field(default_factory=dict)
+    metadata: Dict[str, Dict] = field(default_factory=dict)
+
+    def index_of(self, sto_id: str) -> int:
+        return self.sto_ids.index(sto_id)
+
+class PredictionDataLoader:
+    """Loads ``sales_harian``, ``arsitektur_jaringan`` and ``metadata_sto``.
+
+    Every load runs a fixed number of queries regardless of how many STOs are
+    requested: one for the STO list (only when loading all STOs), one for
+    sales, one for architecture and one for metadata.
+    """
+
+    def __init__(self, db: Optional[Database] = None, fetch_size: Optional[int] = None):
+        self.db = db or get_database()
+        self.fetch_size = fetch_size or settings.DATA_LOADER_FETCH_SIZE
+
+    def resolve_sto_ids(self, sto_ids: Optional[Sequence[str]] = None) -> List[str]:
+        """Requested STOs in stable order, or every active STO when None"""
+        if sto_ids is not None:
+            return sorted(set(sto_ids))
+        rows = self.db.execute_query("SELECT sto_id FROM sto WHERE status = 'Active' ORDER BY sto_id")
+        return [row[0] for row in rows]
+
+    def _window(self, history_days: Optional[int], end_date: Optional[date]) -> Tuple[date, date]:
+        end_date = end_date or date.today()
+        history_days = history_days or settings.PREDICTION_HISTORY_DAYS
+        return end_date - timedelta(days=history_days - 1), end_date
+
+    def load(self, sto_ids: Optional[Sequence[str]] = None, history_days: Optional[int] = None,
+             end_date: Optional[date] = None) -> PredictionInputs:
+        """Load the full history window for the given STOs (all active STOs when None)"""
+        sto_ids = self.resolve_sto_ids(sto_ids)
+        start_date, end_date = self._window(history_days, end_date)
+        dates = np.arange(np.datetime64(start_date), np.datetime64(end_date) + 1)
+        sales_matrix = self._load_sales(sto_ids, start_date, end_date)
+        static_features, metadata = self.load_static(sto_ids)
+        return PredictionInputs(
+            sto_ids=sto_ids,
+            dates=dates,
+            sales_matrix=sales_matrix,
+            static_features=static_features,
+            metadata=metadata
+        )
+
+    def load_sales(self, sto_ids: Optional[Sequence[str]] = None, history_days: Optional[int] = None,
+                   end_date: Optional[date] = None) -> Tuple[List[str], np.ndarray, np.ndarray]:
+        """Sales history only: ``(sto_ids, dates, sales_matrix)`` without the architecture/metadata queries"""
+        sto_ids = self.resolve_sto_ids(sto_ids)
+        start_date, end_date = self._window(history_days, end_date)
+        dates = np.arange(np.datetime64(start_date), np.datetime64(end_date) + 1)
+        return sto_ids, dates, self._load_sales(sto_ids, start_date, end_date)
+
+    def iter_sales_windows(self, sto_ids: Optional[Sequence[str]] = None, history_days: Optional[int] = None,
+                           end_date: Optional[date] = None,
+                           window_days: int = 90) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """Streaming mode: yield ``(dates, sales_matrix)`` one date window at a time, oldest first.
+
+        Memory is bounded by one window rather than the whole history, so very
+        long histories can be folded into running statistics chunk by chunk.
+        """
+        sto_ids = self.resolve_sto_ids(sto_ids)
+        start_date, end_date = self._window(history_days, end_date)
+        window_start = start_date
+        while window_start <= end_date:
+            window_end = min(window_start + timedelta(days=window_days - 1), end_date)
+            dates = np.arange(np.datetime64(window_start), np.datetime64(window_end) + 1)
+            yield dates, self._load_sales(sto_ids, window_start, window_end)
+            window_start = window_end + timedelta(days=1)
+
+    def _load_sales(self, sto_ids: List[str], start_date: date, end_date: date) -> np.ndarray:
+        """Fill an (n_sto x n_days) matrix straight from a server-side cursor"""
+        n_days = (end_date - start_date).days + 1
+        matrix = np.full((len(sto_ids), n_days), np.nan)
+        if not sto_ids:
+            return matrix
+        row_of = {sto_id: i for i, sto_id in enumerate(sto_ids)}
+
+        with self.db.get_connection() as conn:
+            try:
+                # Named cursor streams rows in fetch_size batches instead of materialising them all
+                with conn.cursor(name=f"sales_{uuid.uuid4().hex}") as cursor:
+                    cursor.itersize = self.fetch_size
+                    cursor.execute(
+                        """SELECT sto_id, tanggal - %s, total_barang_terjual
+                           FROM sales_harian
+                           WHERE sto_id = ANY(%s) AND tanggal >= %s AND tanggal <= %s""",
+                        (start_date, list(sto_ids), start_date, end_date)
+                    )
+                    while True:
+                        rows = cursor.fetchmany(self.fetch_size)
+                        if not rows:
+                            break
+                        sto_col, day_col, value_col = zip(*rows)
+                        matrix[[row_of[s] for s in sto_col], list(day_col)] = value_col
+            finally:
+                conn.rollback()
+        return matrix
+
+    def load_static(self, sto_ids: List[str]) -> Tuple[Dict[str, np.ndarray], Dict[str, Dict]]:
+        """Architecture totals and latest metadata per STO as aligned arrays"""
+        from .models import FeatureEngineering
+
+        n = len(sto_ids)
+        defaults = FeatureEngineering.STATIC_FEATURE_DEFAULTS
+        features = {name: np.full(n, default) for name, default in defaults.items()}
+        metadata: Dict[str, Dict] = {}
+        if not sto_ids:
+            return features, metadata
+        row_of = {sto_id: i for i, sto_id in enumerate(sto_ids)}
+
+        # An STO can have several architecture rows (one per jenis_arsitektur)
+        architecture = self.db.execute_query(
+            """SELECT sto_id, SUM(kapasitas), SUM(jumlah_port),
+                      SUM(utilisasi * kapasitas) / NULLIF(SUM(kapasitas), 0)
+               FROM arsitektur_jaringan
+               WHERE sto_id = ANY(%s)
+               GROUP BY sto_id""",
+            (list(sto_ids),)
+        )
+        for sto_id, capacity, ports, utilization in architecture:
+            i = row_of[sto_id]
+            features['total_capacity'][i] = float(capacity or 0)
+            features['port_count'][i] = float(ports or 0)
+            features['utilization_rate'][i] = float(utilization or 0)
+
+        meta_rows = self.db.execute_query(
+            """SELECT DISTINCT ON (sto_id) sto_id, population_coverage, economic_index,
+                      business_density, competition_level, infrastructure_quality
+               FROM metadata_sto
+               WHERE sto_id = ANY(%s)
+               ORDER BY sto_id, updated_at DESC""",
+            (list(sto_ids),)
+        )
+        for sto_id, population, economic, density, competition, infrastructure in meta_rows:
+            i = row_of[sto_id]
+            features['population_coverage'][i] = float(population or 0)
+            features['economic_index'][i] = float(economic if economic is not None else 1.0)
+            features['business_density'][i] = FeatureEngineering._encode_categorical(density)
+            features['competition_level'][i] = FeatureEngineering._encode_categorical(competition)
+            metadata[sto_id] = {
+                'population_coverage': population,
+                'economic_index': float(economic) if economic is not None else None,
+                'business_density': density,
+                'competition_level': competition,
+                'infrastructure_quality': infrastructure
+            }
+
+        return features, metadata
+
+# Global instance
+prediction_data_loader = PredictionDataLoader()
@@ -0,0 +1,154 @@
+# Feature store - per-STO running sales statistics maintained by triggers on sales_harian
+import argparse
+import logging
+import sys
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from ..core.database import Database, get_database
+from .data_loader import PredictionDataLoader
+from .seasonality_store import SeasonalityStore, seasonality_store
+
+logger = logging.getLogger(__name__)
+
+# Day 0 of the trend regressor x; must match apply_sto_feature_stats_delta() in init.sql
+FEATURE_STATS_EPOCH = "2000-01-01"
+
+STAT_COLUMNS = ("n", "sum_y", "sum_yy", "sum_x", "sum_xx", "sum_xy")
+
+# The same sums computed from scratch; used by backfill and verify
+RAW_STATS_QUERY = f"""
+    SELECT sto_id, COUNT(*), SUM(y), SUM(y::numeric * y), SUM(x), SUM(x * x), SUM(x::numeric * y)
+    FROM (
+        SELECT sto_id, (tanggal - DATE '{FEATURE_STATS_EPOCH}')::bigint AS x,
+               total_barang_terjual::bigint AS y
+        FROM sales_harian
+    ) s
+    GROUP BY sto_id
+"""
+
+@dataclass
+class FeatureStats:
+    """Per-STO moments aligned with ``sto_ids``; see ``FeatureEngineering.sales_features_from_moments``"""
+    sto_ids: List[str]
+    count: np.ndarray
+    total: np.ndarray
+    syy: np.ndarray
+    sxx: np.ndarray
+    sxy: np.ndarray
+
+class FeatureStore:
+    """Reads ``sto_feature_stats``: count, sum, sum of squares and the regression sums per STO.
+
+    Triggers on ``sales_harian`` add each inserted row's contribution (and
+    subtract each deleted or replaced row's), so the table stays current
+    at O(1) cost per row and reading the features of any number of STOs is
+    one indexed query, independent of how long their histories are. The
+    trend regressor is the calendar day, so gaps in reporting count as
+    time passing. The co-moments are formed in NUMERIC before conversion
+    to float, which avoids the cancellation of ``n*sum(y*y) - sum(y)**2``
+    in double precision.
+    """
+
+    def __init__(self, db: Optional[Database] = None, data_loader: Optional[PredictionDataLoader] = None):
+        self.db = db or get_database()
+        self._data_loader = data_loader
+
+    @property
+    def data_loader(self) -> PredictionDataLoader:
+        if self._data_loader is None:
+            self._data_loader = PredictionDataLoader(self.db)
+        return self._data_loader
+
+    def load(self, sto_ids: Optional[Sequence[str]] = None) -> FeatureStats:
+        """Moments for the given STOs (all active STOs when None); STOs without sales get zeros"""
+        sto_ids = self.data_loader.resolve_sto_ids(sto_ids)
+        n = len(sto_ids)
+        stats = FeatureStats(sto_ids, *(np.zeros(n) for _ in range(5)))
+        if not sto_ids:
+            return stats
+        row_of = {sto_id: i for i, sto_id in enumerate(sto_ids)}
+        rows = self.db.execute_query(
+            """SELECT sto_id, n, sum_y,
+                      (n * sum_yy - sum_y::numeric * sum_y)::float8,
+                      (n::numeric * sum_xx - sum_x::numeric * sum_x)::float8,
+                      (n * sum_xy - sum_x::numeric * sum_y)::float8
+               FROM sto_feature_stats
+               WHERE sto_id = ANY(%s) AND n > 0""",
+            (list(sto_ids),)
+        )
+        for sto_id, count, total, syy, sxx, sxy in rows:
+            i = row_of[sto_id]
+            stats.count[i], stats.total[i] = count, total
+            stats.syy[i], stats.sxx[i], stats.sxy[i] = syy, sxx, sxy
+        return stats
+
+    def feature_matrix(self, sto_ids: Optional[Sequence[str]] = None,
+                       seasonality: Optional[SeasonalityStore] = None) -> Tuple[List[str], np.ndarray]:
+        """``(sto_ids, matrix)`` with columns in ``FeatureEngineering.BATCH_FEATURE_COLUMNS`` order.
+
+        The seasonality column is tomorrow's multiplier from the cached indices
+        (see ``SeasonalityStore``); the cache is read, not refreshed, here.
+        """
+        from .models import FeatureEngineering
+
+        stats = self.load(sto_ids)
+        factors = (seasonality or seasonality_store).factors(stats.sto_ids, date.today() + timedelta(days=1))
+        sales_features = FeatureEngineering.sales_features_from_moments(
+            stats.count, stats.total, stats.syy, stats.sxx, stats.sxy, factors
+        )
+        static_features, _ = self.data_loader.load_static(stats.sto_ids)
+        return stats.sto_ids, FeatureEngineering.assemble_features(len(stats.sto_ids), sales_features, static_features)
+
+    def backfill(self) -> int:
+        """Rebuild every STO's statistics from sales_harian in one transaction"""
+        with self.db.get_cursor() as cursor:
+            # Hold off concurrent sales writes so trigger deltas cannot interleave with the rebuild
+            cursor.execute("LOCK TABLE sales_harian IN SHARE MODE")
+            cursor.execute("DELETE FROM sto_feature_stats")
+            cursor.execute(f"INSERT INTO sto_feature_stats (sto_id, {', '.join(STAT_COLUMNS)}) {RAW_STATS_QUERY}")
+            count = cursor.rowcount
+        logger.info(f"Backfilled feature statistics for {count} STOs")
+        return count
+
+    def verify(self) -> List[Dict[str, Any]]:
+        """Compare the stored statistics with fresh ones; returns mismatching STOs"""
+        columns = ", ".join(STAT_COLUMNS)
+        differs = " OR ".join(f"f.{c} IS DISTINCT FROM x.{c}" for c in STAT_COLUMNS)
+        rows = self.db.execute_query(
+            f"""WITH raw (sto_id, {columns}) AS ({RAW_STATS_QUERY})
+                SELECT COALESCE(f.sto_id, x.sto_id),
+                       {", ".join(f"x.{c}" for c in STAT_COLUMNS)},
+                       {", ".join(f"f.{c}" for c in STAT_COLUMNS)}
+                FROM sto_feature_stats f FULL OUTER JOIN raw x ON f.sto_id = x.sto_id
+                WHERE {differs}"""
+        )
+        width = len(STAT_COLUMNS)
+        return [
+            {"sto_id": row[0], "expected": row[1:1 + width], "actual": row[1 + width:]}
+            for row in rows
+        ]
+
+# Global instance
+feature_store = FeatureStore()
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """CLI: python -m app.ml.feature_store {backfill,verify}"""
+    parser = argparse.ArgumentParser(description="Maintain the sto_feature_stats table")
+    parser.add_argument("command", choices=["backfill", "verify"])
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    if args.command == "backfill":
+        print(f"Backfilled feature statistics for {feature_store.backfill()} STOs")
+        return 0
+
+    mismatches = feature_store.verify()
+    print(f"{len(mismatches)} STO(s) with mismatched statistics")
+    for row in mismatches[:20]:
+        print(f"  {row['sto_id']}: expected {row['expected']}, stored {row['actual']}")
+    return 1 if mismatches else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,13 @@
 # ML components placeholder - will handle machine learning models and predictions
 import numpy as np
-from typing import Dict, List, Any, Optional
+from dataclasses import dataclass, field
+from typing import Dict, List, Any, Optional, Sequence
 from datetime import datetime, date
+from .data_loader import PredictionDataLoader
+from .feature_store import FeatureStore
+from .seasonality import seasonality_factor
+from .seasonality_store import SeasonalityStore
+from .prediction_cache import PredictionCacheStore, input_fingerprint, make_cache_key
 
 class MLModels:
     """Placeholder for ML models - XGBoost, ARIMA, Prophet etc."""
@@ -28,6 +34,19 @@ class MLModels:
             'confidence_score': np.random.uniform(0.8, 0.95)
         }
     
+    def predict_sales_batch(self, feature_matrix: np.ndarray, feature_columns: Sequence[str]) -> Dict[str, np.ndarray]:
+        """Predict sales for many STOs at once from a (n_sto x n_features) matrix"""
+        n = feature_matrix.shape[0]
+        base_prediction = feature_matrix[:, list(feature_columns).index('historical_avg')]
+        base_prediction = np.where(np.isnan(base_prediction), 4.0, base_prediction)
+        
+        return {
+            'daily_prediction': base_prediction * np.random.uniform(0.8, 1.2, n),
+            'weekly_prediction': base_prediction * 7 * np.random.uniform(0.85, 1.15, n),
+            'monthly_prediction': base_prediction * 30 * np.random.uniform(0.9, 1.1, n),
+            'confidence_score': np.random.uniform(0.8, 0.95, n)
+        }
+    
     def calculate_supply_recommendation(self, prediction: float, sto_metadata: Dict[str, Any]) -> float:
         """Calculate supply recommendation based on prediction and metadata"""
         # TODO: Implement sophisticated supply calculation
@@ -48,8 +67,8 @@ class FeatureEngineering:
             sales_values = [item['total_barang_terjual'] for item in sales_data]
             features['historical_avg'] = np.mean(sales_values)
             features['historical_std'] = np.std(sales_values)
-            features['trend'] = MLModels._calculate_trend(sales_values)
-            features['seasonality'] = MLModels._calculate_seasonality(sales_data)
+            features['trend'] = FeatureEngineering._calculate_trend(sales_values)
+            features['seasonality'] = FeatureEngineering._calculate_seasonality(sales_data)
         
         # Architecture features
         if architecture_data:
@@ -61,8 +80,8 @@ class FeatureEngineering:
         if metadata:
             features['population_coverage'] = metadata.get('population_coverage', 0)
             features['economic_index'] = metadata.get('economic_index', 1.0)
-            features['business_density'] = MLModels._encode_categorical(metadata.get('business_density', 'Medium'))
-            features['competition_level'] = MLModels._encode_categorical(metadata.get('competition_level', 'Medium'))
+            features['business_density'] = FeatureEngineering._encode_categorical(metadata.get('business_density', 'Medium'))
+            features['competition_level'] = FeatureEngineering._encode_categorical(metadata.get('competition_level', 'Medium'))
         
         # Time-based features
         now = datetime.now()
@@ -72,6 +91,120 @@ class FeatureEngineering:
         
         return features
     
+    # Column order of the matrix returned by extract_features_batch
+    BATCH_FEATURE_COLUMNS = (
+        'historical_avg', 'historical_std', 'trend', 'seasonality',
+        'total_capacity', 'utilization_rate', 'port_count',
+        'population_coverage', 'economic_index', 'business_density', 'competition_level',
+        'day_of_week', 'month', 'quarter'
+    )
+    
+    # Defaults used when an STO has no architecture/metadata row
+    STATIC_FEATURE_DEFAULTS = {
+        'total_capacity': 0.0,
+        'utilization_rate': 0.0,
+        'port_count': 0.0,
+        'population_coverage': 0.0,
+        'economic_index': 1.0,
+        'business_density': 0.5,
+        'competition_level': 0.5
+    }
+    
+    @staticmethod
+    def extract_features_batch(sales_matrix: np.ndarray, static_features: Optional[Dict[str, np.ndarray]] = None,
+                               dates: Optional[np.ndarray] = None) -> np.ndarray:
+        """Extract features for many STOs at once.
+        
+        ``sales_matrix`` is (n_sto x n_days) with NaN for days without a sales row.
+        ``static_features`` maps architecture/metadata feature names to length
+        n_sto arrays (categoricals already encoded). ``dates`` gives the day of
+        each column (default: a window ending today). Returns a float matrix with
+        columns in ``BATCH_FEATURE_COLUMNS`` order; STOs without sales history get
+        NaN sales features, mirroring the missing keys of ``extract_features``.
+        """
+        sales = np.asarray(sales_matrix, dtype=np.float64)
+        if sales.ndim != 2:
+            raise ValueError("sales_matrix must be 2-D (n_sto x n_days)")
+        n_sto, n_days = sales.shape
+        
+        observed = ~np.isnan(sales)
+        counts = observed.sum(axis=1)
+        has_sales = counts > 0
+        safe_counts = np.maximum(counts, 1)
+        values = np.where(observed, sales, 0.0)
+        
+        mean = values.sum(axis=1) / safe_counts
+        std = np.sqrt(np.maximum((np.where(observed, sales - mean[:, None], 0.0) ** 2).sum(axis=1) / safe_counts, 0.0))
+        
+        # Least-squares slope per row over the observed days; x is the position
+        # within the observed sequence, matching np.polyfit(arange(len(values)), values, 1)
+        x = np.cumsum(observed, axis=1) - 1.0
+        x_mean = np.where(observed, x, 0.0).sum(axis=1) / safe_counts
+        dx = np.where(observed, x - x_mean[:, None], 0.0)
+        dy = np.where(observed, sales - mean[:, None], 0.0)
+        sxx = (dx * dx).sum(axis=1)
+        trend = np.divide((dx * dy).sum(axis=1), sxx, out=np.zeros(n_sto), where=sxx > 0)
+        
+        # Seasonal multiplier for the day after the window (see seasonality.seasonal_indices)
+        if dates is None:
+            dates = np.arange(n_days) + (np.datetime64(date.today()) - n_days + 1)
+        seasonality = seasonality_factor(sales, dates)
+        
+        nan = np.full(n_sto, np.nan)
+        sales_features = {
+            'historical_avg': np.where(has_sales, mean, nan),
+            'historical_std': np.where(has_sales, std, nan),
+            'trend': np.where(has_sales, trend, nan),
+            'seasonality': np.where(has_sales, seasonality, nan)
+        }
+        return FeatureEngineering.assemble_features(n_sto, sales_features, static_features)
+    
+    @staticmethod
+    def sales_features_from_moments(count: np.ndarray, total: np.ndarray, syy: np.ndarray,
+                                    sxx: np.ndarray, sxy: np.ndarray,
+                                    seasonality: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+        """Sales features from per-STO sufficient statistics (see ``feature_store``).
+        
+        ``count`` and ``total`` are the number and sum of sales values; ``syy``,
+        ``sxx`` and ``sxy`` are the co-moments scaled by ``count``
+        (``n*sum(y*y) - sum(y)**2`` etc.), so mean, population std and the
+        least-squares slope need no pass over the history. ``seasonality`` is
+        the per-STO seasonal multiplier (1.0 when omitted). STOs with a zero
+        count get NaN features, like ``extract_features_batch``.
+        """
+        count = np.asarray(count, dtype=np.float64)
+        has_sales = count > 0
+        safe_counts = np.maximum(count, 1)
+        nan = np.full(len(count), np.nan)
+        mean = np.asarray(total, dtype=np.float64) / safe_counts
+        std = np.sqrt(np.maximum(np.asarray(syy, dtype=np.float64), 0.0)) / safe_counts
+        sxx = np.asarray(sxx, dtype=np.float64)
+        trend = np.divide(np.asarray(sxy, dtype=np.float64), sxx, out=np.zeros(len(count)), where=sxx > 0)
+        return {
+            'historical_avg': np.where(has_sales, mean, nan),
+            'historical_std': np.where(has_sales, std, nan),
+            'trend': np.where(has_sales, trend, nan),
+            'seasonality': np.where(has_sales, 1.0 if seasonality is None else seasonality, nan)
+        }
+    
+    @staticmethod
+    def assemble_features(n_sto: int, sales_features: Dict[str, np.ndarray],
+                          static_features: Optional[Dict[str, np.ndarray]] = None) -> np.ndarray:
+        """Combine per-STO sales features with static and time features in ``BATCH_FEATURE_COLUMNS`` order"""
+        columns = dict(sales_features)
+        
+        static_features = static_features or {}
+        for name, default in FeatureEngineering.STATIC_FEATURE_DEFAULTS.items():
+            column = static_features.get(name)
+            columns[name] = np.full(n_sto, default) if column is None else np.asarray(column, dtype=np.float64)
+        
+        now = datetime.now()
+        columns['day_of_week'] = np.full(n_sto, now.weekday(), dtype=np.float64)
+        columns['month'] = np.full(n_sto, now.month, dtype=np.float64)
+        columns['quarter'] = np.full(n_sto, (now.month - 1) // 3 + 1, dtype=np.float64)
+        
+        return np.column_stack([columns[name] for name in FeatureEngineering.BATCH_FEATURE_COLUMNS])
+    
     @staticmethod
     def _calculate_trend(sales_values: List[float]) -> float:
         """Calculate trend from sales values"""
@@ -86,9 +219,14 @@ class FeatureEngineering:
     
     @staticmethod
     def _calculate_seasonality(sales_data: List[Dict]) -> float:
-        """Calculate seasonality factor"""
-        # TODO: Implement proper seasonality calculation
-        return 1.0
+        """Seasonal multiplier for the day after the latest sale (weekly x monthly index)"""
+        days = np.array([np.datetime64(str(item['tanggal'])[:10]) for item in sales_data], dtype='datetime64[D]')
+        if not len(days):
+            return 1.0
+        first = days.min()
+        row = np.full(int((days.max() - first).astype('int64')) + 1, np.nan)
+        row[(days - first).astype('int64')] = [item['total_barang_terjual'] for item in sales_data]
+        return float(seasonality_factor(row[None, :], np.arange(len(row)) + first)[0])
     
     @staticmethod
     def _encode_categorical(value: str) -> float:
@@ -104,60 +242,180 @@ class FeatureEngineering:
         }
         return mapping.get(value, 0.5)
 
+@dataclass
+class BatchPredictionResult:
+    """Column-oriented per-STO prediction table"""
+    sto_ids: List[str]
+    prediction_type: str
+    predictions: Dict[str, np.ndarray]
+    supply_recommendation: np.ndarray
+    features: np.ndarray
+    feature_columns: Sequence[str]
+    model_version: str
+    generated_at: str = field(default_factory=lambda: datetime.utcnow().isoformat())
+    
+    def __len__(self) -> int:
+        return len(self.sto_ids)
+    
+    def to_records(self) -> List[Dict[str, Any]]:
+        """Per-STO dicts in the same shape as ``generate_predictions``"""
+        prediction_lists = {name: values.tolist() for name, values in self.predictions.items()}
+        supply = self.supply_recommendation.tolist()
+        features = self.features.tolist()
+        records = []
+        for i, sto_id in enumerate(self.sto_ids):
+            records.append({
+                'sto_id': sto_id,
+                'prediction_type': self.prediction_type,
+                'predictions': {name: values[i] for name, values in prediction_lists.items()},
+                'supply_recommendation': supply[i],
+                'features_used': {
+                    name: value for name, value in zip(self.feature_columns, features[i])
+                    if value == value  # drop NaN (missing) features
+                },
+                'model_version': self.model_version,
+                'generated_at': self.generated_at
+            })
+        return records
+
 class PredictionEngine:
     """Main prediction engine"""
     
-    def __init__(self):
+    def __init__(self, data_loader: Optional[PredictionDataLoader] = None,
+                 cache: Optional[PredictionCacheStore] = None,
+                 feature_store: Optional[FeatureStore] = None,
+                 seasonality_store: Optional[SeasonalityStore] = None):
         self.models = MLModels()
         self.feature_engineering = FeatureEngineering()
+        self._data_loader = data_loader
+        self._cache = cache
+        self._feature_store = feature_store
+        self._seasonality_store = seasonality_store
     
-    def generate_predictions(self, sto_id: str, prediction_type: str = 'daily') -> Dict[str, Any]:
+    @property
+    def data_loader(self) -> PredictionDataLoader:
+        if self._data_loader is None:
+            self._data_loader = PredictionDataLoader()
+        return self._data_loader
+    
+    @property
+    def cache(self) -> PredictionCacheStore:
+        if self._cache is None:
+            self._cache = PredictionCacheStore()
+        return self._cache
+    
+    @property
+    def feature_store(self) -> FeatureStore:
+        if self._feature_store is None:
+            self._feature_store = FeatureStore(data_loader=self.data_loader)
+        return self._feature_store
+    
+    @property
+    def seasonality_store(self) -> SeasonalityStore:
+        if self._seasonality_store is None:
+            self._seasonality_store = SeasonalityStore(data_loader=self.data_loader)
+        return self._seasonality_store
+    
+    def generate_predictions(self, sto_id: str, prediction_type: str = 'daily',
+                             history_days: Optional[int] = None) -> Dict[str, Any]:
         """Generate predictions for a specific STO"""
-        # TODO: Get real data from database
-        # For now, use mock data
+        return self.generate_prediction_records([sto_id], prediction_type, history_days)[0]
+    
+    def generate_prediction_records(self, sto_ids: Optional[Sequence[str]] = None, prediction_type: str = 'daily',
+                                    history_days: Optional[int] = None, use_cache: bool = True) -> List[Dict[str, Any]]:
+        """Per-STO prediction records, served from the prediction cache where the inputs are unchanged"""
+        inputs = self.data_loader.load(sto_ids, history_days)
+        if not use_cache:
+            return self.generate_predictions_batch(
+                inputs.sto_ids, inputs.sales_matrix, inputs.static_features, prediction_type, inputs.dates
+            ).to_records()
         
-        mock_sales_data = [
-            {'total_barang_terjual': 4, 'tanggal': '2025-01-01'},
-            {'total_barang_terjual': 5, 'tanggal': '2025-01-02'},
-            {'total_barang_terjual': 3, 'tanggal': '2025-01-03'},
+        static_names = list(FeatureEngineering.STATIC_FEATURE_DEFAULTS)
+        static_matrix = np.column_stack([inputs.static_features[name] for name in static_names]) \
+            if inputs.sto_ids else np.empty((0, len(static_names)))
+        start_date = inputs.dates[0] if len(inputs.dates) else None
+        keys = [
+            make_cache_key(
+                sto_id, prediction_type, self.models.model_version,
+                input_fingerprint(inputs.sales_matrix[i], start_date, static_matrix[i])
+            )
+            for i, sto_id in enumerate(inputs.sto_ids)
         ]
+        cached = self.cache.get_many(keys)
         
-        mock_architecture = {
-            'kapasitas': 1000,
-            'utilisasi': 75.0,
-            'jumlah_port': 50
-        }
-        
-        mock_metadata = {
-            'population_coverage': 10000,
-            'economic_index': 1.2,
-            'business_density': 'Medium',
-            'competition_level': 'Low'
-        }
+        # Only STOs whose inputs changed (or expired) go through feature extraction and the model
+        missing = [i for i, key in enumerate(keys) if key not in cached]
+        if missing:
+            result = self.generate_predictions_batch(
+                [inputs.sto_ids[i] for i in missing],
+                inputs.sales_matrix[missing],
+                {name: values[missing] for name, values in inputs.static_features.items()},
+                prediction_type,
+                inputs.dates
+            )
+            fresh = dict(zip((keys[i] for i in missing), result.to_records()))
+            self.cache.set_many(fresh)
+            cached.update(fresh)
         
-        # Extract features
-        features = self.feature_engineering.extract_features(
-            sto_id, mock_sales_data, mock_architecture, mock_metadata
+        return [cached[key] for key in keys]
+    
+    def generate_predictions_for_stos(self, sto_ids: Optional[Sequence[str]] = None, prediction_type: str = 'daily',
+                                      history_days: Optional[int] = None) -> 'BatchPredictionResult':
+        """Load inputs for the given STOs (all active STOs when None) and predict them in one batch"""
+        inputs = self.data_loader.load(sto_ids, history_days)
+        return self.generate_predictions_batch(
+            inputs.sto_ids, inputs.sales_matrix, inputs.static_features, prediction_type, inputs.dates
         )
+
+    def generate_predictions_batch(self, sto_ids: Sequence[str], sales_matrix: np.ndarray,
+                                   static_features: Optional[Dict[str, np.ndarray]] = None,
+                                   prediction_type: str = 'daily',
+                                   dates: Optional[np.ndarray] = None) -> BatchPredictionResult:
+        """Generate predictions for many STOs in one vectorized pass.
+        
+        Row ``i`` of ``sales_matrix`` (n_sto x n_days, NaN for missing days) and
+        of every ``static_features`` array belongs to ``sto_ids[i]``; ``dates``
+        gives the day of each column (default: a window ending today).
+        """
+        sales_matrix = np.asarray(sales_matrix, dtype=np.float64)
+        if sales_matrix.shape[0] != len(sto_ids):
+            raise ValueError("sales_matrix must have one row per STO")
+        
+        features = self.feature_engineering.extract_features_batch(sales_matrix, static_features, dates)
+        return self._predict_features(sto_ids, features, prediction_type)
+    
+    def generate_predictions_from_feature_store(self, sto_ids: Optional[Sequence[str]] = None,
+                                                prediction_type: str = 'daily') -> BatchPredictionResult:
+        """Predict from the running statistics in ``sto_feature_stats`` instead of loading sales history.
+        
+        Sales features cover each STO's whole history rather than the
+        ``PREDICTION_HISTORY_DAYS`` window, and the trend is per calendar day.
+        Seasonality is read from the ``sto_seasonality`` cache, which is
+        refreshed out of band (``python -m app.ml.seasonality_store refresh``);
+        STOs without cached indices get a neutral factor.
+        """
+        sto_ids, features = self.feature_store.feature_matrix(sto_ids, self.seasonality_store)
+        return self._predict_features(sto_ids, features, prediction_type)
+    
+    def _predict_features(self, sto_ids: Sequence[str], features: np.ndarray,
+                          prediction_type: str) -> BatchPredictionResult:
+        columns = self.feature_engineering.BATCH_FEATURE_COLUMNS
         
-        # Generate prediction
-        prediction_result = self.models.predict_sales(sto_id, features)
+        predictions = self.models.predict_sales_batch(features, columns)
         
-        # Calculate supply recommendation
-        daily_prediction = prediction_result['daily_prediction']
         supply_recommendation = self.models.calculate_supply_recommendation(
-            daily_prediction, mock_metadata
+            predictions['daily_prediction'], {}
         )
         
-        return {
-            'sto_id': sto_id,
-            'prediction_type': prediction_type,
-            'predictions': prediction_result,
-            'supply_recommendation': supply_recommendation,
-            'features_used': features,
-            'model_version': self.models.model_version,
-            'generated_at': datetime.utcnow().isoformat()
-        }
+        return BatchPredictionResult(
+            sto_ids=list(sto_ids),
+            prediction_type=prediction_type,
+            predictions=predictions,
+            supply_recommendation=supply_recommendation,
+            features=features,
+            feature_columns=columns,
+            model_version=self.models.model_version
+        )
 
 # Global instance
 prediction_engine = PredictionEngine()
\ No newline at end of file
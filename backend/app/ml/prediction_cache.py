@@ -0,0 +1,150 @@
+# Two-tier prediction cache: in-process LRU in front of the predictions_cache table
+import hashlib
+import json
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence
+import numpy as np
+from psycopg2.extras import execute_values
+from ..core.cache import LRUCache, MISSING
+from ..core.config import settings
+from ..core.database import Database, get_database
+from ..models.predictions import PredictionCache
+
+logger = logging.getLogger(__name__)
+
+def input_fingerprint(sales_row: np.ndarray, start_date: Any, static_row: Sequence[float]) -> str:
+    """Stable digest of one STO's model inputs (sales window and static features)"""
+    digest = hashlib.sha1()
+    digest.update(str(start_date).encode('utf-8'))
+    digest.update(np.ascontiguousarray(sales_row, dtype=np.float64).tobytes())
+    digest.update(np.asarray(static_row, dtype=np.float64).tobytes())
+    return digest.hexdigest()
+
+def make_cache_key(sto_id: str, prediction_type: str, model_version: str, fingerprint: str) -> str:
+    """Cache key: STO, prediction type, model version and input fingerprint"""
+    return f"pred:{sto_id}:{prediction_type}:{model_version}:{fingerprint}"
+
+class PredictionCacheStore:
+    """Caches prediction records by input fingerprint.
+
+    Lookups hit the in-process LRU first, then the ``predictions_cache`` table
+    (one query for any number of keys). Entries expire after
+    ``PREDICTION_CACHE_TTL`` seconds; a background sweeper deletes expired rows.
+    """
+
+    def __init__(self, db: Optional[Database] = None, ttl: Optional[int] = None,
+                 max_entries: Optional[int] = None, sweep_interval: Optional[int] = None):
+        self.db = db or get_database()
+        self.ttl = ttl or settings.PREDICTION_CACHE_TTL
+        self.local = LRUCache(max_entries or settings.PREDICTION_CACHE_MAX_ENTRIES)
+        self.sweep_interval = sweep_interval or settings.PREDICTION_CACHE_SWEEP_INTERVAL
+        self._lock = threading.Lock()
+        self._sweeper: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.metrics = {"local_hits": 0, "db_hits": 0, "misses": 0, "writes": 0, "swept": 0, "errors": 0}
+
+    def _count(self, name: str, amount: int = 1):
+        with self._lock:
+            self.metrics[name] += amount
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+        """Return cached records for the keys that are present and unexpired"""
+        self.start_sweeper()
+        found: Dict[str, Dict[str, Any]] = {}
+        remote: List[str] = []
+        for key in keys:
+            value = self.local.get(key)
+            if value is MISSING:
+                remote.append(key)
+            else:
+                found[key] = value
+        self._count("local_hits", len(found))
+
+        if remote:
+            try:
+                rows = self.db.execute_query(
+                    """SELECT id, cache_key, prediction_data, expires_at, created_at
+                       FROM predictions_cache
+                       WHERE cache_key = ANY(%s) AND expires_at > %s""",
+                    (remote, datetime.utcnow())
+                )
+            except Exception as e:
+                logger.warning(f"Prediction cache lookup failed: {e}")
+                self._count("errors")
+                rows = []
+            now = datetime.utcnow()
+            for row in rows:
+                entry = PredictionCache.from_db_row(row)
+                found[entry.cache_key] = entry.prediction_data
+                remaining = (entry.expires_at - now).total_seconds()
+                if remaining > 0:
+                    self.local.set(entry.cache_key, entry.prediction_data, remaining)
+            self._count("db_hits", len(rows))
+
+        self._count("misses", len(keys) - len(found))
+        return found
+
+    def set_many(self, entries: Dict[str, Dict[str, Any]]):
+        """Store records in both tiers with a single bulk upsert"""
+        if not entries:
+            return
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=self.ttl)
+        for key, value in entries.items():
+            self.local.set(key, value, self.ttl)
+        try:
+            with self.db.get_cursor() as cursor:
+                execute_values(
+                    cursor,
+                    """INSERT INTO predictions_cache (cache_key, prediction_data, expires_at, created_at)
+                       VALUES %s
+                       ON CONFLICT (cache_key) DO UPDATE
+                           SET prediction_data = EXCLUDED.prediction_data,
+                               expires_at = EXCLUDED.expires_at,
+                               created_at = EXCLUDED.created_at""",
+                    [(key, json.dumps(value, default=str), expires_at, now) for key, value in entries.items()]
+                )
+            self._count("writes", len(entries))
+        except Exception as e:
+            logger.warning(f"Prediction cache write failed: {e}")
+            self._count("errors")
+
+    def sweep_expired(self) -> int:
+        """Delete expired rows from predictions_cache"""
+        with self.db.get_cursor() as cursor:
+            cursor.execute("DELETE FROM predictions_cache WHERE expires_at <= %s", (datetime.utcnow(),))
+            deleted = cursor.rowcount
+        self._count("swept", deleted)
+        return deleted
+
+    def start_sweeper(self):
+        """Start the background sweeper thread (idempotent)"""
+        if self._sweeper is not None:
+            return
+        with self._lock:
+            if self._sweeper is not None:
+                return
+            self._sweeper = threading.Thread(target=self._sweep_loop, name="prediction-cache-sweeper", daemon=True)
+            self._sweeper.start()
+
+    def stop_sweeper(self):
+        self._stop.set()
+
+    def _sweep_loop(self):
+        while not self._stop.wait(self.sweep_interval):
+            try:
+                deleted = self.sweep_expired()
+                if deleted:
+                    logger.info(f"Swept {deleted} expired prediction cache rows")
+            except Exception as e:
+                logger.warning(f"Prediction cache sweep failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            metrics = dict(self.metrics)
+        lookups = metrics["local_hits"] + metrics["db_hits"] + metrics["misses"]
+        metrics["hit_rate"] = round((metrics["local_hits"] + metrics["db_hits"]) / lookups, 4) if lookups else 0.0
+        metrics["local_entries"] = len(self.local)
+        return metrics
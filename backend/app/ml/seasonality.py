@@ -0,0 +1,173 @@
+# Seasonality - weekly and month-of-year seasonal indices for many STOs at once (no database access)
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Optional, Sequence
+import numpy as np
+
+WEEKLY_PERIOD = 7
+WEEKLY_HARMONICS = 3  # rfft bins at 1, 2 and 3 cycles per week
+
+# Weekly spectral power over average power is ~1 for noise; 3 keeps false positives well under 1%
+MIN_WEEKLY_STRENGTH = 3.0
+MIN_WEEKDAY_RATIOS = 2  # detrended observations needed per weekday
+MIN_MONTH_DAYS = 14  # observed days needed before a calendar month gets its own index
+
+@dataclass
+class SeasonalIndices:
+    """Multiplicative seasonal indices, one row per STO.
+
+    ``weekly`` is (n_sto, 7), Monday first; ``monthly`` is (n_sto, 12),
+    January first. Both average 1 over the days/months that had enough
+    data, and are exactly 1 where there was no usable signal.
+    ``weekly_strength`` is the FFT periodicity score the weekly indices
+    were gated on.
+    """
+    weekly: np.ndarray
+    monthly: np.ndarray
+    weekly_strength: np.ndarray
+
+    @classmethod
+    def neutral(cls, n_sto: int) -> 'SeasonalIndices':
+        return cls(np.ones((n_sto, WEEKLY_PERIOD)), np.ones((n_sto, 12)), np.zeros(n_sto))
+
+    def factor(self, target: date) -> np.ndarray:
+        """Expected seasonal multiplier of each STO on ``target``"""
+        return self.weekly[:, target.weekday()] * self.monthly[:, target.month - 1]
+
+    def period_factor(self, start: date, end: date) -> np.ndarray:
+        """Mean multiplier over the days ``start``..``end`` inclusive"""
+        dates = np.arange(np.datetime64(start), np.datetime64(end) + 1)
+        return (self.weekly[:, weekday_of(dates)] * self.monthly[:, month_of(dates)]).mean(axis=1)
+
+def weekday_of(dates: np.ndarray) -> np.ndarray:
+    """Monday=0 weekday of datetime64 days (1970-01-01 was a Thursday)"""
+    return (np.asarray(dates).astype('datetime64[D]').astype(np.int64) + 3) % 7
+
+def month_of(dates: np.ndarray) -> np.ndarray:
+    """January=0 calendar month of datetime64 days"""
+    return np.asarray(dates).astype('datetime64[M]').astype(np.int64) % 12
+
+def _group_sums(values: np.ndarray, usable: np.ndarray, groups: np.ndarray, n_groups: int):
+    """Per-row sums and counts of the usable values in each group of columns, as two matrix products"""
+    one_hot = (groups[:, None] == np.arange(n_groups)[None, :]).astype(np.float64)
+    return np.where(usable, values, 0.0) @ one_hot, usable.astype(np.float64) @ one_hot
+
+def _normalize(raw: np.ndarray, present: np.ndarray, min_present: int = 2) -> np.ndarray:
+    """Scale each row's present entries to mean 1; everything else (and rows with too few) becomes 1"""
+    n_present = present.sum(axis=1)
+    row_mean = np.where(present, raw, 0.0).sum(axis=1) / np.maximum(n_present, 1)
+    ok = (n_present >= min_present) & (row_mean > 0)
+    scaled = np.divide(raw, row_mean[:, None], out=np.ones_like(raw), where=present & ok[:, None])
+    return np.where(present & ok[:, None], scaled, 1.0)
+
+def _centered_level(sales: np.ndarray, observed: np.ndarray, window: int) -> np.ndarray:
+    """Centered moving mean over fully observed windows (NaN elsewhere); each window spans every weekday once"""
+    n_days = sales.shape[1]
+    zero = np.zeros((sales.shape[0], 1))
+    value_sums = np.hstack([zero, np.cumsum(np.where(observed, sales, 0.0), axis=1)])
+    counts = np.hstack([zero, np.cumsum(observed, axis=1)])
+    level = np.full(sales.shape, np.nan)
+    if n_days < window:
+        return level
+    half = window // 2
+    columns = np.arange(half, n_days - half)
+    lo, hi = columns - half, columns + half + 1
+    full = (counts[:, hi] - counts[:, lo]) == window
+    level[:, columns] = np.where(full, (value_sums[:, hi] - value_sums[:, lo]) / window, np.nan)
+    return level
+
+def weekly_strength(residual: np.ndarray) -> np.ndarray:
+    """FFT periodicity score: mean power at the weekly harmonics over mean power at all other frequencies.
+
+    ``residual`` is a gap-free, zero-mean (n_sto, n_days) matrix. Only the
+    most recent whole number of weeks is used so the weekly harmonics fall
+    exactly on rfft bins.
+    """
+    n_sto, n_days = residual.shape
+    length = (n_days // WEEKLY_PERIOD) * WEEKLY_PERIOD
+    if length < 2 * WEEKLY_PERIOD:
+        return np.zeros(n_sto)
+    power = np.abs(np.fft.rfft(residual[:, -length:], axis=1)) ** 2
+    weeks = length // WEEKLY_PERIOD
+    harmonic_bins = weeks * np.arange(1, WEEKLY_HARMONICS + 1)
+    other = np.ones(power.shape[1], dtype=bool)
+    other[0] = False
+    other[harmonic_bins] = False
+    if length % 2 == 0:
+        other[-1] = False  # Nyquist bin carries half the degrees of freedom
+    background = power[:, other].mean(axis=1)
+    return np.divide(power[:, harmonic_bins].mean(axis=1), background,
+                     out=np.zeros(n_sto), where=background > 0)
+
+def seasonal_indices(sales_matrix: np.ndarray, dates: Sequence,
+                     min_weekly_strength: float = MIN_WEEKLY_STRENGTH,
+                     min_month_days: int = MIN_MONTH_DAYS) -> SeasonalIndices:
+    """Weekly and month-of-year indices for every row of ``sales_matrix`` in one vectorized pass.
+
+    ``sales_matrix`` is (n_sto x n_days) with NaN for missing days and
+    ``dates`` gives the day of each column. Classical ratio-to-level
+    decomposition:
+
+    * weekly: each day over its centered 7-day mean, averaged per weekday.
+      The weekly pattern is kept only for STOs whose detrended series shows
+      a weekly peak in its FFT power spectrum (``weekly_strength`` at least
+      ``min_weekly_strength``), so noise is not mistaken for seasonality.
+    * monthly: each week-adjusted day over the STO's linear trend, averaged
+      per calendar month; months with fewer than ``min_month_days``
+      observations, or STOs covering fewer than two such months, stay at 1.
+    """
+    sales = np.asarray(sales_matrix, dtype=np.float64)
+    if sales.ndim != 2:
+        raise ValueError("sales_matrix must be 2-D (n_sto x n_days)")
+    n_sto, n_days = sales.shape
+    dates = np.asarray(dates).astype('datetime64[D]')
+    if len(dates) != n_days:
+        raise ValueError("dates must have one entry per sales_matrix column")
+    if n_sto == 0 or n_days == 0:
+        return SeasonalIndices.neutral(n_sto)
+
+    observed = ~np.isnan(sales)
+    counts = observed.sum(axis=1)
+    safe_counts = np.maximum(counts, 1)
+
+    # Per-row least-squares line over calendar days
+    x = np.arange(n_days, dtype=np.float64)
+    mean = np.where(observed, sales, 0.0).sum(axis=1) / safe_counts
+    x_mean = np.where(observed, x, 0.0).sum(axis=1) / safe_counts
+    dx = np.where(observed, x[None, :] - x_mean[:, None], 0.0)
+    sxx = (dx * dx).sum(axis=1)
+    slope = np.divide((dx * np.where(observed, sales - mean[:, None], 0.0)).sum(axis=1), sxx,
+                      out=np.zeros(n_sto), where=sxx > 0)
+    fitted = mean[:, None] + slope[:, None] * (x[None, :] - x_mean[:, None])
+
+    # Weekly periodicity from the detrended series, gaps filled with the trend
+    residual = np.where(observed, sales - fitted, 0.0)
+    strength = weekly_strength(residual)
+
+    weekdays = weekday_of(dates)
+    level = _centered_level(sales, observed, WEEKLY_PERIOD)
+    usable = observed & (level > 0)
+    ratio_sums, ratio_counts = _group_sums(np.divide(sales, level, out=np.zeros_like(sales), where=usable),
+                                           usable, weekdays, WEEKLY_PERIOD)
+    present = ratio_counts >= MIN_WEEKDAY_RATIOS
+    weekly = _normalize(np.divide(ratio_sums, ratio_counts, out=np.ones_like(ratio_sums), where=present),
+                        present, min_present=WEEKLY_PERIOD)
+    weekly[strength < min_weekly_strength] = 1.0
+
+    # Month-of-year effect on the week-adjusted series
+    adjusted = sales / weekly[:, weekdays]
+    usable = observed & (fitted > 0)
+    month_sums, month_counts = _group_sums(np.divide(adjusted, fitted, out=np.zeros_like(sales), where=usable),
+                                           usable, month_of(dates), 12)
+    present = month_counts >= min_month_days
+    monthly = _normalize(np.divide(month_sums, month_counts, out=np.ones_like(month_sums), where=present),
+                         present)
+
+    return SeasonalIndices(weekly=weekly, monthly=monthly, weekly_strength=strength)
+
+def seasonality_factor(sales_matrix: np.ndarray, dates: Sequence, target: Optional[date] = None) -> np.ndarray:
+    """Seasonal multiplier per STO for ``target`` (default: the day after the last column)"""
+    dates = np.asarray(dates).astype('datetime64[D]')
+    if target is None:
+        target = (dates[-1] + 1).item() if len(dates) else date.today() + timedelta(days=1)
+    return seasonal_indices(sales_matrix, dates).factor(target)
@@ -0,0 +1,151 @@
+# Seasonality store - per-STO seasonal indices cached in sto_seasonality and refreshed incrementally
+import argparse
+import logging
+import sys
+from datetime import date, datetime
+from typing import List, Optional, Sequence, Tuple
+import numpy as np
+from psycopg2.extras import execute_values
+from ..core.config import settings
+from ..core.database import Database, get_database
+from .data_loader import PredictionDataLoader
+from .seasonality import SeasonalIndices, seasonal_indices
+
+logger = logging.getLogger(__name__)
+
+class SeasonalityStore:
+    """Caches each STO's weekly and monthly indices in ``sto_seasonality``.
+
+    ``refresh`` recomputes only stale STOs: those without a cached row, and
+    those whose row is older than ``SEASONALITY_MAX_AGE_DAYS`` and whose
+    sales changed since (``sto_feature_stats.updated_at`` is bumped by the
+    sales triggers), so an STO is decomposed at most once per that many
+    days however often it reports. It is run from the CLI or a scheduled
+    job, never from the prediction path, which only reads the cache. Stale
+    STOs are decomposed ``SEASONALITY_REFRESH_BATCH_SIZE`` at a time in one
+    vectorized pass each, and ``avg_sales.seasonality_factor`` of the
+    refreshed STOs is updated in the same transaction.
+    """
+
+    def __init__(self, db: Optional[Database] = None, data_loader: Optional[PredictionDataLoader] = None,
+                 batch_size: Optional[int] = None):
+        self.db = db or get_database()
+        self._data_loader = data_loader
+        self.batch_size = batch_size or settings.SEASONALITY_REFRESH_BATCH_SIZE
+
+    @property
+    def data_loader(self) -> PredictionDataLoader:
+        if self._data_loader is None:
+            self._data_loader = PredictionDataLoader(self.db)
+        return self._data_loader
+
+    def stale(self, sto_ids: Optional[Sequence[str]] = None, force: bool = False) -> List[Tuple[str, datetime]]:
+        """``(sto_id, sales version)`` of active STOs with sales whose cached indices need recomputing"""
+        filter_sql = " AND f.sto_id = ANY(%s)" if sto_ids is not None else ""
+        filter_params = (list(sto_ids),) if sto_ids is not None else ()
+        stale_sql = "" if force else """
+                 AND (z.sto_id IS NULL
+                      OR (z.computed_on < CURRENT_DATE - %s
+                          AND z.source_updated_at IS DISTINCT FROM f.updated_at))"""
+        stale_params = () if force else (settings.SEASONALITY_MAX_AGE_DAYS,)
+        rows = self.db.execute_query(
+            f"""SELECT f.sto_id, f.updated_at
+                FROM sto_feature_stats f
+                JOIN sto s ON s.sto_id = f.sto_id AND s.status = 'Active'
+                LEFT JOIN sto_seasonality z ON z.sto_id = f.sto_id
+                WHERE f.n > 0{filter_sql}{stale_sql}
+                ORDER BY f.sto_id""",
+            filter_params + stale_params
+        )
+        return [(row[0], row[1]) for row in rows]
+
+    def refresh(self, sto_ids: Optional[Sequence[str]] = None, force: bool = False,
+                history_days: Optional[int] = None) -> int:
+        """Recompute stale (or, with ``force``, all) STOs; returns how many were written"""
+        targets = self.stale(sto_ids, force)
+        end_date = date.today()
+        written = 0
+        for offset in range(0, len(targets), self.batch_size):
+            chunk = dict(targets[offset:offset + self.batch_size])
+            ids, dates, sales = self.data_loader.load_sales(list(chunk), history_days, end_date)
+            indices = seasonal_indices(sales, dates, min_weekly_strength=settings.SEASONALITY_MIN_WEEKLY_STRENGTH)
+            rows = [
+                (sto_id, indices.weekly[i].tolist(), indices.monthly[i].tolist(),
+                 float(indices.weekly_strength[i]), end_date, chunk[sto_id])
+                for i, sto_id in enumerate(ids)
+            ]
+            with self.db.get_cursor() as cursor:
+                execute_values(
+                    cursor,
+                    """INSERT INTO sto_seasonality (sto_id, weekly_index, monthly_index, weekly_strength,
+                                                    computed_on, source_updated_at)
+                       VALUES %s
+                       ON CONFLICT (sto_id) DO UPDATE
+                           SET weekly_index = EXCLUDED.weekly_index,
+                               monthly_index = EXCLUDED.monthly_index,
+                               weekly_strength = EXCLUDED.weekly_strength,
+                               computed_on = EXCLUDED.computed_on,
+                               source_updated_at = EXCLUDED.source_updated_at,
+                               updated_at = CURRENT_TIMESTAMP""",
+                    rows,
+                    template="(%s, %s::real[], %s::real[], %s, %s, %s)",
+                    page_size=len(rows)
+                )
+                # Each avg_sales row gets the mean seasonal multiplier over its own period
+                cursor.execute(
+                    """UPDATE avg_sales a
+                       SET seasonality_factor = f.factor, updated_at = CURRENT_TIMESTAMP
+                       FROM (
+                           SELECT a.id, ROUND(AVG(z.weekly_index[EXTRACT(ISODOW FROM d)::int]
+                                                  * z.monthly_index[EXTRACT(MONTH FROM d)::int])::numeric, 2) AS factor
+                           FROM avg_sales a
+                           JOIN sto_seasonality z ON z.sto_id = a.sto_id
+                           CROSS JOIN LATERAL generate_series(a.period_start, a.period_end, INTERVAL '1 day') d
+                           WHERE a.sto_id = ANY(%s)
+                           GROUP BY a.id
+                       ) f
+                       WHERE a.id = f.id AND a.seasonality_factor IS DISTINCT FROM f.factor""",
+                    (ids,)
+                )
+            written += len(rows)
+        if targets:
+            logger.info(f"Refreshed seasonal indices for {written} STOs")
+        return written
+
+    def load(self, sto_ids: Sequence[str]) -> SeasonalIndices:
+        """Cached indices aligned with ``sto_ids``; STOs without a cached row are neutral"""
+        indices = SeasonalIndices.neutral(len(sto_ids))
+        if not sto_ids:
+            return indices
+        row_of = {sto_id: i for i, sto_id in enumerate(sto_ids)}
+        rows = self.db.execute_query(
+            """SELECT sto_id, weekly_index, monthly_index, weekly_strength
+               FROM sto_seasonality WHERE sto_id = ANY(%s)""",
+            (list(sto_ids),)
+        )
+        for sto_id, weekly, monthly, strength in rows:
+            i = row_of[sto_id]
+            indices.weekly[i], indices.monthly[i], indices.weekly_strength[i] = weekly, monthly, strength
+        return indices
+
+    def factors(self, sto_ids: Sequence[str], target: date) -> np.ndarray:
+        """Cached seasonal multiplier of each STO on ``target``"""
+        return self.load(sto_ids).factor(target)
+
+# Global instance
+seasonality_store = SeasonalityStore()
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """CLI: python -m app.ml.seasonality_store refresh [--force] [--sto STO_ID ...]"""
+    parser = argparse.ArgumentParser(description="Maintain the sto_seasonality cache")
+    parser.add_argument("command", choices=["refresh"])
+    parser.add_argument("--force", action="store_true", help="recompute every STO, not only stale ones")
+    parser.add_argument("--sto", action="append", dest="sto_ids", help="limit to these STOs (repeatable)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    print(f"Refreshed seasonal indices for {seasonality_store.refresh(args.sto_ids, args.force)} STOs")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
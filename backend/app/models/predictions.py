@@ -205,4 +205,56 @@ class FinalPemodelan:
             "action_required": self.action_required,
             "model_accuracy": self.model_accuracy,
             "last_updated": self.last_updated.isoformat() if self.last_updated else None
-        }
\ No newline at end of file
+        }
+
+@dataclass
+class PredictionJob:
+    id: Optional[int] = None
+    job_id: str = ""
+    sto_ids: Optional[list] = None  # None means every active STO
+    prediction_period: str = ""  # 'daily', 'weekly', 'monthly'
+    status: str = ""  # 'queued', 'running', 'completed', 'failed'
+    total: int = 0
+    processed: int = 0
+    written: int = 0
+    error: Optional[str] = None
+    created_by: Optional[int] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    
+    @classmethod
+    def from_db_row(cls, row: tuple) -> 'PredictionJob':
+        if not row:
+            return None
+        return cls(
+            id=row[0],
+            job_id=row[1],
+            sto_ids=row[2],
+            prediction_period=row[3],
+            status=row[4],
+            total=row[5],
+            processed=row[6],
+            written=row[7],
+            error=row[8],
+            created_by=row[9],
+            created_at=row[10],
+            started_at=row[11],
+            finished_at=row[12]
+        )
+    
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.job_id,
+            "sto_ids": self.sto_ids,
+            "prediction_period": self.prediction_period,
+            "status": self.status,
+            "total": self.total,
+            "processed": self.processed,
+            "written": self.written,
+            "progress": round(self.processed / self.total, 4) if self.total else (1.0 if self.status == "completed" else 0.0),
+            "error": self.error,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None
+        }
@@ -0,0 +1,55 @@
+from datetime import datetime
+from typing import Optional, Dict, Any
+from dataclasses import dataclass
+
+@dataclass
+class ReportArtifact:
+    id: Optional[int] = None
+    report_id: str = ""
+    artifact_key: str = ""
+    template: str = ""
+    params: Dict[str, Any] = None
+    data_version: str = ""
+    status: str = ""  # 'queued', 'running', 'completed', 'failed'
+    content: Dict[str, Any] = None
+    error: Optional[str] = None
+    created_by: Optional[int] = None
+    created_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    expires_at: Optional[datetime] = None
+    
+    @classmethod
+    def from_db_row(cls, row: tuple) -> 'ReportArtifact':
+        if not row:
+            return None
+        return cls(
+            id=row[0],
+            report_id=row[1],
+            artifact_key=row[2],
+            template=row[3],
+            params=row[4],
+            data_version=row[5],
+            status=row[6],
+            content=row[7],
+            error=row[8],
+            created_by=row[9],
+            created_at=row[10],
+            finished_at=row[11],
+            expires_at=row[12]
+        )
+    
+    def to_dict(self, include_content: bool = True) -> dict:
+        result = {
+            "report_id": self.report_id,
+            "template": self.template,
+            "params": self.params,
+            "data_version": self.data_version,
+            "status": self.status,
+            "error": self.error,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "expires_at": self.expires_at.isoformat() if self.expires_at else None
+        }
+        if include_content:
+            result["content"] = self.content
+        return result
@@ -0,0 +1,52 @@
+from datetime import datetime
+from typing import Optional, Dict, Any
+from dataclasses import dataclass
+
+@dataclass
+class UploadRecord:
+    id: Optional[int] = None
+    upload_id: str = ""
+    upload_type: str = ""  # 'sales', 'architecture', 'metadata'
+    filename: str = ""
+    file_hash: Optional[str] = None
+    status: str = ""  # 'receiving', 'processing', 'completed', 'failed'
+    total_bytes: Optional[int] = None
+    bytes_received: int = 0
+    report: Dict[str, Any] = None
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    
+    @classmethod
+    def from_db_row(cls, row: tuple) -> 'UploadRecord':
+        if not row:
+            return None
+        return cls(
+            id=row[0],
+            upload_id=row[1],
+            upload_type=row[2],
+            filename=row[3],
+            file_hash=row[4],
+            status=row[5],
+            total_bytes=row[6],
+            bytes_received=row[7],
+            report=row[8],
+            error=row[9],
+            created_at=row[10],
+            updated_at=row[11]
+        )
+    
+    def to_dict(self) -> dict:
+        return {
+            "upload_id": self.upload_id,
+            "upload_type": self.upload_type,
+            "filename": self.filename,
+            "file_hash": self.file_hash,
+            "status": self.status,
+            "total_bytes": self.total_bytes,
+            "bytes_received": self.bytes_received,
+            "report": self.report,
+            "error": self.error,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None
+        }
@@ -18,6 +18,8 @@ class Warehouse:
     status: str = "Active"  # Active, Inactive, Maintenance
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
     
     @classmethod
     def from_db_row(cls, row: tuple) -> 'Warehouse':
@@ -38,7 +40,9 @@ class Warehouse:
             contact_phone=row[10],
             status=row[11],
             created_at=row[12],
-            updated_at=row[13]
+            updated_at=row[13],
+            latitude=float(row[14]) if len(row) > 14 and row[14] is not None else None,
+            longitude=float(row[15]) if len(row) > 15 and row[15] is not None else None
         )
     
     def to_dict(self) -> dict:
@@ -56,6 +60,8 @@ class Warehouse:
             "manager_name": self.manager_name,
             "contact_phone": self.contact_phone,
             "status": self.status,
+            "latitude": self.latitude,
+            "longitude": self.longitude,
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None
         }
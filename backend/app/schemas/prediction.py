@@ -0,0 +1,22 @@
+from typing import Optional, List
+from dataclasses import dataclass
+
+PREDICTION_PERIODS = ("daily", "weekly", "monthly")
+
+@dataclass
+class PredictionJobCreate:
+    sto_ids: Optional[List[str]] = None  # None (or "all" in the request) means every active STO
+    period: str = "daily"
+    
+    def validate(self) -> tuple[bool, str]:
+        """Validate batch prediction request"""
+        if self.period not in PREDICTION_PERIODS:
+            return False, f"Period must be one of: {', '.join(PREDICTION_PERIODS)}"
+        
+        if self.sto_ids is not None:
+            if not isinstance(self.sto_ids, list) or not self.sto_ids:
+                return False, "sto_ids must be a non-empty list or \"all\""
+            if not all(isinstance(s, str) and s.strip() for s in self.sto_ids):
+                return False, "sto_ids must contain STO ID strings"
+        
+        return True, ""
@@ -196,6 +196,8 @@ class STOListQuery:
     search: Optional[str] = None
     region: Optional[str] = None
     status: Optional[str] = None
+    cursor: Optional[str] = None  # keyset pagination token; None selects page/limit mode
+    total: str = "exact"  # exact, estimate, none
     
     def validate(self) -> tuple[bool, str]:
         """Validate query parameters"""
@@ -205,4 +207,7 @@ class STOListQuery:
         if self.limit < 1 or self.limit > 100:
             return False, "Limit must be between 1 and 100"
         
+        if self.total not in ["exact", "estimate", "none"]:
+            return False, "Total must be 'exact', 'estimate' or 'none'"
+        
         return True, ""
\ No newline at end of file
@@ -39,6 +39,21 @@ class UserLogin:
         
         return True, ""
 
+@dataclass
+class PasswordChange:
+    current_password: str
+    new_password: str
+    
+    def validate(self) -> tuple[bool, str]:
+        """Validate password change data"""
+        if not self.current_password:
+            return False, "Current password is required"
+        
+        if not self.new_password or len(self.new_password) < 6:
+            return False, "Password must be at least 6 characters long"
+        
+        return True, ""
+
 @dataclass
 class UserResponse:
     id: int
@@ -1,6 +1,16 @@
 from typing import Optional
 from dataclasses import dataclass
 
+def validate_coordinates(latitude: Optional[float], longitude: Optional[float]) -> tuple[bool, str]:
+    """Validate an optional latitude/longitude pair"""
+    if latitude is not None and not -90 <= latitude <= 90:
+        return False, "Latitude must be between -90 and 90"
+    
+    if longitude is not None and not -180 <= longitude <= 180:
+        return False, "Longitude must be between -180 and 180"
+    
+    return True, ""
+
 @dataclass
 class WarehouseCreate:
     warehouse_id: str
@@ -10,6 +20,8 @@ class WarehouseCreate:
     capacity: int
     manager_name: Optional[str] = None
     contact_phone: Optional[str] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
     
     def validate(self) -> tuple[bool, str]:
         """Validate warehouse creation data"""
@@ -28,7 +40,7 @@ class WarehouseCreate:
         if self.capacity < 0:
             return False, "Capacity cannot be negative"
         
-        return True, ""
+        return validate_coordinates(self.latitude, self.longitude)
 
 @dataclass
 class WarehouseUpdate:
@@ -41,6 +53,8 @@ class WarehouseUpdate:
     manager_name: Optional[str] = None
     contact_phone: Optional[str] = None
     status: Optional[str] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
     
     def validate(self) -> tuple[bool, str]:
         """Validate warehouse update data"""
@@ -56,7 +70,7 @@ class WarehouseUpdate:
         if self.status and self.status not in ["Active", "Inactive", "Maintenance"]:
             return False, "Status must be 'Active', 'Inactive', or 'Maintenance'"
         
-        return True, ""
+        return validate_coordinates(self.latitude, self.longitude)
 
 @dataclass
 class WarehouseResponse:
@@ -109,6 +123,8 @@ class WarehouseListQuery:
     search: Optional[str] = None
     region: Optional[str] = None
     status: Optional[str] = None
+    cursor: Optional[str] = None  # keyset pagination token; None selects page/limit mode
+    total: str = "exact"  # exact, estimate, none
     
     def validate(self) -> tuple[bool, str]:
         """Validate query parameters"""
@@ -118,4 +134,7 @@ class WarehouseListQuery:
         if self.limit < 1 or self.limit > 100:
             return False, "Limit must be between 1 and 100"
         
+        if self.total not in ["exact", "estimate", "none"]:
+            return False, "Total must be 'exact', 'estimate' or 'none'"
+        
         return True, ""
\ No newline at end of file
@@ -0,0 +1,131 @@
+# Allocation service - fleet-wide supply allocation proposals from predictions and warehouse stock
+import logging
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from ..core.config import settings
+from ..core.database import Database, get_database
+from ..core.query_batch import QueryBatch
+from .allocation_solver import AllocationResult, candidate_arcs, haversine_km, solve_allocation
+from .reservation_service import ReservationBatch, ReservationRequest, reservation_engine
+
+logger = logging.getLogger(__name__)
+
+class AllocationService:
+    """Proposes supply_warehouse rows that cover predicted demand at minimum distance.
+
+    Demand per STO is ``final_pemodelan.supply_recommendation`` for the
+    period, less what is already Pending or In Transit to it; supply per
+    warehouse is ``current_stock - reserved_stock`` of active warehouses.
+    Distances are great-circle km from coordinates; a pair where either side
+    has no coordinates costs ``ALLOCATION_UNKNOWN_DISTANCE_KM`` (half of that
+    within the same region). Unmet demand costs
+    ``ALLOCATION_SHORTFALL_PENALTY_KM`` per unit, so stock is always shipped
+    when any allowed warehouse has it.
+    """
+
+    def __init__(self, db: Optional[Database] = None):
+        self.db = db or get_database()
+
+    def load(self, period: str, region: Optional[str] = None) -> Dict[str, Any]:
+        region_sql = " AND s.region = %s" if region else ""
+        region_params = (region,) if region else ()
+        batch = QueryBatch(self.db)
+        batch.add(
+            "demand",
+            f"""SELECT s.sto_id, s.region, s.latitude, s.longitude,
+                       GREATEST(CEIL(fp.supply_recommendation) - COALESCE(pending.quantity, 0), 0)
+                FROM final_pemodelan fp
+                JOIN sto s ON s.sto_id = fp.sto_id
+                LEFT JOIN (
+                    SELECT sto_id, SUM(quantity_supplied) as quantity
+                    FROM supply_warehouse WHERE status IN ('Pending', 'In Transit')
+                    GROUP BY sto_id
+                ) pending ON pending.sto_id = s.sto_id
+                WHERE fp.prediction_period = %s AND s.status = 'Active'{region_sql}
+                ORDER BY s.sto_id""",
+            (period,) + region_params
+        )
+        batch.add(
+            "supply",
+            """SELECT warehouse_id, region, latitude, longitude, GREATEST(current_stock - reserved_stock, 0)
+               FROM warehouse
+               WHERE status = 'Active' AND current_stock > reserved_stock
+               ORDER BY warehouse_id"""
+        )
+        return batch.run()
+
+    @staticmethod
+    def distance_matrix(stos: List[tuple], warehouses: List[tuple]) -> np.ndarray:
+        """(n_sto, n_warehouse) km, with the unknown-distance fallback where coordinates are missing"""
+        def coords(rows):
+            lat = np.array([r[2] if r[2] is not None else np.nan for r in rows], dtype=float)
+            lon = np.array([r[3] if r[3] is not None else np.nan for r in rows], dtype=float)
+            return lat, lon
+
+        sto_lat, sto_lon = coords(stos)
+        wh_lat, wh_lon = coords(warehouses)
+        distance = haversine_km(sto_lat, sto_lon, wh_lat, wh_lon)
+        unknown = np.isnan(distance)
+        if unknown.any():
+            same_region = np.array([r[1] for r in stos])[:, None] == np.array([r[1] for r in warehouses])[None, :]
+            fallback = np.where(same_region, settings.ALLOCATION_UNKNOWN_DISTANCE_KM / 2,
+                                settings.ALLOCATION_UNKNOWN_DISTANCE_KM)
+            distance = np.where(unknown, fallback, distance)
+        return distance
+
+    def propose(self, period: str = "daily", region: Optional[str] = None,
+                max_distance_km: Optional[float] = None,
+                max_candidates: Optional[int] = None) -> AllocationResult:
+        data = self.load(period, region)
+        stos = [r for r in data["demand"] if r[4] and r[4] > 0]
+        warehouses = data["supply"]
+        sto_ids = [r[0] for r in stos]
+        warehouse_ids = [r[0] for r in warehouses]
+        demand = np.array([float(r[4]) for r in stos])
+        supply = np.array([float(r[4]) for r in warehouses])
+        if not stos or not warehouses:
+            return solve_allocation(sto_ids, demand, warehouse_ids, supply,
+                                    np.zeros((len(stos), len(warehouses))), settings.ALLOCATION_SHORTFALL_PENALTY_KM)
+
+        distance = self.distance_matrix(stos, warehouses)
+        mask = candidate_arcs(distance, max_distance_km,
+                              max_candidates or settings.ALLOCATION_MAX_CANDIDATES)
+        result = solve_allocation(sto_ids, demand, warehouse_ids, supply, distance,
+                                  settings.ALLOCATION_SHORTFALL_PENALTY_KM, mask)
+        logger.info(f"Allocation for {len(sto_ids)} STOs x {len(warehouse_ids)} warehouses: {result.summary()}")
+        return result
+
+    @staticmethod
+    def supply_rows(result: AllocationResult, supply_type: str = "Regular") -> List[Dict[str, Any]]:
+        """The proposal as supply_warehouse rows (not yet written)"""
+        return [
+            {
+                "warehouse_id": a["warehouse_id"],
+                "sto_id": a["sto_id"],
+                "quantity_supplied": a["quantity"],
+                "supply_type": supply_type,
+                "status": "Pending",
+                "distance_km": a["distance_km"],
+                "notes": f"Allocated ({result.method}, {a['distance_km']} km)"
+            }
+            for a in result.assignments
+        ]
+
+    @staticmethod
+    def commit(rows: List[Dict[str, Any]]) -> ReservationBatch:
+        """Reserve and insert proposed rows in one statement (see StockReservationEngine)"""
+        return reservation_engine.reserve([
+            ReservationRequest(
+                warehouse_id=row["warehouse_id"],
+                sto_id=row["sto_id"],
+                quantity=row["quantity_supplied"],
+                supply_type=row["supply_type"],
+                notes=row.get("notes")
+            )
+            for row in rows
+        ])
+
+# Global instance
+allocation_service = AllocationService()
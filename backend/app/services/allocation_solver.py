@@ -0,0 +1,132 @@
+# Allocation solver - min-cost assignment of warehouse stock to STO demand (no database access)
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+try:
+    from scipy.optimize import linprog
+    from scipy.sparse import coo_matrix
+except ImportError:  # pragma: no cover - optional dependency
+    linprog = None
+    coo_matrix = None
+
+EARTH_RADIUS_KM = 6371.0088
+
+def haversine_km(lat1: np.ndarray, lon1: np.ndarray, lat2: np.ndarray, lon2: np.ndarray) -> np.ndarray:
+    """Great-circle distance in km between every point of set 1 (rows) and set 2 (columns)"""
+    lat1, lon1 = np.radians(np.asarray(lat1, dtype=float))[:, None], np.radians(np.asarray(lon1, dtype=float))[:, None]
+    lat2, lon2 = np.radians(np.asarray(lat2, dtype=float))[None, :], np.radians(np.asarray(lon2, dtype=float))[None, :]
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+@dataclass
+class AllocationResult:
+    """Quantities per (STO, warehouse) arc plus the unmet demand per STO"""
+    sto_ids: List[str]
+    warehouse_ids: List[str]
+    assignments: List[Dict[str, Any]] = field(default_factory=list)
+    shortfall: Optional[np.ndarray] = None
+    demand: Optional[np.ndarray] = None
+    method: str = ""
+    solve_ms: float = 0.0
+
+    def summary(self) -> Dict[str, Any]:
+        allocated = sum(a["quantity"] for a in self.assignments)
+        unit_km = sum(a["quantity"] * a["distance_km"] for a in self.assignments if a["distance_km"] is not None)
+        return {
+            "stos": len(self.sto_ids),
+            "warehouses": len(self.warehouse_ids),
+            "total_demand": int(self.demand.sum()) if self.demand is not None else 0,
+            "allocated": int(allocated),
+            "shortfall": int(self.shortfall.sum()) if self.shortfall is not None else 0,
+            "avg_distance_km": round(unit_km / allocated, 2) if allocated else None,
+            "method": self.method,
+            "solve_ms": round(self.solve_ms, 2)
+        }
+
+def candidate_arcs(distance: np.ndarray, max_distance_km: Optional[float] = None,
+                   max_candidates: Optional[int] = None) -> np.ndarray:
+    """Boolean (n_sto, n_warehouse) mask of the arcs the solver may use.
+
+    Arcs beyond ``max_distance_km`` are dropped and each STO keeps only its
+    ``max_candidates`` nearest warehouses, which keeps the problem small
+    without changing the answer when stock is not scarce nearby.
+    """
+    mask = np.isfinite(distance)
+    if max_distance_km is not None:
+        mask &= distance <= max_distance_km
+    if max_candidates is not None and max_candidates < distance.shape[1]:
+        ranked = np.argsort(np.where(mask, distance, np.inf), axis=1)[:, :max_candidates]
+        keep = np.zeros_like(mask)
+        np.put_along_axis(keep, ranked, True, axis=1)
+        mask &= keep
+    return mask
+
+def solve_allocation(sto_ids: Sequence[str], demand: np.ndarray, warehouse_ids: Sequence[str],
+                     supply: np.ndarray, distance: np.ndarray, shortfall_penalty: float,
+                     mask: Optional[np.ndarray] = None) -> AllocationResult:
+    """Minimize sum(distance * quantity) + shortfall_penalty * unmet demand.
+
+    Variables are the quantities on the allowed arcs plus one shortfall
+    variable per STO; each STO's arcs and shortfall sum to its demand and
+    each warehouse ships at most its supply. This is a transportation
+    problem, so with integer demand and supply the simplex optimum is
+    integral. Solved with HiGHS through scipy; without scipy a greedy
+    nearest-arc-first assignment is used instead.
+    """
+    demand = np.maximum(np.rint(np.asarray(demand, dtype=float)), 0)
+    supply = np.maximum(np.rint(np.asarray(supply, dtype=float)), 0)
+    if mask is None:
+        mask = np.isfinite(distance)
+    rows, cols = np.nonzero(mask)
+    costs = distance[rows, cols]
+
+    start = time.perf_counter()
+    if linprog is not None and len(rows):
+        quantities, shortfall, method = _solve_lp(demand, supply, rows, cols, costs, shortfall_penalty)
+    else:
+        quantities, shortfall, method = _solve_greedy(demand, supply, rows, cols, costs)
+    solve_ms = (time.perf_counter() - start) * 1000
+
+    result = AllocationResult(list(sto_ids), list(warehouse_ids), shortfall=shortfall, demand=demand,
+                              method=method, solve_ms=solve_ms)
+    for k in np.nonzero(quantities > 0)[0]:
+        result.assignments.append({
+            "sto_id": result.sto_ids[rows[k]],
+            "warehouse_id": result.warehouse_ids[cols[k]],
+            "quantity": int(quantities[k]),
+            "distance_km": round(float(costs[k]), 2)
+        })
+    return result
+
+def _solve_lp(demand, supply, rows, cols, costs, shortfall_penalty):
+    n_sto, n_wh, n_arc = len(demand), len(supply), len(rows)
+    c = np.concatenate([costs, np.full(n_sto, float(shortfall_penalty))])
+    # STO balance: arcs of STO i + shortfall_i == demand_i
+    a_eq = coo_matrix(
+        (np.ones(n_arc + n_sto), (np.concatenate([rows, np.arange(n_sto)]), np.arange(n_arc + n_sto))),
+        shape=(n_sto, n_arc + n_sto)
+    ).tocsr()
+    # Warehouse capacity: arcs of warehouse j <= supply_j
+    a_ub = coo_matrix((np.ones(n_arc), (cols, np.arange(n_arc))), shape=(n_wh, n_arc + n_sto)).tocsr()
+    solution = linprog(c, A_ub=a_ub, b_ub=supply, A_eq=a_eq, b_eq=demand, bounds=(0, None), method="highs")
+    if not solution.success:
+        return _solve_greedy(demand, supply, rows, cols, costs)
+    # Flooring (with a tolerance for solver noise) can never exceed a warehouse's supply
+    quantities = np.floor(solution.x[:n_arc] + 1e-6)
+    shortfall = demand - np.bincount(rows, weights=quantities, minlength=n_sto)
+    return quantities, shortfall, "lp"
+
+def _solve_greedy(demand, supply, rows, cols, costs):
+    remaining_demand, remaining_supply = demand.copy(), supply.copy()
+    quantities = np.zeros(len(rows))
+    for k in np.argsort(costs, kind="stable"):
+        i, j = rows[k], cols[k]
+        quantity = min(remaining_demand[i], remaining_supply[j])
+        if quantity > 0:
+            quantities[k] = quantity
+            remaining_demand[i] -= quantity
+            remaining_supply[j] -= quantity
+    return quantities, remaining_demand, "greedy"
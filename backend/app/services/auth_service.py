@@ -1,8 +1,9 @@
 # Authentication service - handles user management and JWT operations
 from datetime import datetime
 from typing import Optional
+from ..core.cache import principal_cache
 from ..core.database import get_database
-from ..core.security import security
+from ..core.security import PasswordHasherBusy, password_hasher, security
 from ..models.user import User
 
 class AuthService:
@@ -18,7 +19,7 @@ class AuthService:
                 return None
             
             # Hash password and create user
-            password_hash = security.hash_password(password)
+            password_hash = password_hasher.hash(password)
             now = datetime.utcnow()
             
             user_id = self.db.execute_insert(
@@ -39,6 +40,8 @@ class AuthService:
                 )
             
             return None
+        except PasswordHasherBusy:
+            raise
         except Exception:
             return None
     
@@ -58,16 +61,22 @@ class AuthService:
             if not user.is_active:
                 return None
             
-            if not security.verify_password(password, user.password_hash):
+            verified, new_hash = password_hasher.verify_and_update(password, user.password_hash)
+            if not verified:
                 return None
             
-            # Update last login
-            self.db.execute_query(
-                "UPDATE users SET last_login = %s WHERE id = %s",
-                (datetime.utcnow(), user.id)
-            )
+            # Update last login (and the hash when the cost factor changed)
+            with self.db.get_cursor() as cursor:
+                cursor.execute(
+                    "UPDATE users SET last_login = %s, password_hash = COALESCE(%s, password_hash) WHERE id = %s",
+                    (datetime.utcnow(), new_hash, user.id)
+                )
+            if new_hash:
+                user.password_hash = new_hash
             
             return user
+        except PasswordHasherBusy:
+            raise
         except Exception:
             return None
     
@@ -86,6 +95,33 @@ class AuthService:
         except Exception:
             return None
     
+    def change_password(self, user_id: int, new_password: str) -> bool:
+        """Set a new password and drop the user's cached principals"""
+        password_hash = password_hasher.hash(new_password)
+        with self.db.get_cursor() as cursor:
+            cursor.execute(
+                "UPDATE users SET password_hash = %s, updated_at = %s WHERE id = %s",
+                (password_hash, datetime.utcnow(), user_id)
+            )
+            updated = cursor.rowcount > 0
+        principal_cache.invalidate_user(user_id)
+        return updated
+    
+    def set_active(self, user_id: int, is_active: bool) -> bool:
+        """Activate or deactivate a user; cached principals are dropped either way"""
+        with self.db.get_cursor() as cursor:
+            cursor.execute(
+                "UPDATE users SET is_active = %s, updated_at = %s WHERE id = %s",
+                (is_active, datetime.utcnow(), user_id)
+            )
+            updated = cursor.rowcount > 0
+        principal_cache.invalidate_user(user_id)
+        return updated
+    
+    def deactivate_user(self, user_id: int) -> bool:
+        """Disable a user; their tokens stop authenticating in this process immediately"""
+        return self.set_active(user_id, False)
+    
     def create_token_for_user(self, user: User) -> str:
         """Create JWT token for user"""
         return security.create_user_token(user.id, user.email)
@@ -0,0 +1,187 @@
+# Excel ingest service - parallel workbook parsing and bulk load of architecture/metadata uploads
+import io
+import logging
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, BinaryIO, Callable, Dict, List, Optional
+import pandas as pd
+from ..core.config import settings
+from ..core.database import Database, get_database
+from .excel_parser import SheetResult, TableSpec, TABLE_SPECS, parse_workbook
+from .ingest_service import IngestError, IngestReport, file_extension
+
+logger = logging.getLogger(__name__)
+
+class ExcelIngestor:
+    """Loads architecture and metadata workbooks into their tables.
+
+    Sheets are parsed in parallel, one per process in a pool of
+    ``EXCEL_PARSE_WORKERS`` (openpyxl parsing is CPU bound, so threads would
+    serialize on the GIL). Each worker opens the workbook in read-only mode,
+    streams its sheet's rows and normalizes them to the target table's columns.
+    The parent checks STO ids, ``COPY``-es the combined rows into a staging
+    table and merges them with one statement:
+
+    - ``arsitektur_jaringan`` is upserted on ``(sto_id, jenis_arsitektur)``
+    - ``metadata_sto`` keeps history, so a row is appended only for STOs whose
+      latest metadata differs from the upload
+    """
+
+    def __init__(self, db: Optional[Database] = None, max_workers: Optional[int] = None):
+        self.db = db or get_database()
+        self.max_workers = max_workers or settings.EXCEL_PARSE_WORKERS
+        self.max_rejects = settings.INGEST_MAX_REPORTED_REJECTS
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    # spawn: forked children would inherit the parent's pooled DB sockets and threads
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.max_workers,
+                        mp_context=multiprocessing.get_context("spawn")
+                    )
+        return self._executor
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def parse(self, path: str, kind: str) -> List[SheetResult]:
+        """Parse every sheet of the workbook, in parallel when there is more than one"""
+        executor = self.executor if self.max_workers > 1 else None
+        return parse_workbook(path, kind, self.max_rejects, executor)
+
+    def ingest(self, stream: BinaryIO, filename: str, kind: str,
+               progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> IngestReport:
+        """Parse, validate and merge an architecture or metadata upload; returns the ingest report"""
+        spec = TABLE_SPECS[kind]
+        ext = file_extension(filename)
+        if ext not in settings.ALLOWED_EXTENSIONS:
+            raise IngestError(f"Unsupported file type '{ext}'")
+
+        started = time.monotonic()
+        report = IngestReport(filename=filename)
+        # Worker processes open the file by path, so the upload needs a real file on disk
+        handle, path = tempfile.mkstemp(suffix=ext)
+        try:
+            with os.fdopen(handle, "wb") as target:
+                shutil.copyfileobj(stream, target)
+            results = self.parse(path, kind)
+        except Exception as e:
+            raise IngestError(f"Could not read workbook: {e}")
+        finally:
+            os.remove(path)
+
+        frames = []
+        skipped_sheets = []
+        for result in results:
+            if result.missing_columns:
+                skipped_sheets.append(f"{result.sheet or filename} (missing {', '.join(result.missing_columns)})")
+                continue
+            report.chunks += 1
+            report.rows_read += result.rows_read
+            report.rows_rejected += result.rows_rejected
+            room = self.max_rejects - len(report.rejects)
+            report.rejects.extend(result.rejects[:max(room, 0)])
+            if result.valid is not None and len(result.valid):
+                frames.append(result.valid.assign(sheet=result.sheet))
+        if not report.chunks:
+            raise IngestError(f"No sheet has the required columns: {'; '.join(skipped_sheets)}")
+        if skipped_sheets:
+            logger.info(f"Skipped sheets in {filename}: {'; '.join(skipped_sheets)}")
+        if progress:
+            progress({"stage": "parsed", **report.to_dict()})
+
+        valid = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=["row", "sheet"] + spec.column_names)
+        with self.db.get_connection() as conn:
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute("SELECT sto_id FROM sto")
+                    known_stos = {row[0] for row in cursor.fetchall()}
+                    unknown = ~valid["sto_id"].isin(known_stos)
+                    if unknown.any():
+                        report.rows_rejected += int(unknown.sum())
+                        room = max(self.max_rejects - len(report.rejects), 0)
+                        report.rejects.extend(
+                            {"sheet": sheet, "row": int(row), "reason": "unknown sto_id"}
+                            for sheet, row in valid.loc[unknown, ["sheet", "row"]].head(room).itertuples(index=False)
+                        )
+                        valid = valid[~unknown]
+                    report.rows_valid = len(valid)
+                    if len(valid):
+                        report.rows_merged = self._merge(cursor, spec, valid)
+                        report.rows_skipped = report.rows_valid - report.rows_merged
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+
+        report.duration_seconds = time.monotonic() - started
+        if progress:
+            progress({"stage": "done", **report.to_dict()})
+        logger.info(
+            f"Ingested {kind} file {filename}: {report.rows_valid}/{report.rows_read} valid rows "
+            f"from {report.chunks} sheet(s), {report.rows_merged} merged in {report.duration_seconds:.1f}s"
+        )
+        return report
+
+    @staticmethod
+    def _merge(cursor, spec: TableSpec, valid: pd.DataFrame) -> int:
+        """COPY rows into a staging table and merge them into ``spec.table``; returns rows written"""
+        columns = spec.column_names
+        column_list = ", ".join(columns)
+        cursor.execute(
+            f"""CREATE TEMP TABLE {spec.table}_staging (
+                    seq BIGINT NOT NULL,
+                    {", ".join(f"{c.name} {c.sql_type}" for c in spec.columns)}
+                ) ON COMMIT DROP"""
+        )
+        buffer = io.StringIO()
+        # Later sheets and later rows win for duplicate keys
+        valid.assign(seq=range(len(valid)))[["seq"] + columns].to_csv(buffer, index=False, header=False)
+        buffer.seek(0)
+        cursor.copy_expert(f"COPY {spec.table}_staging (seq, {column_list}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+        key_list = ", ".join(spec.key)
+        latest = f"""SELECT DISTINCT ON ({key_list}) {column_list}
+                     FROM {spec.table}_staging
+                     ORDER BY {key_list}, seq DESC"""
+        src_values = ", ".join(f"src.{c}" for c in columns)
+        if spec.append_only:
+            key_match = " AND ".join(f"t.{k} = src.{k}" for k in spec.key)
+            cursor.execute(
+                f"""INSERT INTO {spec.table} ({column_list})
+                    SELECT {src_values}
+                    FROM ({latest}) src
+                    LEFT JOIN LATERAL (
+                        SELECT {column_list} FROM {spec.table} t
+                        WHERE {key_match}
+                        ORDER BY t.updated_at DESC
+                        LIMIT 1
+                    ) cur ON true
+                    WHERE ({", ".join(f"cur.{c}" for c in columns)}) IS DISTINCT FROM ({src_values})"""
+            )
+        else:
+            updates = [c for c in columns if c not in spec.key]
+            cursor.execute(
+                f"""INSERT INTO {spec.table} ({column_list})
+                    SELECT {src_values} FROM ({latest}) src
+                    ON CONFLICT ({key_list}) DO UPDATE
+                        SET {", ".join(f"{c} = EXCLUDED.{c}" for c in updates)}, updated_at = CURRENT_TIMESTAMP
+                        WHERE ({", ".join(f"{spec.table}.{c}" for c in updates)})
+                              IS DISTINCT FROM ({", ".join(f"EXCLUDED.{c}" for c in updates)})"""
+            )
+        return cursor.rowcount
+
+# Global instance
+excel_ingestor = ExcelIngestor()
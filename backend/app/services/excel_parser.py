@@ -0,0 +1,221 @@
+# Excel parsing workers - per-sheet parsing and normalization, run in a process pool
+#
+# This module is imported by pool worker processes, so it must not import the
+# database layer (which opens connections at import time).
+import itertools
+import os
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import pandas as pd
+from ..core.config import settings
+
+@dataclass(frozen=True)
+class ColumnSpec:
+    name: str
+    kind: str  # 'text', 'int', 'decimal', 'choice'
+    aliases: Tuple[str, ...] = ()
+    required: bool = True
+    default: Any = None
+    minimum: Optional[float] = None
+    maximum: Optional[float] = None
+    choices: Tuple[str, ...] = ()
+    upper: bool = False  # normalize text to upper case (codes such as FTTH)
+    numeric: Optional[Tuple[int, int]] = None  # (precision, scale) of the target DECIMAL column
+
+    @property
+    def sql_type(self) -> str:
+        if self.kind == "decimal" and self.numeric:
+            # Staging rounds like the target column, so unchanged rows compare equal in the merge
+            return f"NUMERIC({self.numeric[0]}, {self.numeric[1]})"
+        return {"int": "INTEGER", "decimal": "NUMERIC"}.get(self.kind, "TEXT")
+
+@dataclass(frozen=True)
+class TableSpec:
+    """Target table shape: canonical columns, header aliases and the natural key"""
+    table: str
+    columns: Tuple[ColumnSpec, ...]
+    key: Tuple[str, ...]
+    append_only: bool = False  # history tables get a new row per change instead of an upsert
+
+    @property
+    def column_names(self) -> List[str]:
+        return [c.name for c in self.columns]
+
+ARCHITECTURE_SPEC = TableSpec(
+    table="arsitektur_jaringan",
+    columns=(
+        ColumnSpec("sto_id", "text", ("sto", "kode_sto")),
+        ColumnSpec("jenis_arsitektur", "text", ("jenis", "architecture", "architecture_type", "type"), upper=True),
+        ColumnSpec("kapasitas", "int", ("capacity",), required=False, default=0, minimum=0),
+        ColumnSpec("jumlah_port", "int", ("port", "ports", "port_count"), required=False, default=0, minimum=0),
+        ColumnSpec("utilisasi", "decimal", ("utilization", "utilization_rate"), required=False, default=0,
+                   minimum=0, maximum=100, numeric=(5, 2))
+    ),
+    key=("sto_id", "jenis_arsitektur")
+)
+
+METADATA_SPEC = TableSpec(
+    table="metadata_sto",
+    columns=(
+        ColumnSpec("sto_id", "text", ("sto", "kode_sto")),
+        ColumnSpec("population_coverage", "int", ("population",), required=False, default=0, minimum=0),
+        ColumnSpec("business_density", "choice", choices=("Low", "Medium", "High")),
+        ColumnSpec("competition_level", "choice", ("competition",), choices=("Low", "Medium", "High")),
+        ColumnSpec("economic_index", "decimal", required=False, default=0, minimum=0, numeric=(8, 4)),
+        ColumnSpec("infrastructure_quality", "choice", ("infrastructure",),
+                   choices=("Poor", "Fair", "Good", "Excellent"))
+    ),
+    key=("sto_id",),
+    append_only=True
+)
+
+TABLE_SPECS = {"architecture": ARCHITECTURE_SPEC, "metadata": METADATA_SPEC}
+
+@dataclass
+class SheetResult:
+    sheet: str
+    rows_read: int = 0
+    rows_rejected: int = 0
+    valid: Optional[pd.DataFrame] = None  # canonical columns plus 'row' (file row number)
+    rejects: List[Dict[str, Any]] = field(default_factory=list)
+    missing_columns: List[str] = field(default_factory=list)
+
+def normalize_header(name: Any) -> str:
+    return "_".join(str(name if name is not None else "").strip().lower().replace("-", " ").split())
+
+def list_sheets(path: str) -> List[str]:
+    """Sheet names without loading cell data"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        return [""]
+    if ext == ".xlsx":
+        from openpyxl import load_workbook
+        workbook = load_workbook(path, read_only=True)
+        try:
+            return list(workbook.sheetnames)
+        finally:
+            workbook.close()
+    return list(pd.ExcelFile(path, engine="xlrd").sheet_names)
+
+def frame_from_rows(rows: Iterator[tuple], columns: List[Any], chunk_rows: int) -> pd.DataFrame:
+    """Build a frame from a row iterator ``chunk_rows`` rows at a time, so the rows are never all held as tuples"""
+    chunks = []
+    while True:
+        chunk = list(itertools.islice(rows, chunk_rows))
+        if not chunk:
+            break
+        # Positional labels while concatenating: header cells may repeat or be empty
+        chunks.append(pd.DataFrame.from_records(chunk, columns=range(len(columns))))
+    frame = pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame(columns=range(len(columns)))
+    frame.columns = columns
+    return frame
+
+def read_sheet(path: str, sheet: str, chunk_rows: Optional[int] = None) -> pd.DataFrame:
+    """One sheet as raw cell values, header row normalized"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        frame = pd.read_csv(path, dtype=str, keep_default_na=False, skipinitialspace=True)
+    elif ext == ".xlsx":
+        from openpyxl import load_workbook
+        # read_only streams rows from the sheet XML instead of building the whole cell tree
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        try:
+            rows = workbook[sheet].iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                return pd.DataFrame()
+            frame = frame_from_rows(rows, list(header), chunk_rows or settings.INGEST_CHUNK_ROWS)
+        finally:
+            workbook.close()
+    else:
+        frame = pd.read_excel(path, sheet_name=sheet, dtype=object, engine="xlrd")
+    frame.columns = [normalize_header(c) for c in frame.columns]
+    return frame
+
+def normalize_sheet(frame: pd.DataFrame, spec: TableSpec, sheet: str, max_rejects: int) -> SheetResult:
+    """Map aliased headers onto the spec and validate every column with vectorized checks"""
+    result = SheetResult(sheet=sheet)
+    # File row numbers (header is row 1); fully blank rows are dropped, not rejected
+    frame = frame.copy()
+    frame.index = pd.RangeIndex(2, 2 + len(frame))
+    blank_cells = frame.isna() | (frame.astype(str).apply(lambda col: col.str.strip()) == "")
+    frame = frame[~blank_cells.all(axis=1)]
+    result.rows_read = len(frame)
+
+    present = {}
+    for column in spec.columns:
+        source = next((n for n in (column.name,) + column.aliases if n in frame.columns), None)
+        if source is not None:
+            present[column.name] = frame[source]
+        elif column.required:
+            result.missing_columns.append(column.name)
+    if result.missing_columns:
+        return result
+
+    out = pd.DataFrame(index=frame.index)
+    invalid = pd.Series(False, index=frame.index)
+
+    def reject(mask: pd.Series, reason: str):
+        nonlocal invalid
+        new = mask & ~invalid
+        count = int(new.sum())
+        if count:
+            result.rows_rejected += count
+            room = max_rejects - len(result.rejects)
+            if room > 0:
+                result.rejects.extend(
+                    {"sheet": sheet, "row": int(n), "reason": reason} for n in new[new].index[:room]
+                )
+        invalid |= mask
+
+    for column in spec.columns:
+        raw = present.get(column.name)
+        if raw is None:
+            out[column.name] = column.default
+            continue
+        blank = raw.isna() | (raw.astype(str).str.strip() == "")
+        if column.kind in ("int", "decimal"):
+            values = pd.to_numeric(raw, errors="coerce")
+            if column.default is not None:
+                values = values.where(~blank, column.default)
+            else:
+                reject(blank, f"{column.name} is required")
+            reject(values.isna() & ~blank, f"{column.name} is not a number")
+            if column.minimum is not None:
+                reject(values < column.minimum, f"{column.name} must be at least {column.minimum:g}")
+            if column.maximum is not None:
+                reject(values > column.maximum, f"{column.name} must be at most {column.maximum:g}")
+            if column.kind == "int":
+                reject(values.notna() & (values % 1 != 0), f"{column.name} must be a whole number")
+            out[column.name] = values
+        else:
+            text = raw.where(~blank, "").astype(str).str.strip()
+            reject(text == "", f"{column.name} is required")
+            if column.kind == "choice":
+                canonical = {c.lower(): c for c in column.choices}
+                text = text.str.lower().map(canonical)
+                reject(text.isna() & ~blank, f"{column.name} must be one of: {', '.join(column.choices)}")
+            elif column.upper:
+                text = text.str.upper()
+            out[column.name] = text
+
+    valid = out[~invalid].copy()
+    for column in spec.columns:
+        if column.kind == "int":
+            valid[column.name] = valid[column.name].astype("int64")
+    valid.insert(0, "row", valid.index)
+    result.valid = valid.reset_index(drop=True)
+    return result
+
+def parse_sheet(path: str, sheet: str, kind: str, max_rejects: int) -> SheetResult:
+    """Pool entry point: read and normalize one sheet of the workbook at ``path``"""
+    frame = read_sheet(path, sheet)
+    return normalize_sheet(frame, TABLE_SPECS[kind], sheet, max_rejects)
+
+def parse_workbook(path: str, kind: str, max_rejects: int, executor=None) -> List[SheetResult]:
+    """Parse every sheet; sheets are fanned out to ``executor`` (a process pool) when there are several"""
+    sheets = list_sheets(path)
+    if executor is not None and len(sheets) > 1:
+        futures = [executor.submit(parse_sheet, path, sheet, kind, max_rejects) for sheet in sheets]
+        return [future.result() for future in futures]
+    return [parse_sheet(path, sheet, kind, max_rejects) for sheet in sheets]
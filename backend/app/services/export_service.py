@@ -0,0 +1,273 @@
+# Export service - streams query results as CSV, XLSX or Parquet with constant memory
+import csv
+import io
+import logging
+import os
+import tempfile
+import uuid
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+from ..core.config import settings
+from ..core.database import Database, get_database
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+    pq = None
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv; charset=utf-8", ".csv"),
+    "xlsx": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", ".xlsx"),
+    "parquet": ("application/vnd.apache.parquet", ".parquet")
+}
+
+class ExportError(Exception):
+    """Raised for invalid export requests (unknown dataset, column or format)"""
+    pass
+
+@dataclass(frozen=True)
+class ExportDataset:
+    """An exportable query: FROM clause, selectable columns and the filterable columns.
+
+    ``columns`` maps output name -> (SQL expression, type); the type is one of
+    'string', 'date', 'int', 'float' and fixes the Parquet schema.
+    """
+    from_clause: str
+    columns: Dict[str, Tuple[str, str]]
+    date_column: str
+    sto_column: str
+    region_column: str
+    order_by: str
+
+EXPORT_DATASETS = {
+    "sales": ExportDataset(
+        from_clause="sales_harian sh JOIN sto s ON s.sto_id = sh.sto_id",
+        columns={
+            "sto_id": ("sh.sto_id", "string"),
+            "sto_name": ("s.name", "string"),
+            "region": ("s.region", "string"),
+            "tanggal": ("sh.tanggal", "date"),
+            "total_barang_terjual": ("sh.total_barang_terjual", "int")
+        },
+        date_column="sh.tanggal",
+        sto_column="sh.sto_id",
+        region_column="s.region",
+        order_by="sh.sto_id, sh.tanggal"
+    ),
+    "predictions": ExportDataset(
+        from_clause="prediction_history ph JOIN sto s ON s.sto_id = ph.sto_id",
+        columns={
+            "sto_id": ("ph.sto_id", "string"),
+            "sto_name": ("s.name", "string"),
+            "region": ("s.region", "string"),
+            "prediction_period": ("ph.prediction_period", "string"),
+            "prediction_date": ("ph.prediction_date", "date"),
+            "predicted_value": ("ph.predicted_value::float", "float"),
+            "supply_recommendation": ("ph.supply_recommendation::float", "float"),
+            "model_accuracy": ("ph.model_accuracy::float", "float"),
+            "model_version": ("ph.model_version", "string")
+        },
+        date_column="ph.prediction_date",
+        sto_column="ph.sto_id",
+        region_column="s.region",
+        order_by="ph.sto_id, ph.prediction_period, ph.prediction_date"
+    ),
+    # Daily actuals next to the daily prediction made for the same day
+    "sales_vs_predictions": ExportDataset(
+        from_clause="""sales_harian sh
+                       JOIN sto s ON s.sto_id = sh.sto_id
+                       LEFT JOIN prediction_history ph
+                           ON ph.sto_id = sh.sto_id AND ph.prediction_period = 'daily'
+                          AND ph.prediction_date = sh.tanggal""",
+        columns={
+            "sto_id": ("sh.sto_id", "string"),
+            "sto_name": ("s.name", "string"),
+            "region": ("s.region", "string"),
+            "tanggal": ("sh.tanggal", "date"),
+            "actual": ("sh.total_barang_terjual", "int"),
+            "predicted": ("ph.predicted_value::float", "float"),
+            "supply_recommendation": ("ph.supply_recommendation::float", "float")
+        },
+        date_column="sh.tanggal",
+        sto_column="sh.sto_id",
+        region_column="s.region",
+        order_by="sh.sto_id, sh.tanggal"
+    )
+}
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object that buffers bytes until they are drained"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+class ExportService:
+    """Streams a dataset from a server-side cursor into an export format.
+
+    Rows are fetched ``EXPORT_FETCH_SIZE`` at a time and each batch is encoded
+    and handed to the caller before the next is fetched, so memory use does
+    not grow with the number of rows. CSV and Parquet bytes are produced as
+    the query advances (one Parquet row group per batch). XLSX is written
+    with openpyxl's write-only workbook, which spools rows to disk; the
+    finished file is then streamed from disk because the zip container can
+    only be finalized once every row is known.
+    """
+
+    def __init__(self, db: Optional[Database] = None, fetch_size: Optional[int] = None):
+        self.db = db or get_database()
+        self.fetch_size = fetch_size or settings.EXPORT_FETCH_SIZE
+
+    def build_query(self, dataset: str, columns: Optional[Sequence[str]] = None,
+                    filters: Optional[Dict[str, Any]] = None) -> Tuple[str, List[str], List[Any]]:
+        """SELECT for the dataset with the requested columns and filters; returns (query, columns, params)"""
+        spec = EXPORT_DATASETS.get(dataset)
+        if spec is None:
+            raise ExportError(f"Unknown dataset '{dataset}'. Available: {', '.join(EXPORT_DATASETS)}")
+        columns = list(columns) if columns else list(spec.columns)
+        unknown = [c for c in columns if c not in spec.columns]
+        if unknown:
+            raise ExportError(f"Unknown column(s) for {dataset}: {', '.join(unknown)}")
+
+        filters = filters or {}
+        conditions, params = [], []
+        if filters.get("sto_ids"):
+            conditions.append(f"{spec.sto_column} = ANY(%s)")
+            params.append(list(filters["sto_ids"]))
+        if filters.get("region"):
+            conditions.append(f"{spec.region_column} = %s")
+            params.append(filters["region"])
+        if filters.get("start_date"):
+            conditions.append(f"{spec.date_column} >= %s")
+            params.append(filters["start_date"])
+        if filters.get("end_date"):
+            conditions.append(f"{spec.date_column} <= %s")
+            params.append(filters["end_date"])
+
+        select_list = ", ".join(f"{spec.columns[c][0]} as {c}" for c in columns)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        query = f"SELECT {select_list} FROM {spec.from_clause} {where} ORDER BY {spec.order_by}"
+        return query, columns, params
+
+    def iter_batches(self, query: str, params: Sequence[Any]) -> Iterator[List[tuple]]:
+        """Yield result rows in batches from a named (server-side) cursor"""
+        with self.db.get_connection() as conn:
+            try:
+                with conn.cursor(name=f"export_{uuid.uuid4().hex}") as cursor:
+                    cursor.itersize = self.fetch_size
+                    cursor.execute(query, params)
+                    while True:
+                        rows = cursor.fetchmany(self.fetch_size)
+                        if not rows:
+                            break
+                        yield rows
+            finally:
+                conn.rollback()
+
+    def export(self, dataset: str, fmt: str, columns: Optional[Sequence[str]] = None,
+               filters: Optional[Dict[str, Any]] = None) -> Iterator[bytes]:
+        """Encoded export as an iterator of byte chunks"""
+        if fmt not in EXPORT_FORMATS:
+            raise ExportError(f"Format must be one of: {', '.join(EXPORT_FORMATS)}")
+        if fmt == "parquet" and pa is None:
+            raise ExportError("Parquet export requires the 'pyarrow' package")
+        query, columns, params = self.build_query(dataset, columns, filters)
+        types = [EXPORT_DATASETS[dataset].columns[c][1] for c in columns]
+        batches = self.iter_batches(query, params)
+        if fmt == "csv":
+            return self._csv(columns, batches)
+        if fmt == "xlsx":
+            return self._xlsx(dataset, columns, batches)
+        return self._parquet(columns, types, batches)
+
+    @staticmethod
+    def _csv(columns: List[str], batches: Iterator[List[tuple]]) -> Iterator[bytes]:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        for rows in batches:
+            writer.writerows(rows)
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode("utf-8")
+
+    @staticmethod
+    def _xlsx(dataset: str, columns: List[str], batches: Iterator[List[tuple]],
+              chunk_size: int = 1024 * 1024) -> Iterator[bytes]:
+        from openpyxl import Workbook
+
+        # Excel caps a sheet at 1,048,576 rows; continue on a new sheet past that
+        max_rows = 1048575
+        workbook = Workbook(write_only=True)
+        sheet, sheet_rows, sheet_count = None, max_rows, 0
+        for rows in batches:
+            for row in rows:
+                if sheet_rows >= max_rows:
+                    sheet_count += 1
+                    sheet = workbook.create_sheet(dataset if sheet_count == 1 else f"{dataset}_{sheet_count}")
+                    sheet.append(columns)
+                    sheet_rows = 0
+                sheet.append(row)
+                sheet_rows += 1
+        if sheet is None:
+            workbook.create_sheet(dataset).append(columns)
+
+        handle, path = tempfile.mkstemp(suffix=".xlsx")
+        os.close(handle)
+        try:
+            workbook.save(path)
+            with open(path, "rb") as output:
+                for chunk in iter(lambda: output.read(chunk_size), b""):
+                    yield chunk
+        finally:
+            os.remove(path)
+
+    @staticmethod
+    def _parquet(columns: List[str], types: List[str], batches: Iterator[List[tuple]]) -> Iterator[bytes]:
+        arrow_types = {"string": pa.string(), "date": pa.date32(), "int": pa.int64(), "float": pa.float64()}
+        schema = pa.schema([(name, arrow_types[kind]) for name, kind in zip(columns, types)])
+        sink = _ChunkSink()
+        writer = pq.ParquetWriter(sink, schema)
+        try:
+            for rows in batches:
+                arrays = [
+                    pa.array([row[i] for row in rows], type=schema.field(i).type)
+                    for i in range(len(columns))
+                ]
+                writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+                data = sink.drain()
+                if data:
+                    yield data
+        finally:
+            writer.close()
+        yield sink.drain()
+
+    @staticmethod
+    def filename(dataset: str, fmt: str) -> str:
+        return f"{dataset}_{date.today().isoformat()}{EXPORT_FORMATS[fmt][1]}"
+
+# Global instance
+export_service = ExportService()
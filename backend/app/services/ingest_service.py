@@ -0,0 +1,274 @@
+# Ingest service - streaming bulk load of uploaded sales files into sales_harian
+import io
+import logging
+import os
+import tempfile
+import time
+from dataclasses import dataclass, field
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, Optional
+import pandas as pd
+from ..core.config import settings
+from ..core.database import Database, get_database
+
+logger = logging.getLogger(__name__)
+
+SALES_COLUMNS = ("sto_id", "tanggal", "total_barang_terjual")
+
+class IngestError(Exception):
+    """Raised when an upload cannot be ingested at all (bad type, size, header)"""
+    pass
+
+@dataclass
+class IngestReport:
+    filename: str
+    rows_read: int = 0
+    rows_valid: int = 0
+    rows_rejected: int = 0
+    rows_merged: int = 0
+    rows_skipped: int = 0  # valid rows already present with the same value (or superseded in-file)
+    chunks: int = 0
+    rejects: List[Dict[str, Any]] = field(default_factory=list)
+    duration_seconds: float = 0.0
+
+    def add_rejects(self, row_numbers: pd.Series, reason: str, limit: int):
+        """Count rejected rows, keeping details for at most ``limit`` of them"""
+        self.rows_rejected += len(row_numbers)
+        room = limit - len(self.rejects)
+        if room > 0:
+            self.rejects.extend({"row": int(n), "reason": reason} for n in row_numbers.head(room))
+
+    def to_dict(self) -> dict:
+        return {
+            "filename": self.filename,
+            "rows_read": self.rows_read,
+            "rows_valid": self.rows_valid,
+            "rows_rejected": self.rows_rejected,
+            "rows_merged": self.rows_merged,
+            "rows_skipped": self.rows_skipped,
+            "chunks": self.chunks,
+            "rejects": self.rejects,
+            "rejects_truncated": self.rows_rejected > len(self.rejects),
+            "duration_seconds": round(self.duration_seconds, 3)
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'IngestReport':
+        return cls(
+            filename=data.get("filename", ""),
+            rows_read=data.get("rows_read", 0),
+            rows_valid=data.get("rows_valid", 0),
+            rows_rejected=data.get("rows_rejected", 0),
+            rows_merged=data.get("rows_merged", 0),
+            rows_skipped=data.get("rows_skipped", 0),
+            chunks=data.get("chunks", 0),
+            rejects=list(data.get("rejects", [])),
+            duration_seconds=data.get("duration_seconds", 0.0)
+        )
+
+def file_extension(filename: str) -> str:
+    return os.path.splitext(filename or "")[1].lower()
+
+def spool_upload(stream: BinaryIO, max_bytes: int, chunk_size: int = 1024 * 1024) -> BinaryIO:
+    """Copy an upload stream to a temporary file, enforcing the size limit as it goes"""
+    spooled = tempfile.SpooledTemporaryFile(max_size=chunk_size * 8)
+    total = 0
+    while True:
+        block = stream.read(chunk_size)
+        if not block:
+            break
+        total += len(block)
+        if total > max_bytes:
+            spooled.close()
+            raise IngestError(f"File exceeds maximum size of {settings.MAX_FILE_SIZE_MB} MB")
+        spooled.write(block)
+    spooled.seek(0)
+    return spooled
+
+class SalesIngestor:
+    """Streams a CSV/XLSX/XLS upload into ``sales_harian``.
+
+    The file is parsed ``chunk_rows`` rows at a time and each chunk is
+    validated with vectorized pandas operations. Valid rows are ``COPY``-ed into
+    a temporary staging table, so memory stays bounded by one chunk, then
+    merged into ``sales_harian`` with an upsert on ``(sto_id, tanggal)`` and
+    committed. Chunks are applied in file order, so the last occurrence of a
+    key in the file wins.
+    """
+
+    def __init__(self, db: Optional[Database] = None, chunk_rows: Optional[int] = None):
+        self.db = db or get_database()
+        self.chunk_rows = chunk_rows or settings.INGEST_CHUNK_ROWS
+        self.max_rejects = settings.INGEST_MAX_REPORTED_REJECTS
+
+    def iter_chunks(self, stream: BinaryIO, filename: str) -> Iterator[pd.DataFrame]:
+        """Yield the upload as string-typed DataFrames of at most ``chunk_rows`` rows"""
+        ext = file_extension(filename)
+        if ext not in settings.ALLOWED_EXTENSIONS:
+            raise IngestError(f"Unsupported file type '{ext}'")
+
+        if ext == ".csv":
+            reader = pd.read_csv(
+                stream, chunksize=self.chunk_rows, dtype=str,
+                keep_default_na=False, skipinitialspace=True
+            )
+            for chunk in reader:
+                chunk.columns = [str(c).strip().lower() for c in chunk.columns]
+                yield chunk
+        elif ext == ".xlsx":
+            yield from self._iter_xlsx(stream)
+        else:
+            # xlrd has no row streaming for .xls; the legacy format is capped at 65k rows anyway
+            frame = pd.read_excel(stream, dtype=str, engine="xlrd").fillna("")
+            frame.columns = [str(c).strip().lower() for c in frame.columns]
+            for start in range(0, len(frame), self.chunk_rows):
+                yield frame.iloc[start:start + self.chunk_rows]
+
+    def _iter_xlsx(self, stream: BinaryIO) -> Iterator[pd.DataFrame]:
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(stream, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                return
+            columns = [str(c).strip().lower() if c is not None else "" for c in header]
+            buffer = []
+            for row in rows:
+                buffer.append(["" if v is None else str(v) for v in row])
+                if len(buffer) >= self.chunk_rows:
+                    yield pd.DataFrame(buffer, columns=columns)
+                    buffer = []
+            if buffer:
+                yield pd.DataFrame(buffer, columns=columns)
+        finally:
+            workbook.close()
+
+    def validate_chunk(self, chunk: pd.DataFrame, first_row: int, known_stos: set,
+                       report: IngestReport) -> pd.DataFrame:
+        """Vectorized validation; returns the valid rows and records rejects in the report"""
+        missing = [c for c in SALES_COLUMNS if c not in chunk.columns]
+        if missing:
+            raise IngestError(f"Missing required column(s): {', '.join(missing)}")
+
+        # File row numbers (header is row 1)
+        row_numbers = pd.Series(range(first_row, first_row + len(chunk)), index=chunk.index)
+        sto_id = chunk["sto_id"].astype(str).str.strip()
+        tanggal = pd.to_datetime(chunk["tanggal"].astype(str).str.strip(), errors="coerce")
+        # Excel cells come through as e.g. '12.0'; accept whole numbers only
+        quantity = pd.to_numeric(chunk["total_barang_terjual"], errors="coerce")
+
+        checks = [
+            (sto_id == "", "sto_id is required"),
+            (~sto_id.isin(known_stos) & (sto_id != ""), "unknown sto_id"),
+            (tanggal.isna(), "invalid tanggal"),
+            (quantity.isna(), "total_barang_terjual is not a number"),
+            (quantity.notna() & (quantity < 0), "total_barang_terjual must be non-negative"),
+            (quantity.notna() & (quantity % 1 != 0), "total_barang_terjual must be a whole number")
+        ]
+        invalid = pd.Series(False, index=chunk.index)
+        for mask, reason in checks:
+            # Report each row once, with its first failing check
+            new = mask & ~invalid
+            if new.any():
+                report.add_rejects(row_numbers[new], reason, self.max_rejects)
+            invalid |= mask
+
+        valid = ~invalid
+        return pd.DataFrame({
+            "seq": row_numbers[valid],
+            "sto_id": sto_id[valid],
+            "tanggal": tanggal[valid].dt.date,
+            "total_barang_terjual": quantity[valid].astype("int64")
+        })
+
+    def ingest(self, stream: BinaryIO, filename: str,
+               progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+               resume_from: Optional[IngestReport] = None,
+               on_chunk_committed: Optional[Callable[[IngestReport], None]] = None) -> IngestReport:
+        """Parse, validate, stage and merge an upload; returns the ingest report.
+
+        Each chunk is merged and committed on its own, so an interrupted ingest
+        can be resumed by passing the last committed report as ``resume_from``:
+        chunks it already covers are skipped and its counters carried forward.
+        """
+        started = time.monotonic()
+        report = IngestReport.from_dict(resume_from.to_dict()) if resume_from else IngestReport(filename=filename)
+        skip_chunks = report.chunks
+
+        with self.db.get_connection() as conn:
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute("SELECT sto_id FROM sto")
+                    known_stos = {row[0] for row in cursor.fetchall()}
+                    cursor.execute(
+                        """CREATE TEMP TABLE IF NOT EXISTS sales_harian_staging (
+                               seq BIGINT NOT NULL,
+                               sto_id VARCHAR(10) NOT NULL,
+                               tanggal DATE NOT NULL,
+                               total_barang_terjual INTEGER NOT NULL
+                           ) ON COMMIT DELETE ROWS"""
+                    )
+                    conn.commit()
+
+                    next_row = 2
+                    for index, chunk in enumerate(self.iter_chunks(stream, filename)):
+                        first_row = next_row
+                        next_row += len(chunk)
+                        if index < skip_chunks:
+                            continue
+
+                        valid = self.validate_chunk(chunk, first_row, known_stos, report)
+                        report.rows_read += len(chunk)
+                        report.rows_valid += len(valid)
+
+                        if len(valid):
+                            buffer = io.StringIO()
+                            valid.to_csv(buffer, index=False, header=False)
+                            buffer.seek(0)
+                            cursor.copy_expert(
+                                "COPY sales_harian_staging (seq, sto_id, tanggal, total_barang_terjual) "
+                                "FROM STDIN WITH (FORMAT csv)",
+                                buffer
+                            )
+                            # Rows whose (sto_id, tanggal, total) fingerprint already exists are
+                            # dropped before the upsert, so overlapping files only write new data
+                            cursor.execute(
+                                """INSERT INTO sales_harian (sto_id, tanggal, total_barang_terjual)
+                                   SELECT src.sto_id, src.tanggal, src.total_barang_terjual
+                                   FROM (
+                                       SELECT DISTINCT ON (sto_id, tanggal) sto_id, tanggal, total_barang_terjual
+                                       FROM sales_harian_staging
+                                       ORDER BY sto_id, tanggal, seq DESC
+                                   ) src
+                                   LEFT JOIN sales_harian existing
+                                       ON existing.sto_id = src.sto_id AND existing.tanggal = src.tanggal
+                                   WHERE existing.total_barang_terjual IS DISTINCT FROM src.total_barang_terjual
+                                   ON CONFLICT (sto_id, tanggal) DO UPDATE
+                                       SET total_barang_terjual = EXCLUDED.total_barang_terjual"""
+                            )
+                            report.rows_merged += cursor.rowcount
+                            report.rows_skipped += len(valid) - cursor.rowcount
+
+                        report.chunks += 1
+                        conn.commit()  # also clears the staging table
+                        if on_chunk_committed:
+                            on_chunk_committed(report)
+                        if progress:
+                            progress({"stage": "loading", **report.to_dict()})
+            except Exception:
+                conn.rollback()
+                raise
+
+        report.duration_seconds += time.monotonic() - started
+        if progress:
+            progress({"stage": "done", **report.to_dict()})
+        logger.info(
+            f"Ingested {filename}: {report.rows_valid}/{report.rows_read} valid rows, "
+            f"{report.rows_merged} merged, {report.rows_skipped} unchanged, "
+            f"{report.rows_rejected} rejected in {report.duration_seconds:.1f}s"
+        )
+        return report
+
+# Global instance
+sales_ingestor = SalesIngestor()
@@ -0,0 +1,235 @@
+# Prediction history service - month-partitioned prediction log and predicted-vs-actual series
+import argparse
+import logging
+import sys
+import threading
+from datetime import date
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from psycopg2 import sql
+from psycopg2.extras import execute_values
+from ..core.database import Database, get_database
+
+logger = logging.getLogger(__name__)
+
+# Days of actual sales each prediction period is compared against
+PERIOD_DAYS = {"daily": 1, "weekly": 7, "monthly": 30}
+PARTITION_PREFIX = "prediction_history_y"
+ARCHIVE_PREFIX = "prediction_history_archive_y"
+
+# Absolute percentage error of each daily prediction dated on or after %(since)s, against
+# the STO's sales that day; measured accuracy is 100 - MAPE over these rows. The date
+# bound is a literal after parameter binding, so it prunes partitions.
+DAILY_PREDICTION_ERRORS_SQL = """
+    SELECT h.sto_id, h.prediction_date,
+           ABS(s.total_barang_terjual - h.predicted_value) * 100.0 / s.total_barang_terjual AS abs_pct_error
+    FROM prediction_history h
+    JOIN sales_harian s ON s.sto_id = h.sto_id AND s.tanggal = h.prediction_date
+    WHERE h.prediction_period = 'daily' AND h.prediction_date >= %(since)s
+      AND s.total_barang_terjual > 0
+"""
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+def add_months(day: date, months: int) -> date:
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+def partition_month(name: str) -> Optional[date]:
+    """Month covered by a partition named prediction_history_yYYYYmMM"""
+    try:
+        year, month = name[len(PARTITION_PREFIX):].split("m")
+        return date(int(year), int(month), 1)
+    except ValueError:
+        return None
+
+class PredictionHistoryStore:
+    """Append-only prediction history in ``prediction_history``.
+
+    The table is range-partitioned by month on ``prediction_date``, so range
+    queries only scan the months they cover and retention is a metadata
+    operation: a month is detached (kept as a standalone archive table) or
+    dropped without rewriting or vacuuming the rest. Within a partition the
+    primary key ``(sto_id, prediction_period, prediction_date)`` serves
+    per-STO range scans.
+    """
+
+    def __init__(self, db: Optional[Database] = None):
+        self.db = db or get_database()
+        self._ensured: set = set()
+        self._lock = threading.Lock()
+
+    def ensure_partitions(self, start: date, end: Optional[date] = None) -> List[str]:
+        """Create monthly partitions covering [start, end] (cached per process)"""
+        month, last = month_start(start), month_start(end or start)
+        created = []
+        while month <= last:
+            if month not in self._ensured:
+                row = self.db.execute_one("SELECT ensure_prediction_history_partition(%s)", (month,))
+                created.append(row[0])
+                with self._lock:
+                    self._ensured.add(month)
+            month = add_months(month, 1)
+        return created
+
+    def append(self, cursor, rows: Sequence[Tuple]):
+        """Write history rows on the caller's cursor (same transaction as its other writes).
+
+        Each row is (sto_id, prediction_period, prediction_date, predicted_value,
+        supply_recommendation, model_accuracy, model_version, job_id); a rerun for
+        the same STO, period and day replaces that day's row.
+        """
+        if not rows:
+            return
+        execute_values(
+            cursor,
+            """INSERT INTO prediction_history (sto_id, prediction_period, prediction_date, predicted_value,
+                                               supply_recommendation, model_accuracy, model_version, job_id)
+               VALUES %s
+               ON CONFLICT (sto_id, prediction_period, prediction_date) DO UPDATE
+                   SET predicted_value = EXCLUDED.predicted_value,
+                       supply_recommendation = EXCLUDED.supply_recommendation,
+                       model_accuracy = EXCLUDED.model_accuracy,
+                       model_version = EXCLUDED.model_version,
+                       job_id = EXCLUDED.job_id,
+                       created_at = CURRENT_TIMESTAMP""",
+            rows,
+            page_size=len(rows)
+        )
+
+    def series(self, start: date, end: date, period: str = "daily",
+               sto_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Predicted vs actual per prediction date for one STO, or the whole fleet when ``sto_id`` is None.
+
+        ``actual`` is the sales over the days the prediction covers and is None
+        until at least one of those days has data.
+        """
+        days = PERIOD_DAYS[period]
+        if sto_id:
+            rows = self.db.execute_query(
+                """SELECT h.prediction_date, h.predicted_value, h.supply_recommendation, h.model_accuracy,
+                          1 as sto_count, actual.total, actual.days
+                   FROM prediction_history h
+                   LEFT JOIN LATERAL (
+                       SELECT SUM(s.total_barang_terjual) as total, COUNT(*) as days
+                       FROM sales_harian s
+                       WHERE s.sto_id = h.sto_id AND s.tanggal >= h.prediction_date AND s.tanggal < h.prediction_date + %s
+                   ) actual ON true
+                   WHERE h.sto_id = %s AND h.prediction_period = %s
+                     AND h.prediction_date >= %s AND h.prediction_date <= %s
+                   ORDER BY h.prediction_date""",
+                (days, sto_id, period, start, end)
+            )
+        else:
+            # Fleet actuals come from the daily rollup instead of scanning sales_harian
+            rows = self.db.execute_query(
+                """WITH predicted AS (
+                       SELECT prediction_date, SUM(predicted_value) as predicted_value,
+                              SUM(supply_recommendation) as supply_recommendation,
+                              AVG(model_accuracy) as model_accuracy, COUNT(*) as sto_count
+                       FROM prediction_history
+                       WHERE prediction_period = %s AND prediction_date >= %s AND prediction_date <= %s
+                       GROUP BY prediction_date
+                   )
+                   SELECT p.prediction_date, p.predicted_value, p.supply_recommendation, p.model_accuracy,
+                          p.sto_count, actual.total, actual.days
+                   FROM predicted p
+                   LEFT JOIN LATERAL (
+                       SELECT SUM(r.total_sales) as total, COUNT(*) as days
+                       FROM sales_rollup_daily r
+                       WHERE r.tanggal >= p.prediction_date AND r.tanggal < p.prediction_date + %s
+                   ) actual ON true
+                   ORDER BY p.prediction_date""",
+                (period, start, end, days)
+            )
+
+        series = []
+        for prediction_date, predicted, supply, accuracy, sto_count, actual, actual_days in rows:
+            predicted = float(predicted)
+            actual = float(actual) if actual_days else None
+            series.append({
+                "date": prediction_date.isoformat(),
+                "predicted": predicted,
+                "actual": actual,
+                "error": round(actual - predicted, 2) if actual is not None else None,
+                "abs_pct_error": round(abs(actual - predicted) / actual * 100, 2) if actual else None,
+                "supply_recommendation": float(supply),
+                "model_accuracy": float(accuracy) if accuracy is not None else None,
+                "sto_count": sto_count,
+                "actual_days": actual_days or 0
+            })
+        return series
+
+    def partitions(self) -> List[Dict[str, Any]]:
+        """Attached monthly partitions with their size"""
+        rows = self.db.execute_query(
+            """SELECT c.relname, pg_total_relation_size(c.oid), c.reltuples::bigint
+               FROM pg_inherits i
+               JOIN pg_class c ON c.oid = i.inhrelid
+               WHERE i.inhparent = 'prediction_history'::regclass
+               ORDER BY c.relname"""
+        )
+        return [
+            {"name": name, "month": str(partition_month(name)), "bytes": size, "estimated_rows": max(rows_estimate, 0)}
+            for name, size, rows_estimate in rows
+        ]
+
+    def archive(self, before: date, drop: bool = False) -> List[str]:
+        """Detach every partition for months before ``before``.
+
+        Detached partitions are renamed to prediction_history_archive_yYYYYmMM
+        (ready for pg_dump or a cheaper tablespace) or dropped when ``drop``.
+        """
+        cutoff = month_start(before)
+        handled = []
+        for partition in self.partitions():
+            month = partition_month(partition["name"])
+            if month is None or month >= cutoff:
+                continue
+            name = partition["name"]
+            with self.db.get_cursor() as cursor:
+                cursor.execute(sql.SQL("ALTER TABLE prediction_history DETACH PARTITION {}").format(sql.Identifier(name)))
+                if drop:
+                    cursor.execute(sql.SQL("DROP TABLE {}").format(sql.Identifier(name)))
+                else:
+                    archive_name = ARCHIVE_PREFIX + name[len(PARTITION_PREFIX):]
+                    cursor.execute(sql.SQL("ALTER TABLE {} RENAME TO {}").format(
+                        sql.Identifier(name), sql.Identifier(archive_name)
+                    ))
+            with self._lock:
+                self._ensured.discard(month)
+            handled.append(name)
+            logger.info(f"{'Dropped' if drop else 'Archived'} prediction history partition {name}")
+        return handled
+
+# Global instance
+prediction_history = PredictionHistoryStore()
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """CLI: python -m app.services.prediction_history {ensure,list,archive} [--months N] [--before DATE] [--drop]"""
+    parser = argparse.ArgumentParser(description="Maintain prediction_history partitions")
+    parser.add_argument("command", choices=["ensure", "list", "archive"])
+    parser.add_argument("--months", type=int, default=3, help="months ahead to create (ensure)")
+    parser.add_argument("--before", type=date.fromisoformat, help="archive months before this date (YYYY-MM-DD)")
+    parser.add_argument("--drop", action="store_true", help="drop instead of keeping an archive table")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    if args.command == "ensure":
+        today = date.today()
+        created = prediction_history.ensure_partitions(today, add_months(today, args.months))
+        print(f"Partitions present: {', '.join(created)}")
+        return 0
+    if args.command == "list":
+        for partition in prediction_history.partitions():
+            print(f"{partition['name']}: ~{partition['estimated_rows']} rows, {partition['bytes'] / 1e6:.1f} MB")
+        return 0
+
+    if not args.before:
+        parser.error("archive requires --before")
+    handled = prediction_history.archive(args.before, drop=args.drop)
+    print(f"{'Dropped' if args.drop else 'Archived'} {len(handled)} partition(s)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
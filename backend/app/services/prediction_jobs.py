@@ -0,0 +1,241 @@
+# Prediction jobs - batch prediction generation in a background worker pool
+import json
+import logging
+import os
+import socket
+import threading
+import uuid
+from datetime import date
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence
+from psycopg2.extras import execute_values
+from ..core.config import settings
+from ..core.database import Database, get_database
+from ..models.predictions import PredictionJob
+from .prediction_history import prediction_history
+
+logger = logging.getLogger(__name__)
+
+JOB_COLUMNS = """id, job_id, sto_ids, prediction_period, status, total, processed, written,
+                 error, created_by, created_at, started_at, finished_at"""
+
+class PredictionJobManager:
+    """Runs batch prediction jobs outside the request thread.
+
+    ``submit`` records the job in ``prediction_jobs`` and returns at once; a
+    pool of ``PREDICTION_JOB_WORKERS`` threads runs the jobs. Each job
+    predicts its STOs ``PREDICTION_JOB_BATCH_SIZE`` at a time through the
+    vectorized, cached prediction path (or, with ``PREDICTION_USE_FEATURE_STORE``,
+    from the running statistics in ``sto_feature_stats``) and upserts every batch into
+    ``final_pemodelan`` (and appends it to ``prediction_history``) with a
+    single statement, updating the job's progress after each batch so it can
+    be polled from any process.
+
+    Each job records its owner (host, pid and a per-manager token), and the
+    owner's heartbeat thread refreshes ``heartbeat_at`` of its unfinished
+    jobs every ``PREDICTION_JOB_HEARTBEAT_INTERVAL`` seconds. Jobs whose
+    heartbeat is older than ``PREDICTION_JOB_STALE_AFTER`` lost their
+    process and are marked failed by any running manager. Status updates
+    are conditional on the job still being active, so a failed job is never
+    brought back.
+    """
+
+    def __init__(self, db: Optional[Database] = None, max_workers: Optional[int] = None,
+                 batch_size: Optional[int] = None):
+        self.db = db or get_database()
+        self.batch_size = batch_size or settings.PREDICTION_JOB_BATCH_SIZE
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers or settings.PREDICTION_JOB_WORKERS,
+            thread_name_prefix="prediction-job"
+        )
+        self._token = uuid.uuid4().hex[:8]
+        self._lock = threading.Lock()
+        self._heartbeat: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @property
+    def owner(self) -> str:
+        """Identity of this process's worker pool (the pid is read live, so forked workers differ)"""
+        return f"{socket.gethostname()}:{os.getpid()}:{self._token}"
+
+    def _execute(self, query: str, params: tuple) -> int:
+        with self.db.get_cursor() as cursor:
+            cursor.execute(query, params)
+            return cursor.rowcount
+
+    def submit(self, sto_ids: Optional[Sequence[str]], period: str,
+               created_by: Optional[int] = None) -> PredictionJob:
+        """Queue a job for the given STOs (every active STO when None)"""
+        self.start_heartbeat()
+        row = self.db.execute_one(
+            f"""INSERT INTO prediction_jobs (job_id, sto_ids, prediction_period, status, created_by,
+                                             owner, heartbeat_at)
+                VALUES (%s, %s, %s, 'queued', %s, %s, CURRENT_TIMESTAMP)
+                RETURNING {JOB_COLUMNS}""",
+            (str(uuid.uuid4()), json.dumps(sorted(set(sto_ids))) if sto_ids is not None else None,
+             period, created_by, self.owner)
+        )
+        job = PredictionJob.from_db_row(row)
+        self.executor.submit(self._run, job)
+        return job
+
+    def get(self, job_id: str) -> Optional[PredictionJob]:
+        row = self.db.execute_one(f"SELECT {JOB_COLUMNS} FROM prediction_jobs WHERE job_id = %s", (job_id,))
+        return PredictionJob.from_db_row(row)
+
+    def list_recent(self, limit: int = 20) -> List[PredictionJob]:
+        rows = self.db.execute_query(
+            f"SELECT {JOB_COLUMNS} FROM prediction_jobs ORDER BY created_at DESC, id DESC LIMIT %s", (limit,)
+        )
+        return [PredictionJob.from_db_row(row) for row in rows]
+
+    def heartbeat(self) -> int:
+        """Refresh heartbeat_at of this process's unfinished jobs"""
+        return self._execute(
+            """UPDATE prediction_jobs SET heartbeat_at = CURRENT_TIMESTAMP
+               WHERE owner = %s AND status IN ('queued', 'running')""",
+            (self.owner,)
+        )
+
+    def fail_stale(self) -> int:
+        """Mark unfinished jobs whose owner stopped sending heartbeats as failed; returns how many"""
+        count = self._execute(
+            """UPDATE prediction_jobs
+               SET status = 'failed', error = 'Worker process stopped responding', finished_at = CURRENT_TIMESTAMP
+               WHERE status IN ('queued', 'running')
+                 AND owner IS DISTINCT FROM %s
+                 AND (heartbeat_at IS NULL
+                      OR heartbeat_at < CURRENT_TIMESTAMP - make_interval(secs => %s))""",
+            (self.owner, settings.PREDICTION_JOB_STALE_AFTER)
+        )
+        if count:
+            logger.warning(f"Marked {count} abandoned prediction job(s) as failed")
+        return count
+
+    def start_heartbeat(self):
+        """Start the background heartbeat thread (idempotent)"""
+        if self._heartbeat is not None and self._heartbeat.is_alive():
+            return
+        with self._lock:
+            if self._heartbeat is not None and self._heartbeat.is_alive():
+                return
+            self._heartbeat = threading.Thread(target=self._heartbeat_loop, name="prediction-job-heartbeat",
+                                               daemon=True)
+            self._heartbeat.start()
+
+    def stop_heartbeat(self):
+        self._stop.set()
+
+    def _heartbeat_loop(self):
+        while True:
+            try:
+                self.heartbeat()
+                self.fail_stale()
+            except Exception as e:
+                logger.warning(f"Prediction job heartbeat failed: {e}")
+            if self._stop.wait(settings.PREDICTION_JOB_HEARTBEAT_INTERVAL):
+                return
+
+    def _run(self, job: PredictionJob):
+        from ..api.dashboard import invalidate_dashboard_cache, PREDICTION_DEPENDENT_CACHES
+        from ..ml.models import prediction_engine
+
+        try:
+            sto_ids = prediction_engine.data_loader.resolve_sto_ids(job.sto_ids)
+            if not self._execute(
+                """UPDATE prediction_jobs SET status = 'running', total = %s, started_at = CURRENT_TIMESTAMP,
+                                              heartbeat_at = CURRENT_TIMESTAMP
+                   WHERE job_id = %s AND status = 'queued'""",
+                (len(sto_ids), job.job_id)
+            ):
+                logger.warning(f"Prediction job {job.job_id} is no longer queued; not starting it")
+                return
+            processed = written = 0
+            for start in range(0, len(sto_ids), self.batch_size):
+                batch = sto_ids[start:start + self.batch_size]
+                if settings.PREDICTION_USE_FEATURE_STORE:
+                    records = prediction_engine.generate_predictions_from_feature_store(
+                        batch, job.prediction_period
+                    ).to_records()
+                else:
+                    records = prediction_engine.generate_prediction_records(batch, job.prediction_period)
+                written += self.write_final_pemodelan(records, job.prediction_period, job.job_id)
+                processed += len(batch)
+                invalidate_dashboard_cache(*PREDICTION_DEPENDENT_CACHES)
+                if not self._execute(
+                    """UPDATE prediction_jobs SET processed = %s, written = %s, heartbeat_at = CURRENT_TIMESTAMP
+                       WHERE job_id = %s AND status = 'running'""",
+                    (processed, written, job.job_id)
+                ):
+                    logger.warning(f"Prediction job {job.job_id} was failed elsewhere; stopping after {processed} STOs")
+                    return
+            if not self._execute(
+                """UPDATE prediction_jobs SET status = 'completed', finished_at = CURRENT_TIMESTAMP
+                   WHERE job_id = %s AND status = 'running'""",
+                (job.job_id,)
+            ):
+                logger.warning(f"Prediction job {job.job_id} was failed elsewhere; not marking it completed")
+                return
+            logger.info(f"Prediction job {job.job_id} completed: {written} predictions for {processed} STOs")
+        except Exception as e:
+            logger.error(f"Prediction job {job.job_id} failed: {e}")
+            try:
+                self._execute(
+                    """UPDATE prediction_jobs SET status = 'failed', error = %s, finished_at = CURRENT_TIMESTAMP
+                       WHERE job_id = %s AND status IN ('queued', 'running')""",
+                    (str(e), job.job_id)
+                )
+            except Exception as update_error:
+                logger.error(f"Could not record failure of prediction job {job.job_id}: {update_error}")
+
+    def write_final_pemodelan(self, records: List[Dict[str, Any]], period: str,
+                              job_id: Optional[str] = None) -> int:
+        """Bulk upsert prediction records into final_pemodelan (one row per STO and period).
+
+        Only the prediction and supply recommendation are set. The model's
+        confidence score is not a measured accuracy, so risk level, action and
+        model_accuracy are cleared rather than derived from it (measured
+        accuracy comes from prediction_history, see DAILY_PREDICTION_ERRORS_SQL).
+        The same transaction appends the records to prediction_history, dated today.
+        """
+        if not records:
+            return 0
+        from ..ml.models import prediction_engine
+
+        today = date.today()
+        prediction_history.ensure_partitions(today)
+        rows, history_rows = [], []
+        for record in records:
+            final_prediction = round(float(record['predictions'][f'{period}_prediction']), 2)
+            supply = round(prediction_engine.models.calculate_supply_recommendation(final_prediction, {}), 2)
+            rows.append((record['sto_id'], period, final_prediction, supply))
+            history_rows.append((
+                record['sto_id'], period, today, final_prediction, supply, None,
+                record.get('model_version'), job_id
+            ))
+        with self.db.get_cursor() as cursor:
+            execute_values(
+                cursor,
+                """INSERT INTO final_pemodelan (sto_id, prediction_period, final_prediction, supply_recommendation,
+                                                risk_level, action_required, model_accuracy)
+                   VALUES %s
+                   ON CONFLICT (sto_id, prediction_period) DO UPDATE
+                       SET final_prediction = EXCLUDED.final_prediction,
+                           supply_recommendation = EXCLUDED.supply_recommendation,
+                           risk_level = NULL,
+                           action_required = NULL,
+                           model_accuracy = NULL,
+                           last_updated = CURRENT_TIMESTAMP""",
+                rows,
+                template="(%s, %s, %s, %s, NULL, NULL, NULL)",
+                page_size=len(rows)
+            )
+            prediction_history.append(cursor, history_rows)
+        return len(rows)
+
+    def shutdown(self, wait: bool = True):
+        self.executor.shutdown(wait=wait)
+        self.stop_heartbeat()
+
+# Global instance
+prediction_job_manager = PredictionJobManager()
@@ -0,0 +1,357 @@
+# Report service - background report rendering with reusable, versioned artifacts
+import hashlib
+import json
+import logging
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from ..core.config import settings
+from ..core.database import Database, get_database
+from ..core.query_batch import QueryBatch
+from ..models.report import ReportArtifact
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_COLUMNS = """id, report_id, artifact_key, template, params, data_version, status, content,
+                      error, created_by, created_at, finished_at, expires_at"""
+
+class ReportError(Exception):
+    """Raised for invalid report requests (unknown template, bad parameters)"""
+    pass
+
+def _num(value) -> float:
+    return round(float(value), 2) if value is not None else 0.0
+
+def _region_filter(column: str, region: Optional[str]) -> Tuple[str, tuple]:
+    return (f" AND {column} = %s", (region,)) if region else ("", ())
+
+def render_sales_summary(params: Dict[str, Any]) -> Dict[str, Any]:
+    start, end, region = params["start_date"], params["end_date"], params.get("region")
+    region_sql, region_params = _region_filter("s.region", region)
+    batch = QueryBatch()
+    batch.add(
+        "daily",
+        f"""SELECT sh.tanggal, SUM(sh.total_barang_terjual), COUNT(DISTINCT sh.sto_id)
+            FROM sales_harian sh JOIN sto s ON s.sto_id = sh.sto_id
+            WHERE sh.tanggal >= %s AND sh.tanggal <= %s{region_sql}
+            GROUP BY sh.tanggal ORDER BY sh.tanggal""",
+        (start, end) + region_params
+    )
+    batch.add(
+        "by_region",
+        f"""SELECT s.region, SUM(sh.total_barang_terjual), COUNT(DISTINCT sh.sto_id)
+            FROM sales_harian sh JOIN sto s ON s.sto_id = sh.sto_id
+            WHERE sh.tanggal >= %s AND sh.tanggal <= %s{region_sql}
+            GROUP BY s.region ORDER BY 2 DESC""",
+        (start, end) + region_params
+    )
+    batch.add(
+        "top_stos",
+        f"""SELECT sh.sto_id, s.name, SUM(sh.total_barang_terjual) as total
+            FROM sales_harian sh JOIN sto s ON s.sto_id = sh.sto_id
+            WHERE sh.tanggal >= %s AND sh.tanggal <= %s{region_sql}
+            GROUP BY sh.sto_id, s.name ORDER BY total DESC LIMIT 20""",
+        (start, end) + region_params
+    )
+    results = batch.run()
+    daily = [{"date": r[0].isoformat(), "total_sales": int(r[1]), "sto_count": r[2]} for r in results["daily"]]
+    total = sum(d["total_sales"] for d in daily)
+    return {
+        "total_sales": total,
+        "avg_daily_sales": round(total / len(daily), 2) if daily else 0.0,
+        "daily": daily,
+        "by_region": [{"region": r[0], "total_sales": int(r[1]), "sto_count": r[2]} for r in results["by_region"]],
+        "top_stos": [{"sto_id": r[0], "name": r[1], "total_sales": int(r[2])} for r in results["top_stos"]]
+    }
+
+def render_prediction_accuracy(params: Dict[str, Any]) -> Dict[str, Any]:
+    from .prediction_history import prediction_history
+
+    start, end, region = params["start_date"], params["end_date"], params.get("region")
+    region_sql, region_params = _region_filter("s.region", region)
+    series = prediction_history.series(start, end, "daily") if not region else []
+    rows = get_database().execute_query(
+        f"""SELECT ph.sto_id, s.name, COUNT(*) as points,
+                   AVG(ABS(sh.total_barang_terjual - ph.predicted_value) / NULLIF(sh.total_barang_terjual, 0)) * 100 as mape,
+                   AVG(sh.total_barang_terjual - ph.predicted_value) as bias
+            FROM prediction_history ph
+            JOIN sales_harian sh ON sh.sto_id = ph.sto_id AND sh.tanggal = ph.prediction_date
+            JOIN sto s ON s.sto_id = ph.sto_id
+            WHERE ph.prediction_period = 'daily' AND ph.prediction_date >= %s AND ph.prediction_date <= %s{region_sql}
+            GROUP BY ph.sto_id, s.name
+            ORDER BY mape DESC NULLS LAST""",
+        (start, end) + region_params
+    )
+    per_sto = [
+        {"sto_id": r[0], "name": r[1], "points": r[2],
+         "mape": _num(r[3]) if r[3] is not None else None, "bias": _num(r[4])}
+        for r in rows
+    ]
+    scored = [p["mape"] for p in per_sto if p["mape"] is not None]
+    return {
+        "fleet_series": series,
+        "overall_mape": round(sum(scored) / len(scored), 2) if scored else None,
+        "per_sto": per_sto,
+        "worst_stos": per_sto[:10]
+    }
+
+def render_supply_efficiency(params: Dict[str, Any]) -> Dict[str, Any]:
+    start, end, region = params["start_date"], params["end_date"], params.get("region")
+    region_sql, region_params = _region_filter("w.region", region)
+    # supply_date is a timestamp: include the whole end day
+    window = (start, end + timedelta(days=1))
+    batch = QueryBatch()
+    batch.add(
+        "by_status",
+        f"""SELECT sw.status, COUNT(*), SUM(sw.quantity_supplied)
+            FROM supply_warehouse sw JOIN warehouse w ON w.warehouse_id = sw.warehouse_id
+            WHERE sw.supply_date >= %s AND sw.supply_date < %s{region_sql}
+            GROUP BY sw.status""",
+        window + region_params
+    )
+    batch.add(
+        "by_warehouse",
+        f"""SELECT w.warehouse_id, w.name, COUNT(sw.id), SUM(sw.quantity_supplied),
+                   COUNT(CASE WHEN sw.status = 'Delivered' THEN 1 END),
+                   AVG(EXTRACT(EPOCH FROM (sw.actual_delivery - sw.estimated_delivery)) / 3600),
+                   COUNT(CASE WHEN sw.actual_delivery <= sw.estimated_delivery THEN 1 END),
+                   COUNT(sw.actual_delivery)
+            FROM warehouse w
+            LEFT JOIN supply_warehouse sw ON sw.warehouse_id = w.warehouse_id
+                AND sw.supply_date >= %s AND sw.supply_date < %s
+            WHERE w.status = 'Active'{region_sql}
+            GROUP BY w.warehouse_id, w.name
+            ORDER BY 4 DESC NULLS LAST""",
+        window + region_params
+    )
+    results = batch.run()
+    warehouses = []
+    for r in results["by_warehouse"]:
+        warehouses.append({
+            "warehouse_id": r[0],
+            "name": r[1],
+            "supplies": r[2],
+            "quantity": int(r[3] or 0),
+            "delivery_rate": round(r[4] / r[2] * 100, 1) if r[2] else None,
+            "avg_delay_hours": round(float(r[5]), 1) if r[5] is not None else None,
+            "on_time_rate": round(r[6] / r[7] * 100, 1) if r[7] else None
+        })
+    return {
+        "by_status": [{"status": r[0], "supplies": r[1], "quantity": int(r[2] or 0)} for r in results["by_status"]],
+        "warehouses": warehouses
+    }
+
+def render_sto_performance(params: Dict[str, Any]) -> Dict[str, Any]:
+    start, end, region = params["start_date"], params["end_date"], params.get("region")
+    region_sql, region_params = _region_filter("s.region", region)
+    days = (end - start).days + 1
+    rows = get_database().execute_query(
+        f"""WITH sales AS (
+                SELECT sto_id, SUM(total_barang_terjual) as total
+                FROM sales_harian WHERE tanggal >= %s AND tanggal <= %s
+                GROUP BY sto_id
+            ), supplies AS (
+                SELECT sto_id, SUM(quantity_supplied) as quantity
+                FROM supply_warehouse WHERE supply_date >= %s AND supply_date < %s AND status != 'Cancelled'
+                GROUP BY sto_id
+            )
+            SELECT s.sto_id, s.name, s.region, COALESCE(sales.total, 0), COALESCE(supplies.quantity, 0),
+                   fp.final_prediction, fp.supply_recommendation, fp.risk_level
+            FROM sto s
+            LEFT JOIN sales ON sales.sto_id = s.sto_id
+            LEFT JOIN supplies ON supplies.sto_id = s.sto_id
+            LEFT JOIN final_pemodelan fp ON fp.sto_id = s.sto_id AND fp.prediction_period = 'daily'
+            WHERE s.status = 'Active'{region_sql}
+            ORDER BY 4 DESC""",
+        (start, end, start, end + timedelta(days=1)) + region_params
+    )
+    stos = []
+    for r in rows:
+        sales_total, supplied = int(r[3]), int(r[4])
+        stos.append({
+            "sto_id": r[0],
+            "name": r[1],
+            "region": r[2],
+            "total_sales": sales_total,
+            "avg_daily_sales": round(sales_total / days, 2),
+            "total_supplied": supplied,
+            "supply_coverage": round(supplied / sales_total * 100, 1) if sales_total else None,
+            "daily_prediction": _num(r[5]) if r[5] is not None else None,
+            "supply_recommendation": _num(r[6]) if r[6] is not None else None,
+            "risk_level": r[7]
+        })
+    return {"days": days, "stos": stos}
+
+# Template id -> (display name, renderer, tables whose changes invalidate the artifact)
+REPORT_TEMPLATES: Dict[str, Tuple[str, Callable[[Dict[str, Any]], Dict[str, Any]], Tuple[str, ...]]] = {
+    "sales_summary": ("Sales Summary Report", render_sales_summary, ("sales_harian", "sto")),
+    "prediction_accuracy": ("Prediction Accuracy Report", render_prediction_accuracy,
+                            ("prediction_history", "sales_harian", "sto")),
+    "supply_efficiency": ("Supply Chain Efficiency Report", render_supply_efficiency,
+                          ("supply_warehouse", "warehouse")),
+    "sto_performance": ("STO Performance Report", render_sto_performance,
+                        ("sales_harian", "supply_warehouse", "final_pemodelan", "sto"))
+}
+
+class ReportService:
+    """Renders report templates in background workers and reuses the results.
+
+    An artifact is keyed by template, normalized parameters and a data
+    version: a digest of the insert/update/delete counters PostgreSQL keeps
+    for the template's source tables (``pg_stat_user_tables``, partitions
+    included). Any write to a source table changes the version, so a repeat
+    request is served the stored artifact only while the data it was built
+    from is unchanged (and for at most ``REPORT_ARTIFACT_TTL`` seconds); a
+    background sweeper deletes expired artifacts.
+    """
+
+    def __init__(self, db: Optional[Database] = None, max_workers: Optional[int] = None):
+        self.db = db or get_database()
+        self.ttl = settings.REPORT_ARTIFACT_TTL
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers or settings.REPORT_JOB_WORKERS,
+            thread_name_prefix="report-job"
+        )
+        self.sweep_interval = settings.REPORT_ARTIFACT_SWEEP_INTERVAL
+        self._lock = threading.Lock()
+        self._sweeper: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @staticmethod
+    def templates() -> List[Dict[str, str]]:
+        return [{"id": template_id, "name": spec[0]} for template_id, spec in REPORT_TEMPLATES.items()]
+
+    @staticmethod
+    def normalize_params(template: str, params: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Validated parameters with defaults applied (last 30 days, all regions)"""
+        if template not in REPORT_TEMPLATES:
+            raise ReportError(f"Unknown report template '{template}'")
+        params = params or {}
+        if not isinstance(params, dict):
+            raise ReportError("params must be an object")
+        try:
+            end = date.fromisoformat(params["end_date"]) if params.get("end_date") else date.today()
+            start = date.fromisoformat(params["start_date"]) if params.get("start_date") else end - timedelta(days=29)
+        except (TypeError, ValueError):
+            raise ReportError("Dates must be in YYYY-MM-DD format")
+        if start > end:
+            raise ReportError("start_date must not be after end_date")
+        if (end - start).days > 3660:
+            raise ReportError("Report window is limited to 10 years")
+        region = params.get("region") or None
+        if region is not None and not isinstance(region, str):
+            raise ReportError("region must be a string")
+        return {"start_date": start, "end_date": end, "region": region}
+
+    def data_version(self, template: str) -> str:
+        tables = list(REPORT_TEMPLATES[template][2])
+        rows = self.db.execute_query(
+            """SELECT relname, n_tup_ins, n_tup_upd, n_tup_del
+               FROM pg_stat_user_tables
+               WHERE relid = ANY(%s::regclass[])
+                  OR relid IN (SELECT inhrelid FROM pg_inherits WHERE inhparent = ANY(%s::regclass[]))
+               ORDER BY relname""",
+            (tables, tables)
+        )
+        return hashlib.sha1(json.dumps(rows).encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def artifact_key(template: str, params: Dict[str, Any], data_version: str) -> str:
+        canonical = json.dumps({"template": template, "params": params, "version": data_version},
+                               sort_keys=True, default=str)
+        return hashlib.sha1(canonical.encode("utf-8")).hexdigest()
+
+    def request(self, template: str, params: Optional[Dict[str, Any]] = None,
+                created_by: Optional[int] = None) -> Tuple[ReportArtifact, bool]:
+        """Return (artifact, reused): the stored artifact for this key, or a newly queued render"""
+        self.start_sweeper()
+        params = self.normalize_params(template, params)
+        version = self.data_version(template)
+        key = self.artifact_key(template, params, version)
+        params_json = json.dumps(params, default=str)
+
+        row = self.db.execute_one(
+            f"""INSERT INTO report_artifacts (report_id, artifact_key, template, params, data_version, status,
+                                              created_by, expires_at)
+                VALUES (%s, %s, %s, %s, %s, 'queued', %s, CURRENT_TIMESTAMP + make_interval(secs => %s))
+                ON CONFLICT (artifact_key) DO UPDATE
+                    SET status = 'queued', content = NULL, error = NULL, created_by = EXCLUDED.created_by,
+                        created_at = CURRENT_TIMESTAMP, finished_at = NULL, expires_at = EXCLUDED.expires_at
+                    WHERE report_artifacts.status = 'failed' OR report_artifacts.expires_at <= CURRENT_TIMESTAMP
+                RETURNING {ARTIFACT_COLUMNS}""",
+            (str(uuid.uuid4()), key, template, params_json, version, created_by, self.ttl)
+        )
+        if row is None:
+            # Someone already rendered (or is rendering) exactly this report
+            existing = self.db.execute_one(
+                f"SELECT {ARTIFACT_COLUMNS} FROM report_artifacts WHERE artifact_key = %s", (key,)
+            )
+            return ReportArtifact.from_db_row(existing), True
+
+        artifact = ReportArtifact.from_db_row(row)
+        self.executor.submit(self._render, artifact.report_id, template, params)
+        return artifact, False
+
+    def get(self, report_id: str) -> Optional[ReportArtifact]:
+        row = self.db.execute_one(f"SELECT {ARTIFACT_COLUMNS} FROM report_artifacts WHERE report_id = %s", (report_id,))
+        return ReportArtifact.from_db_row(row)
+
+    def _execute(self, query: str, params: tuple):
+        with self.db.get_cursor() as cursor:
+            cursor.execute(query, params)
+
+    def _render(self, report_id: str, template: str, params: Dict[str, Any]):
+        try:
+            self._execute("UPDATE report_artifacts SET status = 'running' WHERE report_id = %s", (report_id,))
+            content = REPORT_TEMPLATES[template][1](params)
+            content["generated_at"] = datetime.utcnow().isoformat()
+            self._execute(
+                """UPDATE report_artifacts SET status = 'completed', content = %s, finished_at = CURRENT_TIMESTAMP,
+                          expires_at = CURRENT_TIMESTAMP + make_interval(secs => %s)
+                   WHERE report_id = %s""",
+                (json.dumps(content, default=str), self.ttl, report_id)
+            )
+            logger.info(f"Rendered {template} report {report_id}")
+        except Exception as e:
+            logger.error(f"Report {report_id} ({template}) failed: {e}")
+            try:
+                self._execute(
+                    """UPDATE report_artifacts SET status = 'failed', error = %s, finished_at = CURRENT_TIMESTAMP
+                       WHERE report_id = %s""",
+                    (str(e), report_id)
+                )
+            except Exception as update_error:
+                logger.error(f"Could not record failure of report {report_id}: {update_error}")
+
+    def purge_expired(self) -> int:
+        """Delete artifacts past their expiry"""
+        with self.db.get_cursor() as cursor:
+            cursor.execute("DELETE FROM report_artifacts WHERE expires_at <= CURRENT_TIMESTAMP")
+            return cursor.rowcount
+
+    def start_sweeper(self):
+        """Start the background sweeper thread (idempotent)"""
+        if self._sweeper is not None:
+            return
+        with self._lock:
+            if self._sweeper is not None:
+                return
+            self._sweeper = threading.Thread(target=self._sweep_loop, name="report-artifact-sweeper", daemon=True)
+            self._sweeper.start()
+
+    def stop_sweeper(self):
+        self._stop.set()
+
+    def _sweep_loop(self):
+        while not self._stop.wait(self.sweep_interval):
+            try:
+                deleted = self.purge_expired()
+                if deleted:
+                    logger.info(f"Purged {deleted} expired report artifacts")
+            except Exception as e:
+                logger.warning(f"Report artifact sweep failed: {e}")
+
+# Global instance
+report_service = ReportService()
@@ -0,0 +1,192 @@
+# Reservation service - atomic stock reservation and supply dispatch in one statement
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+from psycopg2.extras import execute_values
+from ..core.database import Database, get_database
+from ..models.warehouse import SupplyWarehouse
+
+logger = logging.getLogger(__name__)
+
+# Why a request was not reserved
+REJECT_REASONS = {
+    "warehouse_not_found": "Warehouse not found",
+    "warehouse_inactive": "Warehouse is not active",
+    "sto_not_found": "STO not found",
+    "insufficient_stock": "Insufficient available stock",
+    "group_rejected": "Another request for the same warehouse was rejected"
+}
+
+# One statement: validate, lock the warehouses in a fixed order, reserve and insert.
+# Requests are grouped per warehouse; a group is reserved in full or not at all.
+RESERVE_SQL = """
+WITH req (idx, warehouse_id, sto_id, quantity, supply_type, estimated_delivery, notes) AS (
+    VALUES %s
+),
+demand AS (
+    SELECT r.warehouse_id, SUM(r.quantity) AS quantity
+    FROM req r
+    LEFT JOIN sto s ON s.sto_id = r.sto_id
+    GROUP BY r.warehouse_id
+    HAVING COUNT(s.sto_id) = COUNT(*)
+),
+locked AS (
+    SELECT w.warehouse_id
+    FROM warehouse w
+    JOIN demand d ON d.warehouse_id = w.warehouse_id
+    WHERE w.status = 'Active'
+    ORDER BY w.warehouse_id
+    FOR UPDATE OF w
+),
+reserved AS (
+    UPDATE warehouse w
+    SET reserved_stock = w.reserved_stock + d.quantity,
+        available_stock = w.current_stock - w.reserved_stock - d.quantity,
+        updated_at = (now() AT TIME ZONE 'UTC')
+    FROM demand d, locked l
+    WHERE w.warehouse_id = d.warehouse_id
+      AND l.warehouse_id = d.warehouse_id
+      AND w.current_stock - w.reserved_stock >= d.quantity
+    RETURNING w.warehouse_id, w.available_stock
+),
+numbered AS (
+    SELECT r.*, nextval(pg_get_serial_sequence('supply_warehouse', 'id')) AS supply_id
+    FROM req r
+    JOIN reserved rs ON rs.warehouse_id = r.warehouse_id
+),
+inserted AS (
+    INSERT INTO supply_warehouse (id, warehouse_id, sto_id, supply_date, quantity_supplied, supply_type,
+                                  status, estimated_delivery, notes, created_at, updated_at)
+    SELECT n.supply_id, n.warehouse_id, n.sto_id, (now() AT TIME ZONE 'UTC'), n.quantity, n.supply_type,
+           'Pending', n.estimated_delivery, n.notes, (now() AT TIME ZONE 'UTC'), (now() AT TIME ZONE 'UTC')
+    FROM numbered n
+    RETURNING id
+)
+SELECT r.idx, n.supply_id, (now() AT TIME ZONE 'UTC'), rs.available_stock,
+       CASE
+           WHEN n.supply_id IS NOT NULL THEN NULL
+           WHEN w.warehouse_id IS NULL THEN 'warehouse_not_found'
+           WHEN w.status <> 'Active' THEN 'warehouse_inactive'
+           WHEN s.sto_id IS NULL THEN 'sto_not_found'
+           WHEN d.warehouse_id IS NULL THEN 'group_rejected'
+           ELSE 'insufficient_stock'
+       END
+FROM req r
+LEFT JOIN numbered n ON n.idx = r.idx
+LEFT JOIN reserved rs ON rs.warehouse_id = r.warehouse_id
+LEFT JOIN warehouse w ON w.warehouse_id = r.warehouse_id
+LEFT JOIN sto s ON s.sto_id = r.sto_id
+LEFT JOIN demand d ON d.warehouse_id = r.warehouse_id
+ORDER BY r.idx
+"""
+
+RESERVE_TEMPLATE = "(%s::int, %s::varchar, %s::varchar, %s::int, %s::varchar, %s::timestamp, %s::text)"
+
+@dataclass
+class ReservationRequest:
+    warehouse_id: str
+    sto_id: str
+    quantity: int
+    supply_type: str = "Regular"
+    estimated_delivery: Optional[datetime] = None
+    notes: Optional[str] = None
+
+@dataclass
+class ReservationResult:
+    """Outcome of one reservation request (``supply`` is set when it was reserved)"""
+    request: ReservationRequest
+    supply: Optional[SupplyWarehouse] = None
+    available_stock: Optional[int] = None
+    reason: Optional[str] = None
+
+    @property
+    def reserved(self) -> bool:
+        return self.supply is not None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "warehouse_id": self.request.warehouse_id,
+            "sto_id": self.request.sto_id,
+            "quantity": self.request.quantity,
+            "reserved": self.reserved,
+            "supply": self.supply.to_dict() if self.supply else None,
+            "available_stock": self.available_stock,
+            "reason": REJECT_REASONS.get(self.reason) if self.reason else None,
+            "reason_code": self.reason
+        }
+
+@dataclass
+class ReservationBatch:
+    results: List[ReservationResult] = field(default_factory=list)
+
+    @property
+    def reserved(self) -> List[ReservationResult]:
+        return [r for r in self.results if r.reserved]
+
+    @property
+    def rejected(self) -> List[ReservationResult]:
+        return [r for r in self.results if not r.reserved]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "reserved": len(self.reserved),
+            "rejected": len(self.rejected),
+            "results": [r.to_dict() for r in self.results]
+        }
+
+class StockReservationEngine:
+    """Reserves warehouse stock and records the supply operations atomically.
+
+    A whole batch is one statement, so one round-trip and one transaction.
+    The warehouses involved are locked with ``FOR UPDATE`` in warehouse_id
+    order (concurrent batches cannot deadlock on each other), and the
+    reservation only applies where ``current_stock - reserved_stock`` still
+    covers the requested total after the lock is held, so concurrent
+    dispatches to one warehouse can never oversell it. Requests for the same
+    warehouse succeed or fail together; other warehouses in the batch are
+    unaffected by a rejection.
+    """
+
+    def __init__(self, db: Optional[Database] = None):
+        self.db = db or get_database()
+
+    def reserve(self, requests: Sequence[ReservationRequest]) -> ReservationBatch:
+        if not requests:
+            return ReservationBatch()
+        rows = [
+            (i, r.warehouse_id, r.sto_id, int(r.quantity), r.supply_type, r.estimated_delivery, r.notes or '')
+            for i, r in enumerate(requests)
+        ]
+        with self.db.get_cursor() as cursor:
+            outcome = execute_values(cursor, RESERVE_SQL, rows, template=RESERVE_TEMPLATE,
+                                     page_size=len(rows), fetch=True)
+
+        batch = ReservationBatch()
+        for idx, supply_id, supply_date, available_stock, reason in outcome:
+            request = requests[idx]
+            supply = None
+            if supply_id is not None:
+                supply = SupplyWarehouse(
+                    id=supply_id,
+                    warehouse_id=request.warehouse_id,
+                    sto_id=request.sto_id,
+                    supply_date=supply_date,
+                    quantity_supplied=int(request.quantity),
+                    supply_type=request.supply_type,
+                    status='Pending',
+                    estimated_delivery=request.estimated_delivery,
+                    notes=request.notes or '',
+                    created_at=supply_date,
+                    updated_at=supply_date
+                )
+            batch.results.append(ReservationResult(request, supply, available_stock, reason))
+        if batch.reserved:
+            logger.info(f"Reserved {len(batch.reserved)} supply operations ({len(batch.rejected)} rejected)")
+        return batch
+
+    def reserve_one(self, request: ReservationRequest) -> ReservationResult:
+        return self.reserve([request]).results[0]
+
+# Global instance
+reservation_engine = StockReservationEngine()
@@ -0,0 +1,130 @@
+# Sales rollup service - backfills and verifies the sales_rollup_* tables
+import argparse
+import logging
+import sys
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional
+from ..core.database import get_database
+
+logger = logging.getLogger(__name__)
+
+# Each rollup: (table, key columns, raw aggregate query over sales_harian in [start, end))
+ROLLUPS = {
+    "daily": (
+        "sales_rollup_daily",
+        ("tanggal",),
+        """SELECT tanggal, SUM(total_barang_terjual), COUNT(*)
+           FROM sales_harian WHERE tanggal >= %s AND tanggal < %s
+           GROUP BY tanggal""",
+        "total_sales, sto_count",
+        "tanggal"
+    ),
+    "weekly": (
+        "sales_rollup_weekly",
+        ("week_start",),
+        """SELECT DATE_TRUNC('week', tanggal)::date, SUM(total_barang_terjual), COUNT(*)
+           FROM sales_harian WHERE tanggal >= %s AND tanggal < %s
+           GROUP BY 1""",
+        "total_sales, day_count",
+        "week_start"
+    ),
+    "sto_weekly": (
+        "sales_rollup_sto_weekly",
+        ("sto_id", "week_start"),
+        """SELECT sto_id, DATE_TRUNC('week', tanggal)::date, SUM(total_barang_terjual), COUNT(*)
+           FROM sales_harian WHERE tanggal >= %s AND tanggal < %s
+           GROUP BY 1, 2""",
+        "total_sales, day_count",
+        "week_start"
+    )
+}
+
+class RollupService:
+    def __init__(self):
+        self.db = get_database()
+
+    def _date_range(self, start: Optional[date], end: Optional[date]) -> tuple:
+        """Resolve the backfill window, widened to whole ISO weeks so weekly buckets are complete"""
+        if start is None or end is None:
+            bounds = self.db.execute_one("SELECT MIN(tanggal), MAX(tanggal) FROM sales_harian")
+            start = start or (bounds[0] if bounds and bounds[0] else date.today())
+            end = end or (bounds[1] if bounds and bounds[1] else date.today())
+        start = start - timedelta(days=start.weekday())
+        end = end + timedelta(days=7 - end.weekday())  # exclusive, next Monday
+        return start, end
+
+    def backfill(self, start: Optional[date] = None, end: Optional[date] = None) -> Dict[str, int]:
+        """Rebuild rollups for a date window from the raw table in one transaction"""
+        start, end = self._date_range(start, end)
+        counts = {}
+        with self.db.get_cursor() as cursor:
+            # Hold off concurrent sales writes so trigger deltas cannot interleave with the rebuild
+            cursor.execute("LOCK TABLE sales_harian IN SHARE MODE")
+            for name, (table, keys, raw_query, value_columns, date_column) in ROLLUPS.items():
+                cursor.execute(
+                    f"DELETE FROM {table} WHERE {date_column} >= %s AND {date_column} < %s",
+                    (start, end)
+                )
+                columns = ", ".join(keys) + ", " + value_columns
+                cursor.execute(f"INSERT INTO {table} ({columns}) {raw_query}", (start, end))
+                counts[name] = cursor.rowcount
+        logger.info(f"Backfilled sales rollups for {start} - {end}: {counts}")
+        return counts
+
+    def verify(self, start: Optional[date] = None, end: Optional[date] = None) -> Dict[str, List[Dict[str, Any]]]:
+        """Compare rollups with fresh aggregates of the raw table; returns mismatching buckets"""
+        start, end = self._date_range(start, end)
+        mismatches = {}
+        for name, (table, keys, raw_query, value_columns, date_column) in ROLLUPS.items():
+            key_list = ", ".join(keys)
+            values = [c.strip() for c in value_columns.split(",")]
+            join_on = " AND ".join(f"r.{k} = x.{k}" for k in keys)
+            differs = " OR ".join(f"r.{v} IS DISTINCT FROM x.{v}" for v in values)
+            rows = self.db.execute_query(
+                f"""WITH raw ({key_list}, {value_columns}) AS ({raw_query}),
+                        rollup AS (SELECT {key_list}, {value_columns} FROM {table}
+                                   WHERE {date_column} >= %s AND {date_column} < %s)
+                    SELECT {", ".join(f"COALESCE(r.{k}, x.{k})" for k in keys)},
+                           {", ".join(f"x.{v}" for v in values)},
+                           {", ".join(f"r.{v}" for v in values)}
+                    FROM rollup r FULL OUTER JOIN raw x ON {join_on}
+                    WHERE {differs}""",
+                (start, end, start, end)
+            )
+            mismatches[name] = [
+                {
+                    "key": row[:len(keys)],
+                    "expected": row[len(keys):len(keys) + len(values)],
+                    "actual": row[len(keys) + len(values):]
+                }
+                for row in rows
+            ]
+        return mismatches
+
+# Global instance
+rollup_service = RollupService()
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """CLI: python -m app.services.rollup_service {backfill,verify} [--start DATE] [--end DATE]"""
+    parser = argparse.ArgumentParser(description="Maintain sales rollup tables")
+    parser.add_argument("command", choices=["backfill", "verify"])
+    parser.add_argument("--start", type=date.fromisoformat, help="first date (YYYY-MM-DD), default earliest sale")
+    parser.add_argument("--end", type=date.fromisoformat, help="last date (YYYY-MM-DD), default latest sale")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    if args.command == "backfill":
+        counts = rollup_service.backfill(args.start, args.end)
+        print(f"Backfilled rollups: {counts}")
+        return 0
+
+    mismatches = rollup_service.verify(args.start, args.end)
+    total = sum(len(rows) for rows in mismatches.values())
+    for name, rows in mismatches.items():
+        print(f"{name}: {len(rows)} mismatched bucket(s)")
+        for row in rows[:20]:
+            print(f"  {row['key']}: expected {row['expected']}, rollup has {row['actual']}")
+    return 1 if total else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+# Search service - indexed, ranked lookup over STOs and warehouses
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+from ..core.database import get_database
+
+logger = logging.getLogger(__name__)
+
+# Searchable entities: table, key column, columns returned by search()
+SEARCH_TARGETS = {
+    "sto": ("sto", "sto_id", ("sto_id", "name", "location", "region", "status")),
+    "warehouse": ("warehouse", "warehouse_id", ("warehouse_id", "name", "location", "region", "status"))
+}
+
+def escape_like(term: str) -> str:
+    """Escape LIKE wildcards so user input is matched literally"""
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+class SearchService:
+    """Search over the ``search_text`` column of STOs and warehouses.
+
+    ``search_text`` is a stored lower-cased concatenation of id, name and
+    location. With pg_trgm installed it carries a GIN trigram index, so
+    substring matches use the index and results are ranked by
+    ``word_similarity``. Prefix (typeahead) lookups use btree
+    ``text_pattern_ops`` indexes on the id and name. Without the extension
+    the same queries fall back to plain pattern matching.
+    """
+
+    def __init__(self):
+        self.db = get_database()
+        self._has_trgm: Optional[bool] = None
+        self._lock = threading.Lock()
+
+    @property
+    def has_trgm(self) -> bool:
+        """Whether pg_trgm is installed (checked once per process)"""
+        if self._has_trgm is None:
+            with self._lock:
+                if self._has_trgm is None:
+                    try:
+                        row = self.db.execute_one("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+                        self._has_trgm = bool(row)
+                    except Exception as e:
+                        logger.warning(f"Could not detect pg_trgm, using fallback search: {e}")
+                        self._has_trgm = False
+                    if not self._has_trgm:
+                        logger.info("pg_trgm not installed; search falls back to unindexed pattern matching")
+        return self._has_trgm
+
+    @staticmethod
+    def filter_clause(term: str) -> Tuple[str, List[Any]]:
+        """WHERE fragment for substring search, usable by list endpoints with their own ordering"""
+        return "search_text LIKE %s", [f"%{escape_like(term.lower())}%"]
+
+    def search(self, entity: str, term: str, mode: str = "contains", limit: int = 10) -> List[Dict[str, Any]]:
+        """Ranked search; ``mode`` is 'contains' (substring/fuzzy) or 'prefix' (typeahead)"""
+        table, key, columns = SEARCH_TARGETS[entity]
+        term = term.strip().lower()
+        if not term:
+            return []
+
+        select_list = ", ".join(columns)
+        if mode == "prefix":
+            pattern = f"{escape_like(term)}%"
+            # Separate branches so each can use its own text_pattern_ops index
+            rows = self.db.execute_query(
+                f"""SELECT {select_list}, rank FROM (
+                        SELECT {select_list}, 2 as rank FROM {table} WHERE lower({key}) LIKE %s
+                        UNION
+                        SELECT {select_list}, 1 as rank FROM {table} WHERE lower(name) LIKE %s
+                    ) matches
+                    ORDER BY rank DESC, {key}
+                    LIMIT %s""",
+                (pattern, pattern, limit * 2)
+            )
+            seen, results = set(), []
+            for row in rows:
+                if row[0] in seen:
+                    continue
+                seen.add(row[0])
+                results.append(self._to_dict(columns, row))
+                if len(results) >= limit:
+                    break
+            return results
+
+        pattern = f"%{escape_like(term)}%"
+        if self.has_trgm:
+            # '%>' (word similarity) adds typo-tolerant matches that plain LIKE would miss
+            rows = self.db.execute_query(
+                f"""SELECT {select_list}, word_similarity(%s, search_text) as rank
+                    FROM {table}
+                    WHERE search_text LIKE %s OR %s <%% search_text
+                    ORDER BY rank DESC, {key}
+                    LIMIT %s""",
+                (term, pattern, term, limit)
+            )
+        else:
+            rows = self.db.execute_query(
+                f"""SELECT {select_list},
+                           CASE WHEN lower({key}) = %s THEN 3
+                                WHEN search_text LIKE %s THEN 2
+                                ELSE 1 END as rank
+                    FROM {table}
+                    WHERE search_text LIKE %s
+                    ORDER BY rank DESC, {key}
+                    LIMIT %s""",
+                (term, f"{escape_like(term)}%", pattern, limit)
+            )
+        return [self._to_dict(columns, row) for row in rows]
+
+    @staticmethod
+    def _to_dict(columns: tuple, row: tuple) -> Dict[str, Any]:
+        result = dict(zip(columns, row))
+        result["rank"] = round(float(row[len(columns)]), 4)
+        return result
+
+# Global instance
+search_service = SearchService()
@@ -0,0 +1,151 @@
+# Spatial index - in-memory nearest-neighbour and radius lookups between STOs and warehouses
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..core.config import settings
+from ..core.database import Database, get_database
+from .allocation_solver import EARTH_RADIUS_KM
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:  # pragma: no cover - optional dependency
+    cKDTree = None
+
+logger = logging.getLogger(__name__)
+
+# Entities with coordinates: table and key column
+SPATIAL_TARGETS = {
+    "sto": ("sto", "sto_id"),
+    "warehouse": ("warehouse", "warehouse_id")
+}
+
+def to_unit_vectors(lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+    """Points on the unit sphere; chord length there is monotonic in great-circle distance"""
+    lat, lon = np.radians(np.asarray(lat, dtype=float)), np.radians(np.asarray(lon, dtype=float))
+    return np.column_stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)])
+
+def chord_to_km(chord: np.ndarray) -> np.ndarray:
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.clip(np.asarray(chord) / 2, 0.0, 1.0))
+
+def km_to_chord(km: float) -> float:
+    return 2 * np.sin(min(km / EARTH_RADIUS_KM, np.pi) / 2)
+
+class SpatialIndex:
+    """KD-tree over points on the unit sphere.
+
+    Great-circle queries become Euclidean ones on 3-D unit vectors, so a
+    plain KD-tree answers k-nearest and within-radius lookups exactly
+    (no lat/lon distortion near the poles or the antimeridian). Uses scipy's
+    cKDTree; without scipy the same queries run as a vectorized scan, which
+    is still fast at the size of a warehouse fleet.
+    """
+
+    def __init__(self, ids: Sequence[str], lat: Sequence[Optional[float]], lon: Sequence[Optional[float]]):
+        lat = np.array([v if v is not None else np.nan for v in lat], dtype=float)
+        lon = np.array([v if v is not None else np.nan for v in lon], dtype=float)
+        located = ~(np.isnan(lat) | np.isnan(lon))
+        self.ids = [i for i, ok in zip(ids, located) if ok]
+        self.coords = {i: (float(a), float(o)) for i, a, o, ok in zip(ids, lat, lon, located) if ok}
+        self.points = to_unit_vectors(lat[located], lon[located])
+        self.tree = cKDTree(self.points) if cKDTree is not None and len(self.ids) else None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def location(self, key: str) -> Optional[Tuple[float, float]]:
+        return self.coords.get(key)
+
+    def nearest(self, lat: float, lon: float, k: int = 5,
+                max_km: Optional[float] = None) -> List[Tuple[str, float]]:
+        """Up to ``k`` (id, km) pairs, nearest first"""
+        if not self.ids:
+            return []
+        k = min(k, len(self.ids))
+        point = to_unit_vectors([lat], [lon])[0]
+        bound = km_to_chord(max_km) if max_km is not None else np.inf
+        if self.tree is not None:
+            chords, index = self.tree.query(point, k=k, distance_upper_bound=bound)
+            chords, index = np.atleast_1d(chords), np.atleast_1d(index)
+        else:
+            all_chords = np.linalg.norm(self.points - point, axis=1)
+            index = np.argsort(all_chords, kind="stable")[:k]
+            chords = all_chords[index]
+        found = np.isfinite(chords) & (chords <= bound)
+        return [(self.ids[i], round(float(km), 3)) for i, km in zip(index[found], chord_to_km(chords[found]))]
+
+    def within(self, lat: float, lon: float, radius_km: float) -> List[Tuple[str, float]]:
+        """Every (id, km) pair within ``radius_km``, nearest first"""
+        if not self.ids:
+            return []
+        point = to_unit_vectors([lat], [lon])[0]
+        bound = km_to_chord(radius_km)
+        if self.tree is not None:
+            index = np.array(self.tree.query_ball_point(point, bound), dtype=int)
+        else:
+            index = np.nonzero(np.linalg.norm(self.points - point, axis=1) <= bound)[0]
+        if not len(index):
+            return []
+        chords = np.linalg.norm(self.points[index] - point, axis=1)
+        order = np.argsort(chords, kind="stable")
+        return [(self.ids[i], round(float(km), 3)) for i, km in zip(index[order], chord_to_km(chords[order]))]
+
+class SpatialIndexService:
+    """Process-wide spatial indexes of STO and warehouse coordinates.
+
+    Each index is built on first use and rebuilt after ``invalidate`` (called
+    by the STO and warehouse write paths) or after ``SPATIAL_INDEX_TTL``
+    seconds, which bounds staleness for writes made by other processes.
+    Only coordinates are indexed; volatile data such as stock is read
+    fresh for the ids a query returns.
+    """
+
+    def __init__(self, db: Optional[Database] = None, ttl: Optional[float] = None):
+        self.db = db or get_database()
+        self.ttl = ttl or settings.SPATIAL_INDEX_TTL
+        self._indexes: Dict[str, Tuple[float, SpatialIndex]] = {}
+        self._lock = threading.Lock()
+
+    def index(self, entity: str) -> SpatialIndex:
+        entry = self._indexes.get(entity)
+        if entry is not None and time.monotonic() - entry[0] < self.ttl:
+            return entry[1]
+        with self._lock:
+            entry = self._indexes.get(entity)
+            if entry is not None and time.monotonic() - entry[0] < self.ttl:
+                return entry[1]
+            table, key = SPATIAL_TARGETS[entity]
+            rows = self.db.execute_query(
+                f"SELECT {key}, latitude, longitude FROM {table} WHERE status = 'Active' ORDER BY {key}"
+            )
+            index = SpatialIndex([r[0] for r in rows], [r[1] for r in rows], [r[2] for r in rows])
+            self._indexes[entity] = (time.monotonic(), index)
+            logger.info(f"Built {entity} spatial index: {len(index)} of {len(rows)} active rows have coordinates")
+            return index
+
+    def invalidate(self, *entities: str):
+        with self._lock:
+            for entity in entities or tuple(SPATIAL_TARGETS):
+                self._indexes.pop(entity, None)
+
+    def nearest(self, entity: str, lat: float, lon: float, k: int = 5,
+                max_km: Optional[float] = None) -> List[Tuple[str, float]]:
+        return self.index(entity).nearest(lat, lon, k, max_km)
+
+    def within(self, entity: str, lat: float, lon: float, radius_km: float) -> List[Tuple[str, float]]:
+        return self.index(entity).within(lat, lon, radius_km)
+
+    def location(self, entity: str, key: str) -> Optional[Tuple[float, float]]:
+        return self.index(entity).location(key)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            entity: {"points": len(index), "age_seconds": round(time.monotonic() - built, 1)}
+            for entity, (built, index) in self._indexes.items()
+        }
+
+# Global instance
+spatial_index = SpatialIndexService()
@@ -0,0 +1,178 @@
+# Upload registry - content-hash dedupe and resumable transfer/ingest state for uploads
+import json
+import logging
+import os
+import uuid
+from typing import Any, BinaryIO, Dict, Optional
+from ..core.config import settings
+from ..core.database import Database, get_database
+from ..core.security import Security
+from ..models.upload import UploadRecord
+from .ingest_service import IngestError
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_COLUMNS = """id, upload_id, upload_type, filename, file_hash, status, total_bytes,
+                    bytes_received, report, error, created_at, updated_at"""
+
+class UploadOffsetError(Exception):
+    """Raised when a resumed chunk does not start where the stored bytes end"""
+    def __init__(self, expected: int, received: int):
+        super().__init__(f"Upload offset mismatch: expected {expected}, got {received}")
+        self.expected = expected
+        self.received = received
+
+class UploadRegistry:
+    """Tracks uploads in ``upload_registry``.
+
+    A file that completed before (same type and MD5) is not processed again.
+    Large files can be sent in several requests: bytes are appended to a part
+    file under ``UPLOAD_FOLDER`` and ``bytes_received`` is the offset to resume
+    from. During ingest the report is saved after every committed chunk, so a
+    failed or interrupted ingest restarts after the last committed chunk.
+    """
+
+    def __init__(self, db: Optional[Database] = None, folder: Optional[str] = None):
+        self.db = db or get_database()
+        self.folder = folder or settings.UPLOAD_FOLDER
+
+    def _execute(self, query: str, params: tuple):
+        with self.db.get_cursor() as cursor:
+            cursor.execute(query, params)
+
+    def part_path(self, upload_id: str) -> str:
+        return os.path.join(self.folder, f"{upload_id}.part")
+
+    def get(self, upload_id: str) -> Optional[UploadRecord]:
+        row = self.db.execute_one(
+            f"SELECT {UPLOAD_COLUMNS} FROM upload_registry WHERE upload_id = %s", (upload_id,)
+        )
+        return UploadRecord.from_db_row(row)
+
+    def find_by_hash(self, upload_type: str, file_hash: str,
+                     exclude_upload_id: Optional[str] = None) -> Optional[UploadRecord]:
+        """Most useful earlier upload of the same content: completed first, then resumable"""
+        row = self.db.execute_one(
+            f"""SELECT {UPLOAD_COLUMNS} FROM upload_registry
+                WHERE upload_type = %s AND file_hash = %s AND upload_id IS DISTINCT FROM %s
+                  AND status IN ('completed', 'processing', 'failed')
+                ORDER BY status = 'completed' DESC, updated_at DESC
+                LIMIT 1""",
+            (upload_type, file_hash, exclude_upload_id)
+        )
+        return UploadRecord.from_db_row(row)
+
+    def claim(self, upload_id: str) -> Optional[UploadRecord]:
+        """Take over a failed (or abandoned) ingest for this request.
+
+        Moves the record to 'processing' only if it is 'failed', or 'processing'
+        without progress for ``UPLOAD_PROCESSING_TIMEOUT`` seconds (its worker
+        died). Returns None while another request holds it, so two requests
+        never ingest into the same record at once.
+        """
+        row = self.db.execute_one(
+            f"""UPDATE upload_registry
+                SET status = 'processing', error = NULL, updated_at = CURRENT_TIMESTAMP
+                WHERE upload_id = %s
+                  AND (status = 'failed'
+                       OR (status = 'processing'
+                           AND updated_at < CURRENT_TIMESTAMP - make_interval(secs => %s)))
+                RETURNING {UPLOAD_COLUMNS}""",
+            (upload_id, settings.UPLOAD_PROCESSING_TIMEOUT)
+        )
+        return UploadRecord.from_db_row(row)
+
+    def create(self, upload_type: str, filename: str, status: str = "receiving",
+               file_hash: Optional[str] = None, total_bytes: Optional[int] = None) -> UploadRecord:
+        row = self.db.execute_one(
+            f"""INSERT INTO upload_registry (upload_id, upload_type, filename, file_hash, status, total_bytes, bytes_received)
+                VALUES (%s, %s, %s, %s, %s, %s, %s)
+                RETURNING {UPLOAD_COLUMNS}""",
+            (str(uuid.uuid4()), upload_type, filename, file_hash, status, total_bytes,
+             0 if status == "receiving" else total_bytes or 0)
+        )
+        return UploadRecord.from_db_row(row)
+
+    def append(self, record: UploadRecord, offset: int, stream: BinaryIO, max_bytes: int,
+               chunk_size: int = 1024 * 1024) -> int:
+        """Append a request body to the part file at ``offset``; returns the new byte count"""
+        if record.status != "receiving":
+            raise UploadOffsetError(record.bytes_received, offset)
+        path = self.part_path(record.upload_id)
+        os.makedirs(self.folder, exist_ok=True)
+        # A crash between writing the part file and updating the registry leaves the
+        # file ahead of bytes_received; resume from whichever is shorter
+        stored = min(record.bytes_received, os.path.getsize(path) if os.path.exists(path) else 0)
+        if offset != stored:
+            raise UploadOffsetError(stored, offset)
+
+        written = stored
+        with open(path, "ab") as part:
+            part.truncate(stored)
+            while True:
+                block = stream.read(chunk_size)
+                if not block:
+                    break
+                written += len(block)
+                if written > max_bytes:
+                    part.truncate(stored)
+                    raise IngestError(f"File exceeds maximum size of {settings.MAX_FILE_SIZE_MB} MB")
+                part.write(block)
+            part.flush()
+            os.fsync(part.fileno())
+
+        self._execute(
+            "UPDATE upload_registry SET bytes_received = %s, updated_at = CURRENT_TIMESTAMP WHERE upload_id = %s",
+            (written, record.upload_id)
+        )
+        record.bytes_received = written
+        return written
+
+    def finish_receiving(self, record: UploadRecord) -> str:
+        """Hash the assembled part file and move the upload to 'processing'"""
+        with open(self.part_path(record.upload_id), "rb") as part:
+            file_hash = Security.hash_file_stream(part)
+        self._execute(
+            """UPDATE upload_registry
+               SET file_hash = %s, status = 'processing', total_bytes = bytes_received, updated_at = CURRENT_TIMESTAMP
+               WHERE upload_id = %s""",
+            (file_hash, record.upload_id)
+        )
+        record.file_hash = file_hash
+        record.status = "processing"
+        record.total_bytes = record.bytes_received
+        return file_hash
+
+    def save_progress(self, upload_id: str, report: Dict[str, Any], status: str = "processing",
+                      error: Optional[str] = None):
+        """Persist the ingest report as of the last committed chunk"""
+        self._execute(
+            """UPDATE upload_registry
+               SET report = %s, status = %s, error = %s, updated_at = CURRENT_TIMESTAMP
+               WHERE upload_id = %s""",
+            (json.dumps(report, default=str), status, error, upload_id)
+        )
+
+    def complete(self, upload_id: str, report: Dict[str, Any]):
+        self.save_progress(upload_id, report, status="completed")
+        self.discard_part(upload_id)
+
+    def fail(self, upload_id: str, error: str, report: Optional[Dict[str, Any]] = None):
+        """Mark an ingest as failed, keeping the part file and report so it can be resumed"""
+        self._execute(
+            """UPDATE upload_registry
+               SET status = 'failed', error = %s, report = COALESCE(%s, report), updated_at = CURRENT_TIMESTAMP
+               WHERE upload_id = %s""",
+            (error, json.dumps(report, default=str) if report is not None else None, upload_id)
+        )
+
+    def discard_part(self, upload_id: str):
+        try:
+            os.remove(self.part_path(upload_id))
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Could not remove part file for upload {upload_id}: {e}")
+
+# Global instance
+upload_registry = UploadRegistry()
@@ -0,0 +1,53 @@
+"""Benchmark: fleet-wide supply allocation (HiGHS LP) vs. the greedy nearest-first fallback.
+
+Random STOs and warehouses over Java; demand can exceed stock so the
+shortfall term matters. Run from the backend directory:
+    python -m benchmarks.bench_allocation --stos 800 --warehouses 60 --candidates 20
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.services.allocation_solver import _solve_greedy, candidate_arcs, haversine_km, solve_allocation
+
+def make_problem(n_sto: int, n_warehouse: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    sto_lat, sto_lon = rng.uniform(-8.5, -6.0, n_sto), rng.uniform(105.0, 114.5, n_sto)
+    wh_lat, wh_lon = rng.uniform(-8.5, -6.0, n_warehouse), rng.uniform(105.0, 114.5, n_warehouse)
+    demand = rng.poisson(40, n_sto).astype(float)
+    supply = rng.integers(200, 900, n_warehouse).astype(float)
+    return haversine_km(sto_lat, sto_lon, wh_lat, wh_lon), demand, supply
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--stos", type=int, default=800)
+    parser.add_argument("--warehouses", type=int, default=60)
+    parser.add_argument("--candidates", type=int, default=20, help="nearest warehouses kept per STO")
+    parser.add_argument("--penalty", type=float, default=100000)
+    args = parser.parse_args()
+
+    distance, demand, supply = make_problem(args.stos, args.warehouses)
+    sto_ids = [f"S{i:04d}" for i in range(args.stos)]
+    warehouse_ids = [f"W{j:03d}" for j in range(args.warehouses)]
+    print(f"{args.stos} STOs x {args.warehouses} warehouses, demand {int(demand.sum())}, stock {int(supply.sum())}")
+
+    for label, candidates in (("all arcs", None), (f"{args.candidates} nearest", args.candidates)):
+        start = time.perf_counter()
+        mask = candidate_arcs(distance, None, candidates)
+        result = solve_allocation(sto_ids, demand, warehouse_ids, supply, distance, args.penalty, mask)
+        seconds = time.perf_counter() - start
+        summary = result.summary()
+        print(f"  {result.method} ({label:<12}): {seconds * 1000:8.1f} ms, allocated {summary['allocated']}, "
+              f"shortfall {summary['shortfall']}, avg {summary['avg_distance_km']} km/unit")
+
+    rows, cols = np.nonzero(np.isfinite(distance))
+    start = time.perf_counter()
+    quantities, shortfall, _ = _solve_greedy(np.rint(demand), np.rint(supply), rows, cols, distance[rows, cols])
+    seconds = time.perf_counter() - start
+    shipped = quantities.sum()
+    print(f"  greedy (all arcs)      : {seconds * 1000:8.1f} ms, allocated {int(shipped)}, "
+          f"shortfall {int(shortfall.sum())}, avg {(quantities * distance[rows, cols]).sum() / shipped:.2f} km/unit")
+
+if __name__ == "__main__":
+    main()
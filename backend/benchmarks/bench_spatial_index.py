@@ -0,0 +1,58 @@
+"""Benchmark: spatial index k-nearest / radius queries vs. a full haversine scan.
+
+Run from the backend directory:
+    python -m benchmarks.bench_spatial_index --points 5000 --queries 20000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.services.allocation_solver import haversine_km
+from app.services.spatial_index import SpatialIndex
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--points", type=int, default=5000, help="indexed locations")
+    parser.add_argument("--queries", type=int, default=20000)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--radius", type=float, default=50.0, help="km")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    lat, lon = rng.uniform(-8.5, 6.0, args.points), rng.uniform(95.0, 141.0, args.points)
+    ids = [f"W{i:05d}" for i in range(args.points)]
+    query_lat, query_lon = rng.uniform(-8.5, 6.0, args.queries), rng.uniform(95.0, 141.0, args.queries)
+
+    start = time.perf_counter()
+    index = SpatialIndex(ids, lat.tolist(), lon.tolist())
+    print(f"Built index over {len(index)} points in {(time.perf_counter() - start) * 1000:.1f} ms "
+          f"({'cKDTree' if index.tree is not None else 'vectorized scan'})")
+
+    start = time.perf_counter()
+    for a, o in zip(query_lat, query_lon):
+        index.nearest(a, o, args.k)
+    knn_us = (time.perf_counter() - start) / args.queries * 1e6
+
+    start = time.perf_counter()
+    for a, o in zip(query_lat, query_lon):
+        index.within(a, o, args.radius)
+    radius_us = (time.perf_counter() - start) / args.queries * 1e6
+
+    scan_queries = min(args.queries, 2000)
+    start = time.perf_counter()
+    for a, o in zip(query_lat[:scan_queries], query_lon[:scan_queries]):
+        np.argsort(haversine_km([a], [o], lat, lon)[0])[:args.k]
+    scan_us = (time.perf_counter() - start) / scan_queries * 1e6
+
+    # Same answers as the scan
+    for a, o in zip(query_lat[:100], query_lon[:100]):
+        expected = [ids[i] for i in np.argsort(haversine_km([a], [o], lat, lon)[0])[:args.k]]
+        assert [i for i, _ in index.nearest(a, o, args.k)] == expected
+
+    print(f"  k={args.k} nearest        : {knn_us:8.1f} us/query")
+    print(f"  within {args.radius:g} km       : {radius_us:8.1f} us/query")
+    print(f"  haversine scan + sort : {scan_us:8.1f} us/query")
+
+if __name__ == "__main__":
+    main()
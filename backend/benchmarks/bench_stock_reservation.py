@@ -0,0 +1,96 @@
+"""Benchmark: multi-statement supply dispatch vs. the single-statement reservation engine.
+
+Many threads dispatch to one warehouse at once. The legacy path (existence
+SELECTs, INSERT, then UPDATE, each on its own pooled transaction) is compared
+with StockReservationEngine for throughput and for overselling. Needs the
+configured database; a scratch warehouse is created and removed.
+Run from the backend directory:
+    python -m benchmarks.bench_stock_reservation --threads 16 --dispatches 2000 --stock 1500
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from app.core.database import get_database
+from app.services.reservation_service import ReservationRequest, StockReservationEngine
+
+WAREHOUSE_ID = "WHBENCH"
+
+def reset_warehouse(db, stock: int):
+    with db.get_cursor() as cursor:
+        cursor.execute("DELETE FROM supply_warehouse WHERE warehouse_id = %s", (WAREHOUSE_ID,))
+        cursor.execute(
+            """INSERT INTO warehouse (warehouse_id, name, location, region, capacity, current_stock,
+                                      reserved_stock, available_stock)
+               VALUES (%s, 'Benchmark', 'Benchmark', 'Benchmark', %s, %s, 0, %s)
+               ON CONFLICT (warehouse_id) DO UPDATE
+                   SET current_stock = EXCLUDED.current_stock, reserved_stock = 0,
+                       available_stock = EXCLUDED.available_stock, status = 'Active'""",
+            (WAREHOUSE_ID, stock, stock, stock)
+        )
+
+def legacy_dispatch(db, sto_id: str) -> bool:
+    """The previous create_supply_operation sequence, with a stock check added"""
+    if not db.execute_one("SELECT id FROM warehouse WHERE warehouse_id = %s", (WAREHOUSE_ID,)):
+        return False
+    if not db.execute_one("SELECT id FROM sto WHERE sto_id = %s", (sto_id,)):
+        return False
+    available = db.execute_one("SELECT current_stock - reserved_stock FROM warehouse WHERE warehouse_id = %s",
+                               (WAREHOUSE_ID,))
+    if available[0] < 1:
+        return False
+    now = datetime.utcnow()
+    db.execute_insert(
+        """INSERT INTO supply_warehouse (warehouse_id, sto_id, supply_date, quantity_supplied, supply_type,
+                                         status, created_at, updated_at)
+           VALUES (%s, %s, %s, 1, 'Regular', 'Pending', %s, %s) RETURNING id""",
+        (WAREHOUSE_ID, sto_id, now, now, now)
+    )
+    with db.get_cursor() as cursor:
+        cursor.execute(
+            "UPDATE warehouse SET reserved_stock = reserved_stock + 1, available_stock = available_stock - 1 WHERE warehouse_id = %s",
+            (WAREHOUSE_ID,)
+        )
+    return True
+
+def run(label: str, dispatch, threads: int, calls: int, db, stock: int, per_call: int = 1):
+    reset_warehouse(db, stock)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        outcomes = list(pool.map(lambda _: dispatch(), range(calls)))
+    seconds = time.perf_counter() - start
+    reserved = db.execute_one("SELECT reserved_stock FROM warehouse WHERE warehouse_id = %s", (WAREHOUSE_ID,))[0]
+    rows = db.execute_one("SELECT COALESCE(SUM(quantity_supplied), 0) FROM supply_warehouse WHERE warehouse_id = %s",
+                          (WAREHOUSE_ID,))[0]
+    print(f"  {label:<28}: {calls * per_call / seconds:8.0f} dispatches/s, {sum(outcomes)} accepted, "
+          f"{rows} units dispatched, oversold by {max(rows - stock, 0)}, reserved_stock={reserved}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--dispatches", type=int, default=2000)
+    parser.add_argument("--stock", type=int, default=1500)
+    parser.add_argument("--bulk", type=int, default=50, help="requests per bulk reservation")
+    args = parser.parse_args()
+
+    db = get_database()
+    sto_id = db.execute_one("SELECT sto_id FROM sto ORDER BY sto_id LIMIT 1")[0]
+    engine = StockReservationEngine(db)
+    request = ReservationRequest(WAREHOUSE_ID, sto_id, 1)
+
+    print(f"{args.dispatches} single-unit dispatches from {args.threads} threads against {args.stock} units")
+    try:
+        run("legacy (4-5 round-trips)", lambda: legacy_dispatch(db, sto_id), args.threads, args.dispatches, db, args.stock)
+        run("reservation engine", lambda: engine.reserve_one(request).reserved, args.threads, args.dispatches,
+            db, args.stock)
+        batches = args.dispatches // args.bulk
+        run(f"engine, bulk x{args.bulk}", lambda: len(engine.reserve([request] * args.bulk).reserved),
+            args.threads, batches, db, args.stock, per_call=args.bulk)
+    finally:
+        with db.get_cursor() as cursor:
+            cursor.execute("DELETE FROM supply_warehouse WHERE warehouse_id = %s", (WAREHOUSE_ID,))
+            cursor.execute("DELETE FROM warehouse WHERE warehouse_id = %s", (WAREHOUSE_ID,))
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,18 @@
 -- Database initialization script for Supply Prediction System
 -- Based on the requirements: sales_harian, arsitektur_jaringan, metadata_sto, warehouse
--- Output tables: avg_sales, ketersediaan_arsitektur, final_pemodelan, supply_warehouse
--- System tables: users, predictions_cache, system_config
+-- Output tables: avg_sales, ketersediaan_arsitektur, final_pemodelan, prediction_history, supply_warehouse
+-- System tables: users, predictions_cache, prediction_jobs, report_artifacts, upload_registry, system_config
 
 -- Drop tables if they exist (for development)
+DROP TABLE IF EXISTS prediction_history CASCADE;
+DROP TABLE IF EXISTS prediction_jobs CASCADE;
+DROP TABLE IF EXISTS report_artifacts CASCADE;
+DROP TABLE IF EXISTS upload_registry CASCADE;
+DROP TABLE IF EXISTS sto_seasonality CASCADE;
+DROP TABLE IF EXISTS sto_feature_stats CASCADE;
+DROP TABLE IF EXISTS sales_rollup_sto_weekly CASCADE;
+DROP TABLE IF EXISTS sales_rollup_weekly CASCADE;
+DROP TABLE IF EXISTS sales_rollup_daily CASCADE;
 DROP TABLE IF EXISTS system_config CASCADE;
 DROP TABLE IF EXISTS predictions_cache CASCADE;
 DROP TABLE IF EXISTS supply_warehouse CASCADE;
@@ -41,7 +50,9 @@ CREATE TABLE sto (
     longitude DECIMAL(11, 8),
     status VARCHAR(20) DEFAULT 'Active',
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    -- Lower-cased id/name/location for indexed search
+    search_text TEXT GENERATED ALWAYS AS (lower(sto_id || ' ' || name || ' ' || location)) STORED
 );
 
 -- Warehouse table
@@ -51,6 +62,8 @@ CREATE TABLE warehouse (
     name VARCHAR(255) NOT NULL,
     location VARCHAR(255) NOT NULL,
     region VARCHAR(100) NOT NULL,
+    latitude DECIMAL(10, 8),
+    longitude DECIMAL(11, 8),
     capacity INTEGER NOT NULL DEFAULT 0,
     current_stock INTEGER NOT NULL DEFAULT 0,
     reserved_stock INTEGER NOT NULL DEFAULT 0,
@@ -59,7 +72,9 @@ CREATE TABLE warehouse (
     contact_phone VARCHAR(20),
     status VARCHAR(20) DEFAULT 'Active',
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    -- Lower-cased id/name/location for indexed search
+    search_text TEXT GENERATED ALWAYS AS (lower(warehouse_id || ' ' || name || ' ' || location)) STORED
 );
 
 -- Input Tables (from requirements)
@@ -82,7 +97,8 @@ CREATE TABLE arsitektur_jaringan (
     jumlah_port INTEGER NOT NULL DEFAULT 0,
     utilisasi DECIMAL(5, 2) NOT NULL DEFAULT 0.0, -- percentage 0-100
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (sto_id, jenis_arsitektur)
 );
 
 -- STO metadata
@@ -138,7 +154,8 @@ CREATE TABLE final_pemodelan (
     risk_level VARCHAR(20) DEFAULT 'Low', -- Low, Medium, High
     action_required TEXT,
     model_accuracy DECIMAL(5, 2) DEFAULT 0.0,
-    last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (sto_id, prediction_period)
 );
 
 -- Supply warehouse operations
@@ -157,6 +174,76 @@ CREATE TABLE supply_warehouse (
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Sales rollups (maintained incrementally by triggers on sales_harian)
+-- Fleet-wide daily totals; sto_count is the number of STOs reporting that day
+CREATE TABLE sales_rollup_daily (
+    tanggal DATE PRIMARY KEY,
+    total_sales BIGINT NOT NULL DEFAULT 0,
+    sto_count INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Fleet-wide weekly totals (week_start is the ISO week Monday); day_count counts STO-days
+CREATE TABLE sales_rollup_weekly (
+    week_start DATE PRIMARY KEY,
+    total_sales BIGINT NOT NULL DEFAULT 0,
+    day_count INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Per-STO weekly totals (per-STO daily totals are sales_harian itself)
+CREATE TABLE sales_rollup_sto_weekly (
+    sto_id VARCHAR(10) NOT NULL REFERENCES sto(sto_id) ON DELETE CASCADE,
+    week_start DATE NOT NULL,
+    total_sales BIGINT NOT NULL DEFAULT 0,
+    day_count INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (sto_id, week_start)
+);
+
+-- Per-STO sufficient statistics of the whole sales history (maintained by triggers on
+-- sales_harian): y is total_barang_terjual, x is days since 2000-01-01. Mean, std and
+-- the least-squares trend slope follow from these sums without reading sales_harian.
+CREATE TABLE sto_feature_stats (
+    sto_id VARCHAR(10) PRIMARY KEY REFERENCES sto(sto_id) ON DELETE CASCADE,
+    n INTEGER NOT NULL DEFAULT 0,
+    sum_y BIGINT NOT NULL DEFAULT 0,
+    sum_yy NUMERIC NOT NULL DEFAULT 0,
+    sum_x BIGINT NOT NULL DEFAULT 0,
+    sum_xx BIGINT NOT NULL DEFAULT 0,
+    sum_xy NUMERIC NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Cached per-STO seasonal indices (app/ml/seasonality_store.py); a row is stale once
+-- sto_feature_stats.updated_at moves past source_updated_at or it is older than the max age
+CREATE TABLE sto_seasonality (
+    sto_id VARCHAR(10) PRIMARY KEY REFERENCES sto(sto_id) ON DELETE CASCADE,
+    weekly_index REAL[] NOT NULL, -- Monday first
+    monthly_index REAL[] NOT NULL, -- January first
+    weekly_strength REAL NOT NULL DEFAULT 0,
+    computed_on DATE NOT NULL, -- last day of the sales window
+    source_updated_at TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Prediction history: append-only, range-partitioned by month on prediction_date.
+-- Partitions are named prediction_history_yYYYYmMM and created ahead of time by
+-- ensure_prediction_history_partition(); old months are detached (archived) or
+-- dropped as a whole without touching the rest of the table.
+CREATE TABLE prediction_history (
+    sto_id VARCHAR(10) NOT NULL,
+    prediction_period VARCHAR(20) NOT NULL, -- daily, weekly, monthly
+    prediction_date DATE NOT NULL, -- first day the prediction covers
+    predicted_value DECIMAL(12, 2) NOT NULL,
+    supply_recommendation DECIMAL(12, 2) NOT NULL DEFAULT 0.0,
+    model_accuracy DECIMAL(5, 2) DEFAULT 0.0,
+    model_version VARCHAR(50),
+    job_id VARCHAR(36),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (sto_id, prediction_period, prediction_date)
+) PARTITION BY RANGE (prediction_date);
+
 -- Prediction cache for performance
 CREATE TABLE predictions_cache (
     id SERIAL PRIMARY KEY,
@@ -166,6 +253,58 @@ CREATE TABLE predictions_cache (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Batch prediction jobs (progress is polled by job_id)
+CREATE TABLE prediction_jobs (
+    id SERIAL PRIMARY KEY,
+    job_id VARCHAR(36) UNIQUE NOT NULL,
+    sto_ids JSONB, -- NULL means every active STO
+    prediction_period VARCHAR(20) NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'queued', -- 'queued', 'running', 'completed', 'failed'
+    total INTEGER NOT NULL DEFAULT 0,
+    processed INTEGER NOT NULL DEFAULT 0,
+    written INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    created_by INTEGER REFERENCES users(id) ON DELETE SET NULL,
+    owner VARCHAR(100), -- host:pid:token of the process whose worker pool runs the job
+    heartbeat_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, -- refreshed by the owner while the job is unfinished
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP,
+    finished_at TIMESTAMP
+);
+
+-- Rendered report artifacts, keyed by template + parameters + source data version
+CREATE TABLE report_artifacts (
+    id SERIAL PRIMARY KEY,
+    report_id VARCHAR(36) UNIQUE NOT NULL,
+    artifact_key VARCHAR(40) UNIQUE NOT NULL, -- SHA-1 of template, parameters and data version
+    template VARCHAR(50) NOT NULL,
+    params JSONB NOT NULL DEFAULT '{}',
+    data_version VARCHAR(40) NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'queued', -- 'queued', 'running', 'completed', 'failed'
+    content JSONB,
+    error TEXT,
+    created_by INTEGER REFERENCES users(id) ON DELETE SET NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    finished_at TIMESTAMP,
+    expires_at TIMESTAMP NOT NULL
+);
+
+-- Upload registry: content hashes for duplicate detection and state for resumable uploads
+CREATE TABLE upload_registry (
+    id SERIAL PRIMARY KEY,
+    upload_id VARCHAR(36) UNIQUE NOT NULL,
+    upload_type VARCHAR(20) NOT NULL, -- 'sales', 'architecture', 'metadata'
+    filename VARCHAR(255) NOT NULL,
+    file_hash VARCHAR(32), -- MD5 of the file content, set once all bytes are received
+    status VARCHAR(20) NOT NULL DEFAULT 'receiving', -- 'receiving', 'processing', 'completed', 'failed'
+    total_bytes BIGINT,
+    bytes_received BIGINT NOT NULL DEFAULT 0,
+    report JSONB, -- ingest report as of the last committed chunk
+    error TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
 -- System configuration
 CREATE TABLE system_config (
     id SERIAL PRIMARY KEY,
@@ -183,9 +322,201 @@ CREATE INDEX idx_metadata_sto_sto ON metadata_sto(sto_id);
 CREATE INDEX idx_avg_sales_sto ON avg_sales(sto_id);
 CREATE INDEX idx_final_pemodelan_sto ON final_pemodelan(sto_id);
 CREATE INDEX idx_supply_warehouse_warehouse ON supply_warehouse(warehouse_id);
+CREATE INDEX idx_supply_warehouse_warehouse_date ON supply_warehouse(warehouse_id, supply_date DESC, id DESC);
 CREATE INDEX idx_supply_warehouse_sto ON supply_warehouse(sto_id);
 CREATE INDEX idx_predictions_cache_key ON predictions_cache(cache_key);
 CREATE INDEX idx_predictions_cache_expires ON predictions_cache(expires_at);
+CREATE INDEX idx_sales_rollup_sto_weekly_week ON sales_rollup_sto_weekly(week_start);
+CREATE INDEX idx_prediction_history_period_date ON prediction_history(prediction_period, prediction_date);
+CREATE INDEX idx_prediction_jobs_status ON prediction_jobs(status, created_at);
+CREATE INDEX idx_report_artifacts_expires ON report_artifacts(expires_at);
+CREATE INDEX idx_upload_registry_hash ON upload_registry(upload_type, file_hash);
+
+-- Search indexes: prefix (typeahead) lookups use text_pattern_ops btrees
+CREATE INDEX idx_sto_sto_id_prefix ON sto(lower(sto_id) text_pattern_ops);
+CREATE INDEX idx_sto_name_prefix ON sto(lower(name) text_pattern_ops);
+CREATE INDEX idx_warehouse_warehouse_id_prefix ON warehouse(lower(warehouse_id) text_pattern_ops);
+CREATE INDEX idx_warehouse_name_prefix ON warehouse(lower(name) text_pattern_ops);
+
+-- Substring/fuzzy search uses trigram GIN indexes when pg_trgm can be installed;
+-- without it the application falls back to unindexed pattern matching
+DO $$
+BEGIN
+    CREATE EXTENSION IF NOT EXISTS pg_trgm;
+    CREATE INDEX idx_sto_search_trgm ON sto USING GIN (search_text gin_trgm_ops);
+    CREATE INDEX idx_warehouse_search_trgm ON warehouse USING GIN (search_text gin_trgm_ops);
+EXCEPTION WHEN OTHERS THEN
+    RAISE NOTICE 'pg_trgm unavailable (%), search indexes not created', SQLERRM;
+END
+$$;
+
+-- Incremental rollup maintenance: each statement on sales_harian applies the
+-- net delta of its transition tables to the rollups instead of rebuilding them
+CREATE OR REPLACE FUNCTION apply_sales_rollup_delta() RETURNS trigger AS $$
+DECLARE
+    delta TEXT;
+    emptied_days DATE[];
+    emptied_weeks DATE[];
+    emptied_sto_ids VARCHAR(10)[];
+    emptied_sto_weeks DATE[];
+BEGIN
+    -- Signed contribution of each row; a trigger only sees the transition tables of its own event
+    delta := CASE TG_OP
+        WHEN 'INSERT' THEN 'SELECT sto_id, tanggal, total_barang_terjual::bigint AS sales, 1 AS days FROM new_rows'
+        WHEN 'DELETE' THEN 'SELECT sto_id, tanggal, -total_barang_terjual::bigint AS sales, -1 AS days FROM old_rows'
+        ELSE 'SELECT sto_id, tanggal, total_barang_terjual::bigint AS sales, 1 AS days FROM new_rows
+              UNION ALL
+              SELECT sto_id, tanggal, -total_barang_terjual::bigint, -1 FROM old_rows'
+    END;
+
+    -- One statement applies the delta to all three rollups and reports the buckets it emptied
+    EXECUTE format($sql$
+        WITH delta AS (%s),
+        daily AS (
+            INSERT INTO sales_rollup_daily AS r (tanggal, total_sales, sto_count, updated_at)
+            SELECT tanggal, SUM(sales), SUM(days), NOW() FROM delta GROUP BY tanggal
+            ON CONFLICT (tanggal) DO UPDATE
+                SET total_sales = r.total_sales + EXCLUDED.total_sales,
+                    sto_count = r.sto_count + EXCLUDED.sto_count,
+                    updated_at = NOW()
+            RETURNING r.tanggal, r.sto_count
+        ),
+        weekly AS (
+            INSERT INTO sales_rollup_weekly AS r (week_start, total_sales, day_count, updated_at)
+            SELECT DATE_TRUNC('week', tanggal)::date, SUM(sales), SUM(days), NOW()
+            FROM delta GROUP BY 1
+            ON CONFLICT (week_start) DO UPDATE
+                SET total_sales = r.total_sales + EXCLUDED.total_sales,
+                    day_count = r.day_count + EXCLUDED.day_count,
+                    updated_at = NOW()
+            RETURNING r.week_start, r.day_count
+        ),
+        sto_weekly AS (
+            -- Skip STOs being deleted: their rollup rows go away through the FK cascade
+            INSERT INTO sales_rollup_sto_weekly AS r (sto_id, week_start, total_sales, day_count, updated_at)
+            SELECT d.sto_id, DATE_TRUNC('week', d.tanggal)::date, SUM(d.sales), SUM(d.days), NOW()
+            FROM delta d
+            WHERE EXISTS (SELECT 1 FROM sto WHERE sto.sto_id = d.sto_id)
+            GROUP BY 1, 2
+            ON CONFLICT (sto_id, week_start) DO UPDATE
+                SET total_sales = r.total_sales + EXCLUDED.total_sales,
+                    day_count = r.day_count + EXCLUDED.day_count,
+                    updated_at = NOW()
+            RETURNING r.sto_id, r.week_start, r.day_count
+        )
+        SELECT (SELECT array_agg(tanggal) FROM daily WHERE sto_count <= 0),
+               (SELECT array_agg(week_start) FROM weekly WHERE day_count <= 0),
+               (SELECT array_agg(sto_id ORDER BY sto_id, week_start) FROM sto_weekly WHERE day_count <= 0),
+               (SELECT array_agg(week_start ORDER BY sto_id, week_start) FROM sto_weekly WHERE day_count <= 0)
+    $sql$, delta)
+    INTO emptied_days, emptied_weeks, emptied_sto_ids, emptied_sto_weeks;
+
+    -- Drop buckets emptied by deletes so "no data" stays distinguishable from zero sales
+    IF emptied_days IS NOT NULL THEN
+        DELETE FROM sales_rollup_daily WHERE tanggal = ANY(emptied_days) AND sto_count <= 0;
+    END IF;
+    IF emptied_weeks IS NOT NULL THEN
+        DELETE FROM sales_rollup_weekly WHERE week_start = ANY(emptied_weeks) AND day_count <= 0;
+    END IF;
+    IF emptied_sto_ids IS NOT NULL THEN
+        DELETE FROM sales_rollup_sto_weekly
+        WHERE (sto_id, week_start) IN (SELECT * FROM unnest(emptied_sto_ids, emptied_sto_weeks))
+          AND day_count <= 0;
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_sales_rollup_insert AFTER INSERT ON sales_harian
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION apply_sales_rollup_delta();
+CREATE TRIGGER trg_sales_rollup_update AFTER UPDATE ON sales_harian
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION apply_sales_rollup_delta();
+CREATE TRIGGER trg_sales_rollup_delete AFTER DELETE ON sales_harian
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION apply_sales_rollup_delta();
+
+-- Feature statistics maintenance: same transition-table approach as the rollups,
+-- adding (or for old rows subtracting) each row's contribution to the running sums
+CREATE OR REPLACE FUNCTION apply_sto_feature_stats_delta() RETURNS trigger AS $$
+DECLARE
+    delta TEXT;
+    emptied_sto_ids VARCHAR(10)[];
+BEGIN
+    delta := CASE TG_OP
+        WHEN 'INSERT' THEN 'SELECT sto_id, 1 AS sign, (tanggal - DATE ''2000-01-01'')::bigint AS x,
+                                   total_barang_terjual::bigint AS y FROM new_rows'
+        WHEN 'DELETE' THEN 'SELECT sto_id, -1 AS sign, (tanggal - DATE ''2000-01-01'')::bigint AS x,
+                                   total_barang_terjual::bigint AS y FROM old_rows'
+        ELSE 'SELECT sto_id, 1 AS sign, (tanggal - DATE ''2000-01-01'')::bigint AS x,
+                     total_barang_terjual::bigint AS y FROM new_rows
+              UNION ALL
+              SELECT sto_id, -1, (tanggal - DATE ''2000-01-01'')::bigint, total_barang_terjual::bigint FROM old_rows'
+    END;
+
+    -- Skip STOs being deleted: their row goes away through the FK cascade
+    EXECUTE format($sql$
+        WITH delta AS (%s),
+        upserted AS (
+            INSERT INTO sto_feature_stats AS f (sto_id, n, sum_y, sum_yy, sum_x, sum_xx, sum_xy, updated_at)
+            SELECT d.sto_id, SUM(d.sign), SUM(d.sign * d.y), SUM(d.sign * d.y::numeric * d.y),
+                   SUM(d.sign * d.x), SUM(d.sign * d.x * d.x), SUM(d.sign * d.x::numeric * d.y), NOW()
+            FROM delta d
+            WHERE EXISTS (SELECT 1 FROM sto WHERE sto.sto_id = d.sto_id)
+            GROUP BY d.sto_id
+            ON CONFLICT (sto_id) DO UPDATE
+                SET n = f.n + EXCLUDED.n,
+                    sum_y = f.sum_y + EXCLUDED.sum_y,
+                    sum_yy = f.sum_yy + EXCLUDED.sum_yy,
+                    sum_x = f.sum_x + EXCLUDED.sum_x,
+                    sum_xx = f.sum_xx + EXCLUDED.sum_xx,
+                    sum_xy = f.sum_xy + EXCLUDED.sum_xy,
+                    updated_at = NOW()
+            RETURNING f.sto_id, f.n
+        )
+        SELECT array_agg(sto_id) FROM upserted WHERE n <= 0
+    $sql$, delta)
+    INTO emptied_sto_ids;
+
+    IF emptied_sto_ids IS NOT NULL THEN
+        DELETE FROM sto_feature_stats WHERE sto_id = ANY(emptied_sto_ids) AND n <= 0;
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_sto_feature_stats_insert AFTER INSERT ON sales_harian
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION apply_sto_feature_stats_delta();
+CREATE TRIGGER trg_sto_feature_stats_update AFTER UPDATE ON sales_harian
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION apply_sto_feature_stats_delta();
+CREATE TRIGGER trg_sto_feature_stats_delete AFTER DELETE ON sales_harian
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION apply_sto_feature_stats_delta();
+
+-- Monthly partitions for prediction_history; safe to call repeatedly
+CREATE OR REPLACE FUNCTION ensure_prediction_history_partition(month_start DATE) RETURNS TEXT AS $$
+DECLARE
+    first_day DATE := DATE_TRUNC('month', month_start)::date;
+    partition_name TEXT := 'prediction_history_' || TO_CHAR(first_day, '"y"YYYY"m"MM');
+BEGIN
+    EXECUTE FORMAT(
+        'CREATE TABLE IF NOT EXISTS %I PARTITION OF prediction_history FOR VALUES FROM (%L) TO (%L)',
+        partition_name, first_day, (first_day + INTERVAL '1 month')::date
+    );
+    RETURN partition_name;
+EXCEPTION WHEN duplicate_table THEN
+    -- Created concurrently by another session
+    RETURN partition_name;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT ensure_prediction_history_partition((DATE_TRUNC('month', CURRENT_DATE) + n * INTERVAL '1 month')::date)
+FROM generate_series(-12, 2) AS n;
 
 -- Insert initial system configuration
 INSERT INTO system_config (config_key, config_value, description) VALUES
@@ -209,10 +540,10 @@ INSERT INTO sto (sto_id, name, location, region, province, latitude, longitude)
 ('JWK', 'Jawa Tengah', 'Semarang', 'Jawa Tengah', 'Jawa Tengah', -6.9667, 110.4167);
 
 -- Insert sample warehouse data
-INSERT INTO warehouse (warehouse_id, name, location, region, capacity, current_stock, available_stock, manager_name, contact_phone) VALUES
-('WH001', 'Warehouse Jakarta Pusat', 'Jakarta Pusat', 'Jakarta', 10000, 7500, 2500, 'Ahmad Suharto', '021-12345678'),
-('WH002', 'Warehouse Bandung', 'Bandung', 'Jawa Barat', 8000, 6000, 2000, 'Siti Nurhaliza', '022-87654321'),
-('WH003', 'Warehouse Surabaya', 'Surabaya', 'Jawa Timur', 12000, 9000, 3000, 'Budi Santoso', '031-11223344');
+INSERT INTO warehouse (warehouse_id, name, location, region, latitude, longitude, capacity, current_stock, available_stock, manager_name, contact_phone) VALUES
+('WH001', 'Warehouse Jakarta Pusat', 'Jakarta Pusat', 'Jakarta', -6.1862, 106.8341, 10000, 7500, 2500, 'Ahmad Suharto', '021-12345678'),
+('WH002', 'Warehouse Bandung', 'Bandung', 'Jawa Barat', -6.9147, 107.6098, 8000, 6000, 2000, 'Siti Nurhaliza', '022-87654321'),
+('WH003', 'Warehouse Surabaya', 'Surabaya', 'Jawa Timur', -7.2575, 112.7521, 12000, 9000, 3000, 'Budi Santoso', '031-11223344');
 
 -- Update warehouse available_stock calculation
 UPDATE warehouse SET reserved_stock = current_stock - available_stock;
\ No newline at end of file
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Importing app modules builds the global Database; keep its pool from connecting at import time
+os.environ.setdefault("DB_POOL_MIN_SIZE", "0")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,31 @@
+from datetime import datetime
+
+import pytest
+
+from app.api.deps import HTTPException, decode_cursor, encode_cursor
+
+def test_round_trip_with_types():
+    token = encode_cursor(["2025-03-01T08:30:00", 42])
+    assert decode_cursor(token, (datetime, int)) == [datetime(2025, 3, 1, 8, 30), 42]
+    assert decode_cursor(encode_cursor(["STO-001"]), (str,)) == ["STO-001"]
+
+@pytest.mark.parametrize("values, types", [
+    ([], (str,)),
+    (["STO-001", "extra"], (str,)),
+    ([1], (str,)),
+    (["2025-03-01"], (datetime, int)),
+    (["2025-03-01", "7"], (datetime, int)),
+    (["2025-03-01", True], (datetime, int)),
+    (["not a date", 7], (datetime, int)),
+    ([20250301, 7], (datetime, int)),
+])
+def test_rejects_wrong_shape(values, types):
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor(encode_cursor(values), types)
+    assert exc.value.status_code == 400
+    assert exc.value.detail == "Invalid cursor"
+
+@pytest.mark.parametrize("token", ["!!!", "e30", encode_cursor({"a": 1})])
+def test_rejects_garbage(token):
+    with pytest.raises(HTTPException):
+        decode_cursor(token, (str,))
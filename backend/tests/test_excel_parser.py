@@ -0,0 +1,50 @@
+import pandas as pd
+from openpyxl import Workbook
+
+from app.services.excel_parser import frame_from_rows, read_sheet
+
+def write_workbook(path, rows):
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.title = "data"
+    for row in rows:
+        sheet.append(row)
+    workbook.save(path)
+
+def test_frame_from_rows_matches_single_pass():
+    rows = [(f"STO{i:03d}", i, None if i % 3 else "x") for i in range(10)]
+    frame = frame_from_rows(iter(rows), ["sto", "n", "note"], chunk_rows=4)
+    expected = pd.DataFrame.from_records(rows, columns=["sto", "n", "note"])
+    pd.testing.assert_frame_equal(frame, expected)
+
+def test_frame_from_rows_keeps_repeated_headers():
+    frame = frame_from_rows(iter([(1, 2), (3, 4), (5, 6)]), ["a", "a"], chunk_rows=2)
+    assert frame.shape == (3, 2)
+    assert frame.iloc[:, 1].tolist() == [2, 4, 6]
+
+def test_frame_from_rows_empty():
+    frame = frame_from_rows(iter([]), ["a", "b"], chunk_rows=2)
+    assert list(frame.columns) == ["a", "b"]
+    assert len(frame) == 0
+
+def test_read_sheet_in_chunks(tmp_path):
+    path = str(tmp_path / "upload.xlsx")
+    write_workbook(path, [["STO", "Jumlah Port"]] + [[f"STO{i}", i] for i in range(7)])
+    frame = read_sheet(path, "data", chunk_rows=3)
+    assert list(frame.columns) == ["sto", "jumlah_port"]
+    assert frame["jumlah_port"].tolist() == list(range(7))
+
+def test_read_sheet_header_only(tmp_path):
+    path = str(tmp_path / "upload.xlsx")
+    write_workbook(path, [["STO", "Kapasitas"]])
+    frame = read_sheet(path, "data", chunk_rows=3)
+    assert list(frame.columns) == ["sto", "kapasitas"]
+    assert frame.empty
+
+def test_decimal_staging_types_match_target_columns():
+    from app.services.excel_parser import ARCHITECTURE_SPEC, METADATA_SPEC
+
+    types = {c.name: c.sql_type for spec in (ARCHITECTURE_SPEC, METADATA_SPEC) for c in spec.columns}
+    assert types["economic_index"] == "NUMERIC(8, 4)"
+    assert types["utilisasi"] == "NUMERIC(5, 2)"
+    assert types["kapasitas"] == "INTEGER"
@@ -0,0 +1,79 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from app.ml.models import FeatureEngineering
+from app.ml.seasonality import seasonal_indices, weekday_of
+
+WEEKLY_SHAPE = np.array([0.8, 0.9, 1.0, 1.0, 1.1, 1.4, 0.8])  # Monday first
+
+def day_range(start: date, days: int) -> np.ndarray:
+    return np.arange(days) + np.datetime64(start, "D")
+
+def weekly_sales(start: date, days: int) -> list:
+    rng = np.random.default_rng(0)
+    return [
+        {"tanggal": start + timedelta(days=i),
+         "total_barang_terjual": 100 * WEEKLY_SHAPE[(start + timedelta(days=i)).weekday()] + rng.normal(0, 1)}
+        for i in range(days)
+    ]
+
+def test_calculate_seasonality_without_sales_is_neutral():
+    assert FeatureEngineering._calculate_seasonality([]) == 1.0
+
+def test_calculate_seasonality_single_day():
+    assert FeatureEngineering._calculate_seasonality(
+        [{"tanggal": date(2025, 1, 6), "total_barang_terjual": 5}]
+    ) == 1.0
+
+def test_calculate_seasonality_accepts_iso_strings_and_gaps():
+    sales = [{"tanggal": "2025-01-06", "total_barang_terjual": 5},
+             {"tanggal": "2025-01-09T00:00:00", "total_barang_terjual": 7}]
+    assert FeatureEngineering._calculate_seasonality(sales) == pytest.approx(1.0)
+
+def test_calculate_seasonality_follows_weekly_pattern():
+    # Eight weeks starting on a Monday; the factor is for the following Monday
+    factor = FeatureEngineering._calculate_seasonality(weekly_sales(date(2025, 1, 6), 56))
+    assert factor == pytest.approx(WEEKLY_SHAPE[0] / WEEKLY_SHAPE.mean(), rel=0.05)
+
+def test_extract_features_includes_seasonality():
+    features = FeatureEngineering.extract_features("STO001", weekly_sales(date(2025, 1, 6), 56), {}, {})
+    assert features["seasonality"] == pytest.approx(WEEKLY_SHAPE[0] / WEEKLY_SHAPE.mean(), rel=0.05)
+
+def test_weekday_of_is_monday_first():
+    assert weekday_of(day_range(date(2025, 1, 6), 7)).tolist() == list(range(7))
+
+def test_seasonal_indices_recovers_weekly_shape():
+    rows = weekly_sales(date(2025, 1, 6), 56)
+    sales = np.array([[row["total_barang_terjual"] for row in rows]])
+    indices = seasonal_indices(sales, day_range(date(2025, 1, 6), 56))
+    assert indices.weekly_strength[0] > 3.0
+    np.testing.assert_allclose(indices.weekly[0], WEEKLY_SHAPE / WEEKLY_SHAPE.mean(), rtol=0.05)
+
+def test_seasonal_indices_flat_and_empty_rows_are_neutral():
+    sales = np.vstack([np.full(56, 4.0), np.full(56, np.nan)])
+    indices = seasonal_indices(sales, day_range(date(2025, 1, 6), 56))
+    np.testing.assert_array_equal(indices.weekly, np.ones((2, 7)))
+    np.testing.assert_array_equal(indices.monthly, np.ones((2, 12)))
+
+def test_seasonal_indices_monthly_pattern():
+    # January and March sell 10 a day, February 20; no weekly pattern
+    dates = day_range(date(2025, 1, 1), 90)
+    months = dates.astype("datetime64[M]").astype(np.int64) % 12
+    sales = np.where(months == 1, 20.0, 10.0)[None, :]
+    indices = seasonal_indices(sales, dates)
+    np.testing.assert_array_equal(indices.weekly[0], np.ones(7))
+    np.testing.assert_allclose(indices.monthly[0, :3], [0.75, 1.5, 0.75], rtol=1e-6)
+    np.testing.assert_array_equal(indices.monthly[0, 3:], np.ones(9))
+
+def test_seasonal_indices_skips_sparse_months():
+    dates = day_range(date(2025, 1, 20), 30)  # 12 days of January, 18 of February
+    indices = seasonal_indices(np.full((1, 30), 5.0), dates)
+    np.testing.assert_array_equal(indices.monthly[0], np.ones(12))
+
+def test_seasonal_indices_validates_shapes():
+    with pytest.raises(ValueError):
+        seasonal_indices(np.ones(7), day_range(date(2025, 1, 6), 7))
+    with pytest.raises(ValueError):
+        seasonal_indices(np.ones((1, 7)), day_range(date(2025, 1, 6), 6))